@@ -6,13 +6,16 @@ A Streamlit app for identifying limitations and future directions in research pa
 import streamlit as st
 import pandas as pd
 import altair as alt
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
+import itertools
 import logging
 from datetime import datetime
 
 # Import backend modules
 from backend.query_handler import get_query_handler, QueryHandler
 from backend.claude_chatbot import get_claude_chatbot
+from backend.claude_client import extract_partial_string
+from backend.topic_clusterer import get_topic_clusterer
 from backend import config
 
 # Configure logging
@@ -37,7 +40,7 @@ def get_backend():
         return None
 
 
-def query_research_gaps(topic: str) -> Dict[str, Any]:
+def query_research_gaps(topic: str, background_fetch: bool = True) -> Dict[str, Any]:
     """
     Query research gaps using the modular backend.
 
@@ -50,6 +53,8 @@ def query_research_gaps(topic: str) -> Dict[str, Any]:
 
     Args:
         topic: Research topic to analyze
+        background_fetch: Answer from local papers immediately and fetch missing
+            papers from external sources in the background
 
     Returns:
         Dictionary containing summary, limitations, future directions, and keyword trends
@@ -64,7 +69,8 @@ def query_research_gaps(topic: str) -> Dict[str, Any]:
             topic=topic,
             n_results=20,
             use_semantic=True,
-            use_keyword=True
+            use_keyword=True,
+            background_fetch=background_fetch
         )
 
         return result
@@ -74,6 +80,37 @@ def query_research_gaps(topic: str) -> Dict[str, Any]:
         return _mock_response(topic, error=str(e))
 
 
+def stream_research_gaps(topic: str, background_fetch: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Stream research gap events from the backend.
+
+    Yields the events of QueryHandler.stream_research_gaps: papers first, then
+    analysis tokens, the parsed analysis fields and finally "done" with the
+    full result. Falls back to a single "done" event with mock data.
+
+    Args:
+        topic: Research topic to analyze
+        background_fetch: Answer from local papers immediately and fetch missing
+            papers from external sources in the background
+    """
+    backend = get_backend()
+    if backend is None:
+        yield {"type": "done", "result": _mock_response(topic)}
+        return
+
+    try:
+        yield from backend.stream_research_gaps(
+            topic=topic,
+            n_results=20,
+            use_semantic=True,
+            use_keyword=True,
+            background_fetch=background_fetch
+        )
+    except Exception as e:
+        logger.error(f"Error streaming from backend: {e}")
+        yield {"type": "done", "result": _mock_response(topic, error=str(e))}
+
+
 def _mock_response(topic: str, error: str = None) -> Dict[str, Any]:
     """Fallback mock response when backend is unavailable."""
     message = f"Using mock data for topic: {topic}"
@@ -191,71 +228,20 @@ def render_keyword_chart(keyword_data: list):
 
 
 def cluster_papers_by_topic(papers: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-    """Use Claude to cluster papers by topic/focus area."""
+    """
+    Group papers by topic/focus area.
+
+    Clustering runs locally over the papers' stored embeddings and is cached
+    per result set, so Streamlit reruns do not recompute it. Labels come
+    from each cluster's top TF-IDF terms, or from Claude once its optional
+    background labeling (TOPIC_CLAUDE_LABELS) has finished.
+    """
     if not papers:
         return {}
 
     try:
-        import anthropic
-        from backend import config
-
-        # Use Opus model for better topic clustering
-        client = anthropic.Anthropic(api_key=config.CLAUDE_API_KEY)
-
-        # Extract titles
-        titles = [paper.get("title", "Unknown") for paper in papers if paper.get("title") != "Unknown"]
-
-        if not titles:
-            return {}
-
-        # Create prompt for Claude
-        titles_text = "\n".join([f"{i+1}. {title}" for i, title in enumerate(titles)])
-
-        prompt = f"""Analyze these research paper titles and group them by their main topic/focus area.
-Similar topics should be grouped together. Return ONLY a JSON object (no markdown, no explanation) in this exact format:
-
-{{
-  "Topic Name 1": [1, 3, 5],
-  "Topic Name 2": [2, 4],
-  "Topic Name 3": [6, 7, 8]
-}}
-
-Where the numbers are the paper indices from the list below. Make topic names concise (2-4 words).
-If a paper doesn't fit with others, it can be in its own topic group or in "Other Topics".
-
-Papers:
-{titles_text}
-
-Return ONLY the JSON object:"""
-
-        response = client.messages.create(
-            model="claude-opus-4-1-20250805",
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        # Extract response text
-        response_text = ""
-        for block in response.content:
-            if hasattr(block, "text"):
-                response_text += block.text
-
-        # Parse JSON (remove any markdown formatting)
-        import json
-        response_text = response_text.strip()
-        if response_text.startswith("```"):
-            # Remove markdown code blocks
-            lines = response_text.split("\n")
-            response_text = "\n".join([l for l in lines if not l.startswith("```")])
-
-        clusters = json.loads(response_text)
-
-        # Convert indices to titles
-        topic_papers = {}
-        for topic, indices in clusters.items():
-            topic_papers[topic] = [titles[i-1] for i in indices if 0 < i <= len(titles)]
-
-        return topic_papers
+        result = get_topic_clusterer().cluster(papers)
+        return {cluster["label"]: cluster["titles"] for cluster in result["clusters"]}
 
     except Exception as e:
         logger.error(f"Error clustering papers: {e}")
@@ -264,13 +250,13 @@ Return ONLY the JSON object:"""
 
 
 def render_topic_distribution(papers: List[Dict[str, Any]]):
-    """Render pie chart showing distribution of papers by AI-clustered topics."""
+    """Render pie chart showing distribution of papers by topic cluster."""
     if not papers:
         return
 
     st.markdown("<h3 style='text-align: center;'>Research Topics Distribution</h3>", unsafe_allow_html=True)
 
-    with st.spinner("Analyzing paper topics with AI..."):
+    with st.spinner("Grouping papers by topic..."):
         # Cluster papers by topic
         topic_clusters = cluster_papers_by_topic(papers)
 
@@ -459,6 +445,52 @@ def render_papers_used(papers: List[Dict[str, Any]]):
                 st.markdown("<hr style='margin: 28px 0;'>", unsafe_allow_html=True)
 
 
+def render_refresh_notice(topic: str):
+    """Show background-ingestion progress and offer newer results once ready."""
+    results = st.session_state.results
+    if not results or not results.get("refresh_pending"):
+        return
+
+    backend = get_backend()
+    if backend is None:
+        return
+
+    status = backend.get_refresh_status(topic)
+    if status["status"] == "pending":
+        st.info("⏳ Fetching more papers from arXiv, Semantic Scholar, PubMed and Crossref in the background...")
+        if st.button("🔄 Check for newer results"):
+            st.rerun()
+    elif status["status"] == "done" and status["fetched"] > 0:
+        st.success(f"✨ {status['fetched']} new papers were added. Newer results are available.")
+        if st.button("Load newer results"):
+            with st.spinner("Refreshing analysis..."):
+                st.session_state.results = query_research_gaps(topic)
+            st.rerun()
+    elif status["status"] == "done":
+        st.info("No new papers were found in the external sources. These results are up to date.")
+    elif status["status"] == "failed":
+        st.warning("⚠️ Fetching more papers in the background failed. These results come from the local corpus only.")
+
+
+def render_backend_status():
+    """Note backend clients that are still connecting or failed to start."""
+    backend = get_backend()
+    if backend is None:
+        return
+
+    readiness = backend.get_readiness()
+    if readiness["ready"]:
+        return
+
+    components = readiness["components"]
+    failed = [name for name, status in components.items() if status["state"] == "failed"]
+    starting = [name for name, status in components.items() if status["state"] in ("pending", "starting")]
+    if failed:
+        st.caption(f"⚠️ Unavailable: {', '.join(failed)}")
+    if starting:
+        st.caption(f"⏳ Still connecting: {', '.join(starting)}")
+
+
 def render_results(data: Dict[str, Any]):
     """Render the complete results page."""
     # Check if no results
@@ -506,6 +538,110 @@ def render_results(data: Dict[str, Any]):
             render_year_distribution(papers)
 
 
+def render_results_stream(topic: str) -> Dict[str, Any]:
+    """
+    Render results progressively while the backend streams them.
+
+    Papers and the year chart appear as soon as retrieval finishes, the
+    summary fills in as Claude writes it, and each limitation, direction and
+    keyword is added as soon as Claude has finished writing it. The final
+    parsed lists then replace the incremental ones. Layout matches
+    render_results.
+
+    Returns:
+        The final result (same as query_research_gaps)
+    """
+    warning_area = st.empty()
+    papers_area = st.empty()
+    summary_area = st.empty()
+    limitations_area = st.empty()
+    directions_area = st.empty()
+    keywords_area = st.empty()
+    distributions_area = st.container()
+
+    papers = []
+    response_text = ""
+    result = None
+    topic_column = None
+    streamed = {"limitation": [], "future_direction": [], "keyword_trend_entry": []}
+
+    with st.spinner("Searching papers..."):
+        events = stream_research_gaps(topic)
+        first_event = next(events, None)
+
+    for event in itertools.chain([first_event] if first_event else [], events):
+        kind = event["type"]
+
+        if kind == "papers":
+            papers = event["papers"]
+            if event.get("recent_warning"):
+                warning_area.warning(event["recent_warning"])
+            with papers_area.container():
+                st.markdown("<br>", unsafe_allow_html=True)
+                render_papers_used(papers)
+                st.markdown("<hr>", unsafe_allow_html=True)
+            summary_area.info("Analyzing research gaps...")
+            if papers:
+                with distributions_area:
+                    topic_column, year_column = st.columns(2)
+                    with year_column:
+                        render_year_distribution(papers)
+
+        elif kind == "analysis_token":
+            response_text += event["text"]
+            partial = extract_partial_string(response_text, "summary")
+            if partial:
+                with summary_area.container():
+                    render_summary(partial + " ▌")
+
+        elif kind == "summary":
+            with summary_area.container():
+                render_summary(event["summary"])
+                st.markdown("<hr>", unsafe_allow_html=True)
+
+        elif kind in streamed:
+            streamed[kind].append(event[kind])
+            if kind == "limitation":
+                with limitations_area.container():
+                    render_limitations(streamed[kind])
+            elif kind == "future_direction":
+                with directions_area.container():
+                    render_future_directions(streamed[kind])
+            else:
+                with keywords_area.container():
+                    render_keyword_chart(streamed[kind])
+
+        elif kind == "limitations" and event["limitations"]:
+            with limitations_area.container():
+                render_limitations(event["limitations"])
+                st.markdown("<hr>", unsafe_allow_html=True)
+
+        elif kind == "future_directions" and event["future_directions"]:
+            with directions_area.container():
+                render_future_directions(event["future_directions"])
+                st.markdown("<hr>", unsafe_allow_html=True)
+
+        elif kind == "keyword_trend" and event["keyword_trend"]:
+            with keywords_area.container():
+                render_keyword_chart(event["keyword_trend"])
+                st.markdown("<hr>", unsafe_allow_html=True)
+
+        elif kind == "done":
+            result = event["result"]
+
+    if result is not None and not papers and result.get("summary"):
+        # Nothing was streamed (no results, or the mock fallback): render it in one go
+        with papers_area.container():
+            render_results(result)
+
+    # Topics are clustered from the final paper list, so they are drawn once the stream ends
+    if topic_column is not None:
+        with topic_column:
+            render_topic_distribution(papers)
+
+    return result
+
+
 # ============================================================================
 # STYLING
 # ============================================================================
@@ -979,15 +1115,23 @@ def main():
                 key="search_input"
             )
 
+    render_backend_status()
+
     # Handle search - triggers automatically on Enter
-    if topic and topic != st.session_state.last_topic:
+    new_search = bool(topic) and topic != st.session_state.last_topic
+    if new_search:
         st.session_state.search_performed = True
         st.session_state.last_topic = topic
 
-        with st.spinner("Analyzing research gaps..."):
+    # Display results
+    if st.session_state.search_performed:
+        st.markdown('<div class="results-container">', unsafe_allow_html=True)
+        notice_area = st.container()
+
+        if new_search:
             try:
-                # Query the modular backend
-                results = query_research_gaps(topic)
+                # Stream from the modular backend: papers first, then the analysis
+                results = render_results_stream(topic)
 
                 if results and results.get("summary"):
                     st.session_state.results = results
@@ -998,14 +1142,14 @@ def main():
                 logger.error(f"Error in search: {e}")
                 st.error(f"An error occurred while fetching results: {str(e)}")
                 st.session_state.results = None
-
-    # Display results
-    if st.session_state.search_performed:
-        st.markdown('<div class="results-container">', unsafe_allow_html=True)
-        if st.session_state.results:
+        elif st.session_state.results:
             render_results(st.session_state.results)
-        else:
+
+        if not st.session_state.results:
             st.warning("No research gap information found for this topic. Try a broader query.")
+
+        with notice_area:
+            render_refresh_notice(st.session_state.last_topic)
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Chatbot section at bottom - ONLY AFTER SEARCH
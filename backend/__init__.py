@@ -16,16 +16,47 @@ Features:
 - Diverse source coverage across CS, biomedical, and general research
 """
 
-from backend.elastic_client import get_elastic_client, ElasticClient
-from backend.elastic_agent_client import get_elastic_agent_client, ElasticAgentClient
-from backend.chroma_client import get_chroma_client, ChromaClient
-from backend.claude_client import get_claude_client, ClaudeClient
-from backend.arxiv_client import get_arxiv_client, ArxivClient
-from backend.semantic_scholar_client import get_semantic_scholar_client, SemanticScholarClient
-from backend.pubmed_client import get_pubmed_client, PubMedClient
-from backend.crossref_client import get_crossref_client, CrossrefClient
-from backend.data_ingestion import get_paper_ingestor, PaperIngestor
-from backend.query_handler import get_query_handler, QueryHandler
+import importlib
+
+# Public names -> defining module; imported on first access so that
+# `import backend` does not pull in chromadb, elasticsearch, anthropic, etc.
+_LAZY_ATTRIBUTES = {
+    "get_elastic_client": "backend.elastic_client",
+    "ElasticClient": "backend.elastic_client",
+    "get_elastic_agent_client": "backend.elastic_agent_client",
+    "ElasticAgentClient": "backend.elastic_agent_client",
+    "get_chroma_client": "backend.chroma_client",
+    "ChromaClient": "backend.chroma_client",
+    "get_claude_client": "backend.claude_client",
+    "ClaudeClient": "backend.claude_client",
+    "get_arxiv_client": "backend.arxiv_client",
+    "ArxivClient": "backend.arxiv_client",
+    "get_semantic_scholar_client": "backend.semantic_scholar_client",
+    "SemanticScholarClient": "backend.semantic_scholar_client",
+    "get_pubmed_client": "backend.pubmed_client",
+    "PubMedClient": "backend.pubmed_client",
+    "get_crossref_client": "backend.crossref_client",
+    "CrossrefClient": "backend.crossref_client",
+    "get_paper_ingestor": "backend.data_ingestion",
+    "PaperIngestor": "backend.data_ingestion",
+    "get_query_handler": "backend.query_handler",
+    "QueryHandler": "backend.query_handler",
+    "get_component_registry": "backend.startup",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 __all__ = [
     "get_elastic_client",
@@ -48,6 +79,7 @@ __all__ = [
     "PaperIngestor",
     "get_query_handler",
     "QueryHandler",
+    "get_component_registry",
 ]
 
 __version__ = "3.0.0"  # Updated to 3.0.0 with multi-source, agents, and recency prioritization
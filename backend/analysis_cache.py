@@ -0,0 +1,223 @@
+"""
+Analysis cache for ScholarForge.
+Persists Claude research-gap analyses keyed by the exact context they were computed from.
+"""
+
+from typing import Dict, Any, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# On-disk cache of analyses (None = memory only)
+ANALYSIS_CACHE_PATH = "./analysis_cache.sqlite3"
+
+# Maximum number of analyses kept; least recently used are evicted first
+ANALYSIS_CACHE_SIZE = 2000
+
+# Seconds before a cached analysis expires
+ANALYSIS_CACHE_TTL = 7 * 24 * 3600
+
+
+class AnalysisCache:
+    """
+    LRU + TTL cache of Claude analyses, shared across sessions and processes.
+
+    The key covers everything that determines the answer: the model, the
+    prompt template version, the normalized topic and the ordered
+    (paper_id, section) identifiers that made up the context. Entries live in
+    SQLite when a path is set, otherwise in an in-process OrderedDict.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = ANALYSIS_CACHE_PATH,
+        max_size: int = ANALYSIS_CACHE_SIZE,
+        ttl: float = ANALYSIS_CACHE_TTL
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent cache, or None for memory only
+            max_size: Maximum number of entries
+            ttl: Entry lifetime in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS analyses ("
+                    "key TEXT PRIMARY KEY, created_at REAL, last_used REAL, analysis TEXT)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+                self._db.commit()
+                logger.info(f"Opened analysis cache at: {path}")
+            except Exception as e:
+                logger.warning(f"Could not open analysis cache at {path}, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(
+        model: str,
+        template_version: Union[int, str],
+        topic: str,
+        context_ids: Sequence[Tuple[str, str]]
+    ) -> str:
+        """
+        Hash the inputs that determine an analysis.
+
+        Args:
+            model: Claude model name
+            template_version: Version of the analysis prompt template
+            topic: Research topic (normalized here)
+            context_ids: Ordered (paper_id, section) pairs in the prompt context
+        """
+        payload = json.dumps({
+            "model": model,
+            "template_version": template_version,
+            "topic": " ".join(topic.lower().split()),
+            "context": [list(pair) for pair in context_ids]
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached analysis, or None if missing or expired."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._touch(key, now)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+
+            if entry is not None:
+                self._delete(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: str, analysis: Dict[str, Any]):
+        """Cache an analysis, evicting least recently used entries beyond max_size."""
+        now = time.time()
+
+        with self._lock:
+            if self._db is None:
+                self._memory[key] = (now, copy.deepcopy(analysis))
+                self._memory.move_to_end(key)
+                while len(self._memory) > self.max_size:
+                    self._memory.popitem(last=False)
+                    self.evictions += 1
+                return
+
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analyses (key, created_at, last_used, analysis) VALUES (?, ?, ?, ?)",
+                    (key, now, now, json.dumps(analysis))
+                )
+                overflow = self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] - self.max_size
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM analyses WHERE key IN "
+                        "(SELECT key FROM analyses ORDER BY last_used ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self.evictions += overflow
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error writing analysis cache: {e}")
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM analyses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current size."""
+        with self._lock:
+            if self._db is None:
+                size = len(self._memory)
+            else:
+                try:
+                    size = self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+                except Exception:
+                    size = None
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _get_entry(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Read (created_at, analysis) for a key from whichever tier is in use."""
+        if self._db is None:
+            return self._memory.get(key)
+
+        try:
+            row = self._db.execute(
+                "SELECT created_at, analysis FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading analysis cache: {e}")
+            return None
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _touch(self, key: str, now: float):
+        """Mark an entry as most recently used."""
+        if self._db is None:
+            self._memory.move_to_end(key)
+            return
+
+        try:
+            self._db.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        except Exception as e:
+            logger.error(f"Error updating analysis cache: {e}")
+
+    def _delete(self, key: str):
+        """Remove an expired entry."""
+        if self._db is None:
+            self._memory.pop(key, None)
+            return
+
+        try:
+            self._db.execute("DELETE FROM analyses WHERE key = ?", (key,))
+            self._db.commit()
+        except Exception as e:
+            logger.error(f"Error deleting from analysis cache: {e}")
+
+
+# Singleton instance
+_analysis_cache = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get or create the analysis cache singleton."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        _analysis_cache = AnalysisCache()
+    return _analysis_cache
@@ -7,8 +7,11 @@ import arxiv
 from typing import Dict, Any, List, Optional
 import logging
 import re
+import threading
 from datetime import datetime
 
+from backend.tracing import traced, current_span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,13 +23,27 @@ class ArxivClient:
     def __init__(self):
         """Initialize arXiv client."""
         self.client = arxiv.Client()
+        self._thread_state = threading.local()
         logger.info("Initialized arXiv client")
 
+    def take_raw_result_count(self) -> Optional[int]:
+        """
+        Return how many results the source itself returned for this thread's
+        last search_papers call (before papers were filtered out), and reset it.
+        None if the search failed before the source answered.
+        """
+        count = getattr(self._thread_state, "raw_result_count", None)
+        self._thread_state.raw_result_count = None
+        return count
+
+    @traced("arxiv.search_papers", capture=("max_results",))
     def search_papers(
         self,
         query: str,
         max_results: int = 10,
-        sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance
+        sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+        offset: int = 0,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search arXiv for papers matching the query.
@@ -35,31 +52,38 @@ class ArxivClient:
             query: Search query (topic, keywords, etc.)
             max_results: Maximum number of papers to return
             sort_by: Sort criterion (Relevance, LastUpdatedDate, SubmittedDate)
+            offset: Number of leading results to skip (to continue a previous fetch)
+            raise_errors: If True, re-raise request and processing errors instead of returning []
 
         Returns:
             List of paper dictionaries with metadata and content
         """
+        self._thread_state.raw_result_count = None
         try:
-            logger.info(f"Searching arXiv for: '{query}' (max {max_results} results)")
+            logger.info(f"Searching arXiv for: '{query}' (max {max_results} results, offset {offset})")
 
             # Create search
             search = arxiv.Search(
                 query=query,
-                max_results=max_results,
+                max_results=offset + max_results,
                 sort_by=sort_by
             )
 
             # Fetch results
             papers = []
-            for result in self.client.results(search):
+            for result in self.client.results(search, offset=offset):
                 paper = self._format_paper(result)
                 papers.append(paper)
+            self._thread_state.raw_result_count = len(papers)
 
+            current_span().set_attribute("results", len(papers))
             logger.info(f"Retrieved {len(papers)} papers from arXiv")
             return papers
 
         except Exception as e:
             logger.error(f"Error searching arXiv: {e}")
+            if raise_errors:
+                raise
             return []
 
     def get_paper_by_id(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
@@ -5,27 +5,390 @@ Handles semantic search and embedding storage for paper sections.
 
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+import numpy as np
 from typing import Dict, Any, List, Optional
 import logging
 import hashlib
+import threading
+import shelve
+from collections import OrderedDict
 
 from backend.config import (
     CHROMA_PERSIST_DIRECTORY,
     CHROMA_COLLECTION_NAME,
     CHROMA_SERVER_URL
 )
+from backend.embedding_service import EmbeddingService
+from backend.tracing import traced, current_span, SPAN_KIND_INTERNAL
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Mirror the collection into an in-process NumPy index for fast re-ranking
+USE_MEMORY_INDEX = True
+
+# Page size used when loading the persisted collection into the memory index
+MEMORY_INDEX_LOAD_BATCH_SIZE = 5000
+
+# Number of query embeddings kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Optional on-disk location for query embeddings (None = memory only)
+QUERY_EMBEDDING_CACHE_PATH = None
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings.
+
+    Keys are the normalized query text plus the embedding model ID, so a cache
+    persisted to disk is never reused with a different model. When a path is
+    given, entries are also written to a shelve database and survive restarts.
+    """
+
+    def __init__(self, max_size: int = QUERY_EMBEDDING_CACHE_SIZE, path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of embeddings kept in memory
+            path: Optional shelve file path for persistence across processes
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            try:
+                self._store = shelve.open(path)
+            except Exception as e:
+                logger.warning(f"Could not open query embedding cache at {path}: {e}")
+
+    @staticmethod
+    def make_key(query: str, model_id: str) -> str:
+        """Build a cache key from normalized query text and model ID."""
+        normalized = " ".join(query.lower().split())
+        return f"{model_id}::{normalized}"
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached embedding for key, or None."""
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+            if self._store is not None:
+                embedding = self._store.get(key)
+                if embedding is not None:
+                    self._remember(key, embedding)
+                    self.hits += 1
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, embedding: List[float]):
+        """Store an embedding under key."""
+        with self._lock:
+            self._remember(key, embedding)
+            if self._store is not None:
+                try:
+                    self._store[key] = embedding
+                    self._store.sync()
+                except Exception as e:
+                    logger.warning(f"Could not persist query embedding: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "persistent": self._store is not None
+        }
+
+    def close(self):
+        """Close the on-disk store, if any."""
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+    def _remember(self, key: str, embedding: List[float]):
+        """Insert into the in-memory LRU, evicting the oldest entry if full."""
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class VectorIndex:
+    """
+    In-process vector index mirroring the Chroma collection.
+
+    Holds every section embedding in one contiguous float32 matrix with a
+    paper_id -> rows map, so candidate-restricted or global top-k queries are a
+    single matrix product plus argpartition instead of a round trip through
+    Chroma's HNSW and SQLite layers. Distances are squared L2, matching the
+    Chroma collection's default space, so existing thresholds still apply.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        """Drop all rows and lookup tables."""
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._rows_by_paper: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension (0 until the first vector is added)."""
+        return self._matrix.shape[1]
+
+    def load_from_collection(self, collection, batch_size: int = MEMORY_INDEX_LOAD_BATCH_SIZE) -> int:
+        """
+        Populate the index from a persisted Chroma collection.
+
+        Args:
+            collection: Chroma collection to mirror
+            batch_size: Number of records fetched per page
+
+        Returns:
+            Number of sections loaded
+        """
+        self.clear()
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset
+            )
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            self.add(ids, page["embeddings"], page["documents"], page["metadatas"])
+            offset += len(ids)
+            if len(ids) < batch_size:
+                break
+        return self._size
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Add or replace sections in the index.
+
+        Args:
+            ids: Chroma document IDs
+            embeddings: One vector per ID
+            documents: Section text per ID
+            metadatas: Section metadata per ID (must contain paper_id)
+        """
+        if not ids:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError("Expected one embedding per id")
+
+        with self._lock:
+            if self._size == 0 and self.dimension != vectors.shape[1]:
+                self._matrix = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dimension}"
+                )
+
+            self._reserve(self._size + len(ids))
+
+            for doc_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                metadata = metadata or {}
+                row = self._row_by_id.get(doc_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(doc_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata)
+                    self._row_by_id[doc_id] = row
+                else:
+                    old_paper = self._metadatas[row].get("paper_id")
+                    if old_paper in self._rows_by_paper:
+                        self._rows_by_paper[old_paper].remove(row)
+                    self._documents[row] = document
+                    self._metadatas[row] = metadata
+
+                self._rows_by_paper.setdefault(metadata.get("paper_id"), []).append(row)
+                self._matrix[row] = vector
+                self._norms[row] = float(np.dot(vector, vector))
+
+    def remove_paper(self, paper_id: str):
+        """Remove all sections of a paper, compacting the matrix."""
+        with self._lock:
+            rows = self._rows_by_paper.get(paper_id)
+            if not rows:
+                return
+            keep = np.ones(self._size, dtype=bool)
+            keep[rows] = False
+            kept_rows = np.flatnonzero(keep)
+
+            self._matrix = np.ascontiguousarray(self._matrix[kept_rows])
+            self._norms = self._norms[kept_rows].copy()
+            self._ids = [self._ids[i] for i in kept_rows]
+            self._documents = [self._documents[i] for i in kept_rows]
+            self._metadatas = [self._metadatas[i] for i in kept_rows]
+            self._size = len(kept_rows)
+            self._rebuild_maps()
+
+    def clear(self):
+        """Remove everything from the index."""
+        with self._lock:
+            self._reset()
+
+    def search(
+        self,
+        query_embedding,
+        n_results: int = 10,
+        paper_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the top-k nearest sections by squared L2 distance.
+
+        Args:
+            query_embedding: Query vector
+            n_results: Number of results to return
+            paper_ids: Optional candidate papers to restrict scoring to
+
+        Returns:
+            List of sections in the same shape as ChromaClient.semantic_search
+        """
+        with self._lock:
+            if self._size == 0 or n_results <= 0:
+                return []
+
+            if paper_ids is None:
+                rows = None
+                matrix = self._matrix[:self._size]
+                norms = self._norms[:self._size]
+            else:
+                row_lists = [self._rows_by_paper[pid] for pid in set(paper_ids) if pid in self._rows_by_paper]
+                if not row_lists:
+                    return []
+                rows = np.fromiter(
+                    (row for row_list in row_lists for row in row_list),
+                    dtype=np.int64
+                )
+                matrix = self._matrix[rows]
+                norms = self._norms[rows]
+
+            query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            distances = norms - 2.0 * (matrix @ query) + float(np.dot(query, query))
+
+            k = min(n_results, distances.shape[0])
+            if k < distances.shape[0]:
+                top = np.argpartition(distances, k - 1)[:k]
+            else:
+                top = np.arange(distances.shape[0])
+            top = top[np.argsort(distances[top], kind="stable")]
+
+            results = []
+            for i in top:
+                row = int(rows[i]) if rows is not None else int(i)
+                results.append({
+                    "id": self._ids[row],
+                    "content": self._documents[row],
+                    "metadata": self._metadatas[row],
+                    "distance": max(0.0, float(distances[i]))
+                })
+            return results
+
+    def paper_embeddings(self, paper_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Mean section embedding per paper.
+
+        Args:
+            paper_ids: Papers to look up
+
+        Returns:
+            Vector per paper ID, for the papers present in the index
+        """
+        with self._lock:
+            return {
+                paper_id: self._matrix[self._rows_by_paper[paper_id]].mean(axis=0)
+                for paper_id in dict.fromkeys(paper_ids)
+                if self._rows_by_paper.get(paper_id)
+            }
+
+    def _reserve(self, capacity: int):
+        """Grow the backing matrix geometrically so appends stay amortized O(1)."""
+        if capacity <= self._matrix.shape[0]:
+            return
+        new_capacity = max(capacity, 2 * self._matrix.shape[0], 64)
+        matrix = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms = np.empty(new_capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix = matrix
+        self._norms = norms
+
+    def _rebuild_maps(self):
+        """Rebuild id/paper lookup tables after rows move."""
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._rows_by_paper = {}
+        for row, metadata in enumerate(self._metadatas):
+            self._rows_by_paper.setdefault(metadata.get("paper_id"), []).append(row)
+
 
 class ChromaClient:
     """Client for interacting with Chroma vector database."""
 
-    def __init__(self):
-        """Initialize Chroma client."""
+    def __init__(
+        self,
+        use_memory_index: bool = USE_MEMORY_INDEX,
+        query_cache_path: Optional[str] = QUERY_EMBEDDING_CACHE_PATH
+    ):
+        """
+        Initialize Chroma client.
+
+        Args:
+            use_memory_index: If True, mirror the collection into an in-process
+                VectorIndex and serve searches from it
+            query_cache_path: Optional file path to persist query embeddings
+        """
         try:
+            # Embed with the same model Chroma uses by default, explicitly, so
+            # query vectors can be computed outside of collection.query
+            self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            self.embedding_model_id = self._get_embedding_model_id()
+            self.query_embedding_cache = QueryEmbeddingCache(path=query_cache_path)
+            self._thread_state = threading.local()
+            self.embedding_service = EmbeddingService(self.embedding_function, self.embedding_model_id)
+
             # Initialize Chroma client
             if CHROMA_SERVER_URL:
                 # Client-server mode
@@ -45,7 +408,8 @@ class ChromaClient:
             # Get or create collection
             self.collection = self.client.get_or_create_collection(
                 name=CHROMA_COLLECTION_NAME,
-                metadata={"description": "Research paper sections for semantic search"}
+                metadata={"description": "Research paper sections for semantic search"},
+                embedding_function=self.embedding_function
             )
             logger.info(f"Loaded collection: {CHROMA_COLLECTION_NAME}")
 
@@ -53,6 +417,16 @@ class ChromaClient:
             logger.error(f"Error initializing Chroma client: {e}")
             raise
 
+        self.memory_index = None
+        if use_memory_index:
+            try:
+                self.memory_index = VectorIndex()
+                loaded = self.memory_index.load_from_collection(self.collection)
+                logger.info(f"Loaded {loaded} sections into in-memory vector index")
+            except Exception as e:
+                logger.warning(f"Could not build in-memory vector index, using Chroma queries: {e}")
+                self.memory_index = None
+
     def add_paper_section(
         self,
         paper_id: str,
@@ -85,21 +459,20 @@ class ChromaClient:
                 "section_name": section_name
             })
 
+            # Compute the embedding here (if not provided) so the same vector
+            # goes to both Chroma and the in-memory index
+            if not embedding:
+                embedding = self._embed_documents([content])[0]
+
             # Add to collection
-            if embedding:
-                self.collection.add(
-                    ids=[doc_id],
-                    documents=[content],
-                    metadatas=[meta],
-                    embeddings=[embedding]
-                )
-            else:
-                # Let Chroma compute embeddings automatically
-                self.collection.add(
-                    ids=[doc_id],
-                    documents=[content],
-                    metadatas=[meta]
-                )
+            self.collection.add(
+                ids=[doc_id],
+                documents=[content],
+                metadatas=[meta],
+                embeddings=[embedding]
+            )
+            if self.memory_index is not None:
+                self.memory_index.add([doc_id], [embedding], [content], [meta])
 
             logger.info(f"Added section '{section_name}' for paper: {paper_id}")
             return True
@@ -148,11 +521,15 @@ class ChromaClient:
                 metadatas.append(meta)
 
             if ids:
+                embeddings = self._embed_documents(documents)
                 self.collection.add(
                     ids=ids,
                     documents=documents,
-                    metadatas=metadatas
+                    metadatas=metadatas,
+                    embeddings=embeddings
                 )
+                if self.memory_index is not None:
+                    self.memory_index.add(ids, embeddings, documents, metadatas)
                 logger.info(f"Added {len(ids)} sections for paper: {paper_id}")
                 return True
             else:
@@ -163,6 +540,90 @@ class ChromaClient:
             logger.error(f"Error adding paper sections batch: {e}")
             return False
 
+    @traced("chroma.add_sections_bulk", capture=("papers",))
+    def add_sections_bulk(
+        self,
+        papers: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        Add sections from many papers with one embedding pass and chunked writes.
+
+        Sections are accumulated across all papers, embedded together by the
+        embedding service (which deduplicates by content hash), and written to
+        Chroma in chunks of at most the server's maximum batch size. A section
+        whose ID already occurred earlier in the call (the same paper listed
+        twice) is skipped, since Chroma rejects a write with duplicate IDs.
+
+        Args:
+            papers: List of dictionaries with keys paper_id, sections, metadata
+            batch_size: Maximum records per collection.add (default: server limit)
+
+        Returns:
+            Dictionary with counts of papers and sections added
+        """
+        ids = []
+        documents = []
+        metadatas = []
+        paper_ids = set()
+        seen_ids = set()
+        duplicates = 0
+
+        for paper in papers:
+            paper_id = paper["paper_id"]
+            base_meta = paper.get("metadata") or {}
+            for section_name, content in (paper.get("sections") or {}).items():
+                if not content or not content.strip():
+                    continue
+                doc_id = self._generate_doc_id(paper_id, section_name)
+                if doc_id in seen_ids:
+                    duplicates += 1
+                    continue
+                seen_ids.add(doc_id)
+                meta = base_meta.copy()
+                meta.update({
+                    "paper_id": paper_id,
+                    "section_name": section_name
+                })
+                ids.append(doc_id)
+                documents.append(content)
+                metadatas.append(meta)
+                paper_ids.add(paper_id)
+
+        if duplicates:
+            logger.warning(f"Skipped {duplicates} duplicate sections in bulk add")
+        if not ids:
+            return {"papers": 0, "sections": 0}
+
+        try:
+            embeddings = self._embed_documents(documents)
+
+            if batch_size is None:
+                try:
+                    batch_size = self.client.get_max_batch_size()
+                except Exception:
+                    batch_size = 5000
+
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                self.collection.upsert(
+                    ids=ids[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    embeddings=embeddings[start:end]
+                )
+
+            if self.memory_index is not None:
+                self.memory_index.add(ids, embeddings, documents, metadatas)
+
+            logger.info(f"Added {len(ids)} sections for {len(paper_ids)} papers")
+            return {"papers": len(paper_ids), "sections": len(ids)}
+
+        except Exception as e:
+            logger.error(f"Error adding sections in bulk: {e}")
+            return {"papers": 0, "sections": 0}
+
+    @traced("chroma.semantic_search", capture=("n_results",))
     def semantic_search(
         self,
         query: str,
@@ -181,32 +642,266 @@ class ChromaClient:
             List of matching paper sections with metadata and similarity scores
         """
         try:
-            # Perform query
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=filter_metadata
-            )
-
-            # Format results
-            formatted_results = []
-            if results["ids"] and results["ids"][0]:
-                for i in range(len(results["ids"][0])):
-                    result = {
-                        "id": results["ids"][0][i],
-                        "content": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "distance": results["distances"][0][i] if "distances" in results else None
-                    }
-                    formatted_results.append(result)
+            if self._memory_index_ready() and not filter_metadata:
+                current_span().set_attribute("backend", "memory_index")
+                formatted_results = self.memory_index.search(
+                    self._embed_query(query),
+                    n_results=n_results
+                )
+            else:
+                current_span().set_attributes(backend="chroma", filtered=bool(filter_metadata))
+                results = self.collection.query(
+                    query_embeddings=[self._embed_query(query)],
+                    n_results=n_results,
+                    where=filter_metadata
+                )
+                formatted_results = self._format_query_results(results)
 
+            current_span().set_attribute("results", len(formatted_results))
             logger.info(f"Found {len(formatted_results)} results for query: '{query[:50]}...'")
             return formatted_results
 
         except Exception as e:
             logger.error(f"Error performing semantic search: {e}")
+            current_span().record_exception(e)
             return []
 
+    @traced("chroma.semantic_search_within", capture=("paper_ids", "n_results"))
+    def semantic_search_within(
+        self,
+        query: str,
+        paper_ids: List[str],
+        n_results: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform semantic search restricted to a candidate set of papers.
+
+        Used for Stage 2 of two-stage retrieval: instead of searching the whole
+        collection and intersecting with the Stage 1 candidates afterwards, only
+        sections belonging to the candidates are scored (directly from the
+        in-memory index when available, otherwise via a `$in` filter on paper_id).
+
+        Args:
+            query: Search query text
+            paper_ids: Candidate paper IDs to score
+            n_results: Number of results to return
+
+        Returns:
+            List of matching paper sections with metadata and similarity scores
+        """
+        paper_ids = list(dict.fromkeys(pid for pid in paper_ids if pid))
+        if not paper_ids:
+            return []
+
+        try:
+            if self._memory_index_ready():
+                current_span().set_attribute("backend", "memory_index")
+                formatted_results = self.memory_index.search(
+                    self._embed_query(query),
+                    n_results=n_results,
+                    paper_ids=paper_ids
+                )
+            else:
+                current_span().set_attribute("backend", "chroma")
+                if len(paper_ids) == 1:
+                    where = {"paper_id": paper_ids[0]}
+                else:
+                    where = {"paper_id": {"$in": paper_ids}}
+
+                results = self.collection.query(
+                    query_embeddings=[self._embed_query(query)],
+                    n_results=n_results,
+                    where=where
+                )
+                formatted_results = self._format_query_results(results)
+
+            current_span().set_attribute("results", len(formatted_results))
+            logger.info(
+                f"Found {len(formatted_results)} results within {len(paper_ids)} candidates "
+                f"for query: '{query[:50]}...'"
+            )
+            return formatted_results
+
+        except Exception as e:
+            logger.error(f"Error performing candidate-scoped semantic search: {e}")
+            current_span().record_exception(e)
+            return []
+
+    @traced("chroma.semantic_search_within_many", capture=("queries", "n_results"))
+    def semantic_search_within_many(
+        self,
+        queries: List[str],
+        paper_ids_list: List[List[str]],
+        n_results: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Candidate-scoped semantic search for several queries at once.
+
+        All queries are embedded in one batch. Without the in-memory index, the
+        sections of every query's candidates are fetched in a single Chroma
+        call and scored locally, instead of one filtered query per topic.
+
+        Args:
+            queries: Search query texts
+            paper_ids_list: Candidate paper IDs for each query
+            n_results: Number of results to return per query
+
+        Returns:
+            One list of matching sections per query, same shape as semantic_search_within
+        """
+        candidates = [list(dict.fromkeys(pid for pid in paper_ids if pid)) for paper_ids in paper_ids_list]
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        active = [i for i, paper_ids in enumerate(candidates) if paper_ids]
+        if not active:
+            return results
+
+        try:
+            embeddings = self.embed_queries([queries[i] for i in active])
+
+            if self._memory_index_ready():
+                current_span().set_attribute("backend", "memory_index")
+                index = self.memory_index
+            else:
+                current_span().set_attribute("backend", "chroma")
+                all_ids = list(dict.fromkeys(pid for i in active for pid in candidates[i]))
+                if len(all_ids) == 1:
+                    where = {"paper_id": all_ids[0]}
+                else:
+                    where = {"paper_id": {"$in": all_ids}}
+
+                rows = self.collection.get(where=where, include=["embeddings", "documents", "metadatas"])
+                index = VectorIndex()
+                if len(rows["ids"]) > 0:
+                    index.add(rows["ids"], rows["embeddings"], rows["documents"], rows["metadatas"])
+                current_span().set_attribute("sections", len(rows["ids"]))
+
+            for i, embedding in zip(active, embeddings):
+                results[i] = index.search(embedding, n_results=n_results, paper_ids=candidates[i])
+
+            logger.info(f"Scored candidates for {len(active)} queries in one batch")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error performing batched candidate-scoped semantic search: {e}")
+            current_span().record_exception(e)
+            return [[] for _ in queries]
+
+    @traced("chroma.embed_queries", kind=SPAN_KIND_INTERNAL)
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several query strings, computing all cache misses in one batch.
+
+        Args:
+            queries: Query texts
+
+        Returns:
+            One embedding per query, in order
+        """
+        keys = [QueryEmbeddingCache.make_key(query, self.embedding_model_id) for query in queries]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+
+        missing = {}
+        for query, embedding in zip(queries, embeddings):
+            if embedding is None:
+                missing.setdefault(query, None)
+
+        if missing:
+            computed = self._compute_query_embeddings(list(missing))
+            for query, embedding in zip(missing, computed):
+                missing[query] = embedding
+                self.query_embedding_cache.put(
+                    QueryEmbeddingCache.make_key(query, self.embedding_model_id),
+                    embedding
+                )
+            embeddings = [
+                embedding if embedding is not None else missing[query]
+                for query, embedding in zip(queries, embeddings)
+            ]
+            self._thread_state.query_cache_outcome = "miss"
+        elif getattr(self._thread_state, "query_cache_outcome", None) is None:
+            self._thread_state.query_cache_outcome = "hit"
+
+        current_span().set_attributes(queries=len(queries), computed=len(missing))
+        return embeddings
+
+    def _memory_index_ready(self) -> bool:
+        """Whether searches can be served from the in-memory index."""
+        return self.memory_index is not None and len(self.memory_index) > 0
+
+    @traced("chroma.embed_query", kind=SPAN_KIND_INTERNAL)
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a single query string, reusing cached embeddings for repeat queries.
+
+        Every retrieval stage of a request (and repeat topics across requests)
+        goes through here, so the embedding model runs at most once per topic.
+        """
+        key = QueryEmbeddingCache.make_key(query, self.embedding_model_id)
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            embedding = self._compute_query_embeddings([query])[0]
+            self.query_embedding_cache.put(key, embedding)
+            self._thread_state.query_cache_outcome = "miss"
+            current_span().set_attribute("cache", "miss")
+        else:
+            if getattr(self._thread_state, "query_cache_outcome", None) is None:
+                self._thread_state.query_cache_outcome = "hit"
+            current_span().set_attribute("cache", "hit")
+        return embedding
+
+    def take_query_cache_outcome(self) -> Optional[str]:
+        """
+        Return "hit"/"miss" for query embeddings looked up by this thread since
+        the last call (None if none), and reset it. "miss" wins if any lookup missed.
+        """
+        outcome = getattr(self._thread_state, "query_cache_outcome", None)
+        self._thread_state.query_cache_outcome = None
+        return outcome
+
+    def _get_embedding_model_id(self) -> str:
+        """Identify the embedding model so cached vectors are never mixed across models."""
+        ef = self.embedding_function
+        model_name = getattr(ef, "MODEL_NAME", None)
+        if not model_name and callable(getattr(ef, "name", None)):
+            model_name = ef.name()
+        return model_name or type(ef).__name__
+
+    def _embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Embed a list of texts through the batched, content-hash-cached embedding service."""
+        return self.embedding_service.embed(documents)
+
+    def _compute_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed query texts with the model directly.
+
+        Queries bypass the embedding service: they are cached in the bounded
+        query embedding cache, and persisting every query in the content-hash
+        cache would grow it without limit.
+        """
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in self.embedding_function(queries)]
+
+    def _format_query_results(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Flatten a single-query Chroma result into a list of section dictionaries.
+
+        Args:
+            results: Raw result from collection.query
+
+        Returns:
+            List of sections with id, content, metadata and distance
+        """
+        formatted_results = []
+        if results["ids"] and results["ids"][0]:
+            for i in range(len(results["ids"][0])):
+                result = {
+                    "id": results["ids"][0][i],
+                    "content": results["documents"][0][i],
+                    "metadata": results["metadatas"][0][i],
+                    "distance": results["distances"][0][i] if results.get("distances") else None
+                }
+                formatted_results.append(result)
+        return formatted_results
+
     def get_paper_sections(self, paper_id: str) -> List[Dict[str, Any]]:
         """
         Retrieve all sections for a specific paper.
@@ -239,6 +934,49 @@ class ChromaClient:
             logger.error(f"Error retrieving paper sections: {e}")
             return []
 
+    @traced("chroma.get_paper_embeddings", kind=SPAN_KIND_INTERNAL, capture=("paper_ids",))
+    def get_paper_embeddings(self, paper_ids: List[str]) -> Dict[str, List[float]]:
+        """
+        Stored embeddings of papers, as the mean of their section embeddings.
+
+        Nothing is re-embedded: vectors come from the in-memory index when it
+        is loaded, otherwise from one Chroma get for all papers.
+
+        Args:
+            paper_ids: Paper identifiers
+
+        Returns:
+            Embedding per paper ID (papers without stored sections are omitted)
+        """
+        paper_ids = list(dict.fromkeys(pid for pid in paper_ids if pid))
+        if not paper_ids:
+            return {}
+
+        try:
+            if self._memory_index_ready():
+                current_span().set_attribute("backend", "memory_index")
+                embeddings = self.memory_index.paper_embeddings(paper_ids)
+            else:
+                current_span().set_attribute("backend", "chroma")
+                if len(paper_ids) == 1:
+                    where = {"paper_id": paper_ids[0]}
+                else:
+                    where = {"paper_id": {"$in": paper_ids}}
+
+                rows = self.collection.get(where=where, include=["embeddings", "metadatas"])
+                index = VectorIndex()
+                if len(rows["ids"]) > 0:
+                    index.add(rows["ids"], rows["embeddings"], [""] * len(rows["ids"]), rows["metadatas"])
+                embeddings = index.paper_embeddings(paper_ids)
+
+            current_span().set_attribute("found", len(embeddings))
+            return {paper_id: vector.tolist() for paper_id, vector in embeddings.items()}
+
+        except Exception as e:
+            logger.error(f"Error retrieving paper embeddings: {e}")
+            current_span().record_exception(e)
+            return {}
+
     def delete_paper(self, paper_id: str) -> bool:
         """
         Delete all sections for a paper.
@@ -253,6 +991,8 @@ class ChromaClient:
             self.collection.delete(
                 where={"paper_id": paper_id}
             )
+            if self.memory_index is not None:
+                self.memory_index.remove_paper(paper_id)
             logger.info(f"Deleted all sections for paper: {paper_id}")
             return True
 
@@ -272,7 +1012,10 @@ class ChromaClient:
             return {
                 "name": CHROMA_COLLECTION_NAME,
                 "document_count": count,
-                "persist_directory": CHROMA_PERSIST_DIRECTORY
+                "persist_directory": CHROMA_PERSIST_DIRECTORY,
+                "memory_index_size": len(self.memory_index) if self.memory_index is not None else None,
+                "query_embedding_cache": self.query_embedding_cache.stats(),
+                "embedding_service": self.embedding_service.get_stats()
             }
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
@@ -303,8 +1046,11 @@ class ChromaClient:
             self.client.delete_collection(name=CHROMA_COLLECTION_NAME)
             self.collection = self.client.create_collection(
                 name=CHROMA_COLLECTION_NAME,
-                metadata={"description": "Research paper sections for semantic search"}
+                metadata={"description": "Research paper sections for semantic search"},
+                embedding_function=self.embedding_function
             )
+            if self.memory_index is not None:
+                self.memory_index.clear()
             logger.warning(f"Reset collection: {CHROMA_COLLECTION_NAME}")
             return True
 
@@ -4,33 +4,105 @@ Handles research gap analysis and synthesis using Claude API.
 """
 
 import anthropic
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Generator, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
 import json
+import re
+import threading
+import time
+import weakref
 
 from backend.config import (
     CLAUDE_API_KEY,
     CLAUDE_MODEL,
     CLAUDE_MAX_TOKENS
 )
+from backend.tracing import traced, current_span, span, propagate, SPAN_KIND_CLIENT, SPAN_KIND_INTERNAL
+from backend.analysis_cache import AnalysisCache, get_analysis_cache
+from backend.context_packer import ContextPacker, estimate_tokens
+from backend.rate_limiter import RateLimiter, get_rate_limiter, parse_retry_after
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump whenever _create_analysis_prompt or the context layout changes, so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = 2
+
+# Map-reduce analysis: smaller, faster model for the per-shard (map) calls
+CLAUDE_MAP_MODEL = "claude-haiku-4-5"
+
+# Papers per map shard, context budget per shard and output cap per map call
+MAP_SHARD_PAPERS = 25
+MAP_SHARD_TOKEN_BUDGET = 6000
+MAP_MAX_TOKENS = 1500
+
+# Concurrent map calls per analysis (the shared rate limiter still applies)
+MAP_REDUCE_CONCURRENCY = 8
+
+# Bump whenever _create_map_prompt changes, so cached shard summaries are not reused
+MAP_PROMPT_VERSION = 1
+
+# Model and prompt version for naming topic clusters
+CLAUDE_LABEL_MODEL = CLAUDE_MAP_MODEL
+LABEL_PROMPT_VERSION = 1
+
+# Message Batches API: seconds between status polls and how long to wait for a batch to end
+BATCH_POLL_INTERVAL = 30.0
+BATCH_TIMEOUT = 24 * 3600
+
+# Event type emitted for each completed element of a streamed top-level list
+STREAM_ITEM_EVENTS = {
+    "limitations": "limitation",
+    "future_directions": "future_direction",
+    "keyword_trend": "keyword_trend_entry"
+}
+
+# Alternative API endpoint, e.g. a local stub server for load tests (None = Anthropic's default)
+CLAUDE_BASE_URL = None
+
 
 class ClaudeClient:
     """Client for interacting with Claude API for research synthesis."""
 
-    def __init__(self):
-        """Initialize Claude API client."""
+    def __init__(
+        self,
+        analysis_cache: Optional[AnalysisCache] = None,
+        context_packer: Optional[ContextPacker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = CLAUDE_BASE_URL
+    ):
+        """
+        Initialize Claude API client.
+
+        Args:
+            analysis_cache: Cache for research-gap analyses (defaults to the shared one)
+            context_packer: Packs retrieved papers into the prompt's token budget
+            rate_limiter: Admission control shared by all Claude calls (defaults to the shared one)
+            api_key: API key (defaults to CLAUDE_API_KEY from config)
+            base_url: API endpoint override (e.g. a local stub server)
+        """
+        self.analysis_cache = analysis_cache or get_analysis_cache()
+        self.context_packer = context_packer or ContextPacker()
+        self.map_context_packer = ContextPacker(token_budget=MAP_SHARD_TOKEN_BUDGET)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.api_key = api_key or CLAUDE_API_KEY
+        self.base_url = base_url
+        self._thread_state = threading.local()
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
         try:
-            if CLAUDE_API_KEY == "PUT_CLAUDE_API_KEY_HERE":
+            if self.api_key == "PUT_CLAUDE_API_KEY_HERE":
                 logger.warning("Claude API key not set. Using mock mode.")
                 self.client = None
                 self.mock_mode = True
             else:
-                self.client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+                # Retries are handled by _create_message under the shared rate limiter
+                self.client = anthropic.Anthropic(api_key=self.api_key, base_url=base_url, max_retries=0)
                 self.mock_mode = False
                 logger.info("Successfully initialized Claude API client")
 
@@ -39,6 +111,7 @@ class ClaudeClient:
             self.client = None
             self.mock_mode = True
 
+    @traced("claude.analyze_research_gaps", capture=("paper_sections", "elastic_results"))
     def analyze_research_gaps(
         self,
         topic: str,
@@ -63,33 +136,462 @@ class ClaudeClient:
         if self.mock_mode:
             return self._mock_analyze_research_gaps(topic)
 
-        try:
-            # Build context from retrieved papers
-            context = self._build_context(topic, paper_sections, elastic_results)
+        packed = self._pack_context(paper_sections, elastic_results)
+        cache_key = self._analysis_cache_key(topic, packed)
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            return cached
 
-            # Create prompt for Claude
-            prompt = self._create_analysis_prompt(topic, context)
+        try:
+            # Create prompt for Claude from the packed context
+            prompt = self._create_analysis_prompt(topic, packed["text"])
 
             # Call Claude API
-            message = self.client.messages.create(
-                model=CLAUDE_MODEL,
-                max_tokens=CLAUDE_MAX_TOKENS,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            message = self._create_message(prompt, CLAUDE_MAX_TOKENS)
 
             # Parse response
             response_text = message.content[0].text
+            self._record_usage(message, prompt, response_text)
             result = self._parse_analysis_response(response_text)
+            self._store_analysis(cache_key, result)
 
             logger.info(f"Completed research gap analysis for topic: {topic}")
             return result
 
         except Exception as e:
             logger.error(f"Error analyzing research gaps: {e}")
+            current_span().record_exception(e)
+            return self._mock_analyze_research_gaps(topic)
+
+    async def analyze_research_gaps_async(
+        self,
+        topic: str,
+        paper_sections: List[Dict[str, Any]],
+        elastic_results: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of analyze_research_gaps.
+
+        Uses anthropic.AsyncAnthropic and awaits the shared rate limiter, so
+        many analyses can be gathered on one event loop while staying within
+        the account's request and token limits.
+
+        Args:
+            topic: Research topic query
+            paper_sections: List of paper sections from Chroma (semantic search results)
+            elastic_results: Optional list of papers from Elastic (keyword search)
+        """
+        if self.mock_mode:
+            return self._mock_analyze_research_gaps(topic)
+
+        with span(
+            "claude.analyze_research_gaps_async",
+            kind=SPAN_KIND_CLIENT,
+            paper_sections=len(paper_sections),
+            elastic_results=len(elastic_results or [])
+        ):
+            packed = self._pack_context(paper_sections, elastic_results)
+            cache_key = self._analysis_cache_key(topic, packed)
+            cached = self._cached_analysis(cache_key)
+            if cached is not None:
+                return cached
+
+            try:
+                prompt = self._create_analysis_prompt(topic, packed["text"])
+                message = await self._create_message_async(prompt, CLAUDE_MAX_TOKENS)
+
+                response_text = message.content[0].text
+                self._record_usage(message, prompt, response_text)
+                result = self._parse_analysis_response(response_text)
+                self._store_analysis(cache_key, result)
+
+                logger.info(f"Completed async research gap analysis for topic: {topic}")
+                return result
+
+            except Exception as e:
+                logger.error(f"Error analyzing research gaps (async): {e}")
+                current_span().record_exception(e)
+                return self._mock_analyze_research_gaps(topic)
+
+    def stream_research_gaps(
+        self,
+        topic: str,
+        paper_sections: List[Dict[str, Any]],
+        elastic_results: Optional[List[Dict[str, Any]]] = None
+    ) -> Generator[str, None, Dict[str, Any]]:
+        """
+        Streaming variant of analyze_research_gaps.
+
+        Yields Claude's response text as it is generated; the parsed analysis
+        (same shape as analyze_research_gaps) is the generator's return value.
+
+        Args:
+            topic: Research topic query
+            paper_sections: List of paper sections from Chroma (semantic search results)
+            elastic_results: Optional list of papers from Elastic (keyword search)
+        """
+        if self.mock_mode:
+            return self._mock_analyze_research_gaps(topic)
+
+        packed = self._pack_context(paper_sections, elastic_results)
+        cache_key = self._analysis_cache_key(topic, packed)
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+
+        with span(
+            "claude.stream_research_gaps",
+            kind=SPAN_KIND_CLIENT,
+            paper_sections=len(paper_sections),
+            elastic_results=len(elastic_results or [])
+        ):
+            try:
+                prompt = self._create_analysis_prompt(topic, packed["text"])
+
+                estimated_tokens = estimate_tokens(prompt) + CLAUDE_MAX_TOKENS
+                attempt = 0
+                while True:
+                    self._note_throttle(self.rate_limiter.acquire(estimated_tokens))
+                    chunks = []
+                    used_tokens = 0
+                    try:
+                        with self.client.messages.stream(
+                            model=CLAUDE_MODEL,
+                            max_tokens=CLAUDE_MAX_TOKENS,
+                            messages=[
+                                {"role": "user", "content": prompt}
+                            ]
+                        ) as stream:
+                            for text in stream.text_stream:
+                                chunks.append(text)
+                                yield text
+                            message = stream.get_final_message()
+                        used_tokens = self._usage_tokens(message, estimated_tokens)
+                        break
+                    except Exception as e:
+                        # Only retry if nothing has been shown to the caller yet
+                        delay = None if chunks else self._retry_delay(e, attempt)
+                        if delay is None:
+                            raise
+                    finally:
+                        self.rate_limiter.release(estimated_tokens, used_tokens)
+                    attempt += 1
+                    time.sleep(delay)
+
+                response_text = "".join(chunks)
+                self._record_usage(message, prompt, response_text)
+                result = self._parse_analysis_response(response_text)
+                self._store_analysis(cache_key, result)
+
+                logger.info(f"Completed streamed research gap analysis for topic: {topic}")
+                return result
+
+            except Exception as e:
+                logger.error(f"Error streaming research gap analysis: {e}")
+                current_span().record_exception(e)
+                return self._mock_analyze_research_gaps(topic)
+
+    def stream_analysis_events(
+        self,
+        topic: str,
+        paper_sections: List[Dict[str, Any]],
+        elastic_results: Optional[List[Dict[str, Any]]] = None
+    ) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+        """
+        Stream the analysis as typed events, parsing the JSON incrementally.
+
+        Each event is yielded as soon as it is complete in Claude's output:
+            {"type": "analysis_token", "text": ...}
+            {"type": "summary", "summary": ...}
+            {"type": "limitation", "index": i, "limitation": ...}
+            {"type": "future_direction", "index": i, "future_direction": ...}
+            {"type": "keyword_trend_entry", "index": i, "keyword_trend_entry": {...}}
+        Nothing is yielded for cached or mock analyses. The full parsed
+        analysis is the generator's return value.
+
+        Args:
+            topic: Research topic query
+            paper_sections: List of paper sections from Chroma (semantic search results)
+            elastic_results: Optional list of papers from Elastic (keyword search)
+        """
+        parser = AnalysisStreamParser()
+        stream = self.stream_research_gaps(topic, paper_sections, elastic_results)
+        while True:
+            try:
+                text = next(stream)
+            except StopIteration as stop:
+                return stop.value
+
+            yield {"type": "analysis_token", "text": text}
+            for parsed in parser.feed(text):
+                if parsed["kind"] == "field" and parsed["key"] == "summary":
+                    yield {"type": "summary", "summary": parsed["value"]}
+                elif parsed["kind"] == "item" and parsed["key"] in STREAM_ITEM_EVENTS:
+                    event_type = STREAM_ITEM_EVENTS[parsed["key"]]
+                    yield {"type": event_type, "index": parsed["index"], event_type: parsed["value"]}
+
+    @traced("claude.analyze_research_gaps_map_reduce", kind=SPAN_KIND_INTERNAL, capture=("paper_sections", "elastic_results"))
+    def analyze_research_gaps_map_reduce(
+        self,
+        topic: str,
+        paper_sections: List[Dict[str, Any]],
+        elastic_results: Optional[List[Dict[str, Any]]] = None,
+        shard_papers: int = MAP_SHARD_PAPERS
+    ) -> Dict[str, Any]:
+        """
+        Analyze a large candidate set (hundreds of papers) with map-reduce.
+
+        Map: papers are split into shards of `shard_papers`, and each shard's
+        limitations, future work, themes and keywords are extracted in
+        parallel with CLAUDE_MAP_MODEL. Shard summaries are topic-independent
+        and cached by the hash of the shard's paper/section set, so
+        overlapping queries reuse them. Reduce: one CLAUDE_MODEL call merges
+        the shard summaries into the usual analysis. Wall-clock time is about
+        one map call plus the reduce call.
+
+        Falls back to analyze_research_gaps when everything fits in one shard
+        or every map call fails.
+
+        Args:
+            topic: Research topic query
+            paper_sections: Paper sections from Chroma (semantic search results)
+            elastic_results: Optional papers from Elastic (keyword search)
+            shard_papers: Papers per map shard
+
+        Returns:
+            Same structure as analyze_research_gaps
+        """
+        if self.mock_mode:
             return self._mock_analyze_research_gaps(topic)
 
+        shards = self._shard_by_paper(paper_sections, elastic_results, shard_papers)
+        current_span().set_attributes(
+            papers=sum(len(shard["paper_ids"]) for shard in shards),
+            shards=len(shards)
+        )
+        if len(shards) <= 1:
+            return self.analyze_research_gaps(topic, paper_sections, elastic_results)
+
+        # Map: summarize shards in parallel
+        with ThreadPoolExecutor(
+            max_workers=min(MAP_REDUCE_CONCURRENCY, len(shards)),
+            thread_name_prefix="map-analysis"
+        ) as executor:
+            futures = [executor.submit(propagate(self._summarize_shard), shard) for shard in shards]
+            summaries = [future.result() for future in futures]
+
+        completed = [(shard, summary) for shard, summary in zip(shards, summaries) if summary is not None]
+        current_span().set_attribute("shards_summarized", len(completed))
+        if not completed:
+            logger.warning("All map calls failed; falling back to single-call analysis")
+            return self.analyze_research_gaps(topic, paper_sections, elastic_results)
+
+        # Reduce: one call over the shard summaries, cached by the shard set
+        cache_key = AnalysisCache.make_key(
+            CLAUDE_MODEL,
+            f"{ANALYSIS_PROMPT_VERSION}/reduce-{MAP_PROMPT_VERSION}",
+            topic,
+            [(shard["cache_key"], "shard") for shard, _ in completed]
+        )
+        cached = self._cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            context = self._format_shard_summaries(completed)
+            prompt = self._create_analysis_prompt(topic, context)
+            with span("claude.reduce", kind=SPAN_KIND_CLIENT, shards=len(completed)):
+                message = self._create_message(prompt, CLAUDE_MAX_TOKENS)
+                response_text = message.content[0].text
+                self._record_usage(message, prompt, response_text)
+            result = self._parse_analysis_response(response_text)
+            self._store_analysis(cache_key, result)
+
+            logger.info(
+                f"Completed map-reduce analysis for topic: {topic} "
+                f"({len(completed)} shards, {sum(len(shard['paper_ids']) for shard, _ in completed)} papers)"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in reduce step of map-reduce analysis: {e}")
+            current_span().record_exception(e)
+            return self._mock_analyze_research_gaps(topic)
+
+    @traced("claude.analyze_research_gaps_batch", kind=SPAN_KIND_INTERNAL)
+    def analyze_research_gaps_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        poll_interval: Optional[float] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze many topics offline through the Message Batches API.
+
+        Requests already in the analysis cache are answered from it; the rest
+        are submitted as one batch and polled until it ends. Batched requests
+        are billed at a discount and do not count against the interactive
+        rate limits, so this suits precomputing reports, not live queries.
+        Requests the batch did not answer (errors, expiry, timeout) are
+        retried one at a time with analyze_research_gaps.
+
+        Args:
+            requests: Dictionaries with "topic", "paper_sections" and optional "elastic_results"
+            poll_interval: Seconds between batch status polls (default BATCH_POLL_INTERVAL)
+            timeout: Seconds to wait for the batch before canceling it (default BATCH_TIMEOUT)
+
+        Returns:
+            One analysis per request, in input order, shaped like analyze_research_gaps'
+        """
+        if self.mock_mode:
+            return [self._mock_analyze_research_gaps(request["topic"]) for request in requests]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+        pending: Dict[str, Tuple[int, str, str]] = {}
+        for i, request in enumerate(requests):
+            packed = self._pack_context(request["paper_sections"], request.get("elastic_results"))
+            cache_key = self._analysis_cache_key(request["topic"], packed)
+            cached = self.analysis_cache.get(cache_key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                prompt = self._create_analysis_prompt(request["topic"], packed["text"])
+                pending[f"analysis-{i}"] = (i, cache_key, prompt)
+        current_span().set_attributes(requests=len(requests), cached=len(requests) - len(pending))
+
+        if pending:
+            try:
+                responses = self._run_batch(
+                    {custom_id: prompt for custom_id, (_, _, prompt) in pending.items()},
+                    BATCH_POLL_INTERVAL if poll_interval is None else poll_interval,
+                    BATCH_TIMEOUT if timeout is None else timeout
+                )
+            except Exception as e:
+                logger.error(f"Error running analysis batch: {e}")
+                current_span().record_exception(e)
+                responses = {}
+
+            current_span().set_attribute("batch_succeeded", len(responses))
+            for custom_id, (i, cache_key, _) in pending.items():
+                if custom_id in responses:
+                    results[i] = self._parse_analysis_response(responses[custom_id])
+                    self._store_analysis(cache_key, results[i])
+
+        for i, request in enumerate(requests):
+            if results[i] is None:
+                results[i] = self.analyze_research_gaps(
+                    request["topic"],
+                    request["paper_sections"],
+                    request.get("elastic_results")
+                )
+
+        logger.info(f"Completed batch analysis of {len(requests)} topics ({len(requests) - len(pending)} cached)")
+        return results
+
+    def _run_batch(self, prompts: Dict[str, str], poll_interval: float, timeout: float) -> Dict[str, str]:
+        """
+        Submit prompts as one message batch and wait for it to end.
+
+        Returns:
+            Response text by custom ID, for the requests that succeeded
+        """
+        batch = self.client.messages.batches.create(requests=[
+            {
+                "custom_id": custom_id,
+                "params": {
+                    "model": CLAUDE_MODEL,
+                    "max_tokens": CLAUDE_MAX_TOKENS,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            }
+            for custom_id, prompt in prompts.items()
+        ])
+        current_span().set_attribute("batch_id", batch.id)
+        logger.info(f"Submitted message batch {batch.id} with {len(prompts)} requests")
+
+        deadline = time.monotonic() + timeout
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                logger.warning(f"Message batch {batch.id} did not end within {timeout:.0f}s; canceling")
+                self.client.messages.batches.cancel(batch.id)
+                return {}
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        responses = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                responses[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                logger.warning(f"Batch request {entry.custom_id} did not succeed: {entry.result.type}")
+        return responses
+
+    @traced("claude.label_topic_clusters", capture=("clusters",))
+    def label_topic_clusters(self, clusters: List[Dict[str, Any]]) -> Optional[List[str]]:
+        """
+        Name topic clusters with Claude.
+
+        Args:
+            clusters: Clusters with "titles" and keyword "terms"
+
+        Returns:
+            One short name per cluster, or None in mock mode or on failure
+        """
+        if self.mock_mode or not clusters:
+            return None
+
+        cache_key = AnalysisCache.make_key(
+            CLAUDE_LABEL_MODEL,
+            f"labels-{LABEL_PROMPT_VERSION}",
+            "",
+            [(title, str(i)) for i, cluster in enumerate(clusters) for title in cluster["titles"]]
+        )
+        cached = self.analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached.get("labels")
+
+        groups = []
+        for i, cluster in enumerate(clusters, 1):
+            titles = "\n".join(f"   - {title}" for title in cluster["titles"][:10])
+            groups.append(f"Group {i} (keywords: {', '.join(cluster.get('terms', []))}):\n{titles}")
+
+        prompt = f"""Below are groups of research papers. Give each group a concise topic name (2-4 words) that describes what its papers have in common.
+
+{chr(10).join(groups)}
+
+Respond with ONLY a JSON array of {len(clusters)} names, in group order:
+["Name for group 1", "Name for group 2"]"""
+
+        try:
+            message = self._create_message(prompt, 300, model=CLAUDE_LABEL_MODEL)
+            response_text = message.content[0].text
+            self._record_usage(message, prompt, response_text, model=CLAUDE_LABEL_MODEL)
+
+            match = re.search(r'\[.*\]', response_text, re.DOTALL)
+            labels = json.loads(match.group()) if match else None
+            if not isinstance(labels, list) or len(labels) != len(clusters):
+                logger.warning("Unexpected topic label response; keeping keyword labels")
+                return None
+
+            labels = [str(label).strip() for label in labels]
+            self.analysis_cache.put(cache_key, {"labels": labels})
+            return labels
+
+        except Exception as e:
+            logger.error(f"Error labeling topic clusters: {e}")
+            current_span().record_exception(e)
+            return None
+
+    def is_fallback_analysis(self, topic: str, analysis: Dict[str, Any]) -> bool:
+        """True if an analysis is the mock or default response rather than Claude's answer."""
+        return analysis == self._default_response() or analysis == self._mock_analyze_research_gaps(topic)
+
+    @property
+    def analysis_version(self) -> str:
+        """Model and prompt version that analyses are produced with."""
+        return f"{CLAUDE_MODEL}/{ANALYSIS_PROMPT_VERSION}"
+
+    @traced("claude.synthesize_papers", capture=("papers",))
     def synthesize_papers(
         self,
         papers: List[Dict[str, Any]],
@@ -127,49 +629,292 @@ Papers:
 
 Please provide a well-structured synthesis in 2-3 paragraphs."""
 
-            message = self.client.messages.create(
-                model=CLAUDE_MODEL,
-                max_tokens=2000,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            message = self._create_message(prompt, 2000)
 
             synthesis = message.content[0].text
+            self._record_usage(message, prompt, synthesis)
             logger.info(f"Synthesized {len(papers)} papers")
             return synthesis
 
         except Exception as e:
             logger.error(f"Error synthesizing papers: {e}")
+            current_span().record_exception(e)
             return f"Error synthesizing papers: {str(e)}"
 
-    def _build_context(
+    def take_analysis_cache_outcome(self) -> Optional[str]:
+        """
+        Return and reset this thread's last analysis cache outcome.
+
+        Returns:
+            "hit" or "miss" for the last analysis on this thread, or None if
+            the cache was not consulted (e.g. mock mode)
+        """
+        outcome = getattr(self._thread_state, "analysis_cache_outcome", None)
+        self._thread_state.analysis_cache_outcome = None
+        return outcome
+
+    def _pack_context(
         self,
-        topic: str,
         paper_sections: List[Dict[str, Any]],
         elastic_results: Optional[List[Dict[str, Any]]]
-    ) -> str:
-        """Build context string from retrieved papers."""
-        context_parts = []
-
-        # Add paper sections from Chroma (semantic search)
-        if paper_sections:
-            context_parts.append("=== RELEVANT PAPER SECTIONS (Semantic Search) ===\n")
-            for i, section in enumerate(paper_sections[:15], 1):  # Limit to 15 sections
-                title = section.get("metadata", {}).get("title", "Unknown")
-                section_name = section.get("metadata", {}).get("section_name", "Unknown")
-                content = section.get("content", "")
-                context_parts.append(f"{i}. [{title}] - {section_name}\n{content}\n")
-
-        # Add papers from Elastic (keyword search)
-        if elastic_results:
-            context_parts.append("\n=== RELATED PAPERS (Keyword Search) ===\n")
-            for i, paper in enumerate(elastic_results[:10], 1):  # Limit to 10 papers
-                title = paper.get("title", "Unknown")
-                abstract = paper.get("abstract", "")
-                context_parts.append(f"{i}. {title}\n{abstract}\n")
+    ) -> Dict[str, Any]:
+        """Pack retrieved papers into the context budget, recording the outcome on the span."""
+        packed = self.context_packer.pack(paper_sections, elastic_results)
+        current_span().set_attributes(
+            context_tokens=packed["tokens"],
+            context_items=len(packed["items"]),
+            context_duplicates=packed["duplicates"],
+            context_over_budget=packed["over_budget"]
+        )
+        return packed
+
+    def _analysis_cache_key(self, topic: str, packed: Dict[str, Any]) -> str:
+        """Cache key over the model, prompt version, topic and ordered packed-context identifiers."""
+        context_ids = [(item["paper_id"], item["section"]) for item in packed["items"]]
+        return AnalysisCache.make_key(CLAUDE_MODEL, ANALYSIS_PROMPT_VERSION, topic, context_ids)
+
+    def _cached_analysis(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up an analysis, recording the outcome on the span and for this thread."""
+        cached = self.analysis_cache.get(cache_key)
+        outcome = "hit" if cached is not None else "miss"
+        self._thread_state.analysis_cache_outcome = outcome
+        current_span().set_attribute("analysis_cache", outcome)
+        if cached is not None:
+            logger.info("Serving research gap analysis from cache")
+        return cached
+
+    def _store_analysis(self, cache_key: str, result: Dict[str, Any]):
+        """Cache a parsed analysis unless parsing fell back to the default response."""
+        if result != self._default_response():
+            self.analysis_cache.put(cache_key, result)
+
+    def _shard_by_paper(
+        self,
+        paper_sections: List[Dict[str, Any]],
+        elastic_results: Optional[List[Dict[str, Any]]],
+        shard_papers: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Group sections and papers by paper ID (in retrieval order) and split them into shards.
+
+        Returns:
+            Shards with "paper_ids", "sections" and "papers" lists
+        """
+        by_paper: "OrderedDict[str, Dict[str, List[Dict[str, Any]]]]" = OrderedDict()
+        for section in paper_sections or []:
+            metadata = section.get("metadata") or {}
+            paper_id = metadata.get("paper_id") or metadata.get("title", "")
+            by_paper.setdefault(paper_id, {"sections": [], "papers": []})["sections"].append(section)
+        for paper in elastic_results or []:
+            metadata = paper.get("metadata") or {}
+            paper_id = paper.get("paper_id") or metadata.get("paper_id") or paper.get("title", "")
+            by_paper.setdefault(paper_id, {"sections": [], "papers": []})["papers"].append(paper)
+
+        paper_ids = list(by_paper)
+        shards = []
+        for start in range(0, len(paper_ids), max(1, shard_papers)):
+            shard_ids = paper_ids[start:start + shard_papers]
+            shards.append({
+                "paper_ids": shard_ids,
+                "sections": [s for paper_id in shard_ids for s in by_paper[paper_id]["sections"]],
+                "papers": [p for paper_id in shard_ids for p in by_paper[paper_id]["papers"]]
+            })
+        return shards
+
+    def _summarize_shard(self, shard: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Map step: extract limitations, future work, themes and keywords from one shard.
+
+        Returns:
+            Parsed shard summary, or None if the call failed
+        """
+        packed = self.map_context_packer.pack(shard["sections"], shard["papers"])
+        shard["cache_key"] = AnalysisCache.make_key(
+            CLAUDE_MAP_MODEL,
+            f"map-{MAP_PROMPT_VERSION}",
+            "",
+            sorted((item["paper_id"], item["section"]) for item in packed["items"])
+        )
+        cached = self.analysis_cache.get(shard["cache_key"])
+        if cached is not None:
+            return cached
+
+        with span("claude.map", kind=SPAN_KIND_CLIENT, papers=len(shard["paper_ids"]), context_tokens=packed["tokens"]):
+            try:
+                prompt = self._create_map_prompt(packed["text"])
+                message = self._create_message(prompt, MAP_MAX_TOKENS, model=CLAUDE_MAP_MODEL)
+                response_text = message.content[0].text
+                self._record_usage(message, prompt, response_text, model=CLAUDE_MAP_MODEL)
+                summary = self._parse_analysis_response(response_text)
+                if summary == self._default_response():
+                    return None
+
+                summary["papers"] = len(shard["paper_ids"])
+                self.analysis_cache.put(shard["cache_key"], summary)
+                return summary
+
+            except Exception as e:
+                logger.error(f"Error summarizing shard of {len(shard['paper_ids'])} papers: {e}")
+                current_span().record_exception(e)
+                return None
+
+    def _create_map_prompt(self, context: str) -> str:
+        """Create the topic-independent prompt for one map shard."""
+        return f"""You are a research analyst extracting findings from a group of academic papers.
+
+Based only on the following paper sections and abstracts, list:
+1. The main research themes
+2. Limitations the papers state or that are evident
+3. Future work the papers propose or that follows from their gaps
+4. Key technical keywords and how many papers mention each
+
+Context:
+{context}
+
+Respond with ONLY this JSON:
+{{
+    "themes": ["Theme 1", "Theme 2"],
+    "limitations": ["Limitation 1", "Limitation 2"],
+    "future_directions": ["Direction 1", "Direction 2"],
+    "keywords": [
+        {{"keyword": "keyword1", "frequency": 4}}
+    ]
+}}
+
+Be specific and concise; at most 8 items per list."""
+
+    def _format_shard_summaries(self, completed: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> str:
+        """Lay out map results as the context for the reduce prompt."""
+        total = sum(len(shard["paper_ids"]) for shard, _ in completed)
+        parts = [f"=== FINDINGS FROM {len(completed)} GROUPS OF PAPERS ({total} papers in total) ===\n"]
+        for i, (shard, summary) in enumerate(completed, 1):
+            parts.append(f"Group {i} ({len(shard['paper_ids'])} papers)")
+            for label, field in (("Themes", "themes"), ("Limitations", "limitations"), ("Future work", "future_directions")):
+                items = [str(item) for item in summary.get(field) or []]
+                if items:
+                    parts.append(f"{label}:\n" + "\n".join(f"- {item}" for item in items))
+            keywords = [
+                f"{entry.get('keyword')} ({entry.get('frequency', '?')})"
+                for entry in summary.get("keywords") or []
+                if isinstance(entry, dict) and entry.get("keyword")
+            ]
+            if keywords:
+                parts.append("Keywords: " + ", ".join(keywords))
+            parts.append("")
+        return "\n".join(parts)
+
+    def _create_message(self, prompt: str, max_tokens: int, model: str = CLAUDE_MODEL) -> Any:
+        """
+        Send one messages.create request under the shared rate limiter.
+
+        Retries rate-limit (429), overload/server (5xx) and connection errors
+        with jittered exponential backoff, honoring retry-after.
+        """
+        estimated_tokens = estimate_tokens(prompt) + max_tokens
+        attempt = 0
+        while True:
+            self._note_throttle(self.rate_limiter.acquire(estimated_tokens))
+            used_tokens = 0
+            try:
+                message = self.client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                used_tokens = self._usage_tokens(message, estimated_tokens)
+                return message
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self.rate_limiter.release(estimated_tokens, used_tokens)
+            attempt += 1
+            time.sleep(delay)
+
+    async def _create_message_async(self, prompt: str, max_tokens: int) -> Any:
+        """Async variant of _create_message, using this event loop's AsyncAnthropic client."""
+        client = self._get_async_client()
+        estimated_tokens = estimate_tokens(prompt) + max_tokens
+        attempt = 0
+        while True:
+            self._note_throttle(await self.rate_limiter.acquire_async(estimated_tokens))
+            used_tokens = 0
+            try:
+                message = await client.messages.create(
+                    model=CLAUDE_MODEL,
+                    max_tokens=max_tokens,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+                used_tokens = self._usage_tokens(message, estimated_tokens)
+                return message
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            finally:
+                self.rate_limiter.release(estimated_tokens, used_tokens)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _get_async_client(self) -> "anthropic.AsyncAnthropic":
+        """AsyncAnthropic client for the running event loop (its connection pool is loop-bound)."""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = anthropic.AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+                self._async_clients[loop] = client
+            return client
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """
+        Decide whether a failed request is retried.
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        status = getattr(error, "status_code", None)
+        retryable = isinstance(error, anthropic.APIConnectionError) or (
+            isinstance(error, anthropic.APIStatusError) and (status == 429 or status >= 500)
+        )
+        if not retryable or attempt >= self.rate_limiter.max_retries:
+            return None
+
+        if status == 429:
+            self.rate_limiter.note_rate_limited()
+        response = getattr(error, "response", None)
+        delay = self.rate_limiter.backoff(attempt + 1, parse_retry_after(getattr(response, "headers", None)))
+        current_span().set_attribute("retries", attempt + 1)
+        logger.warning(f"Claude request failed ({status or type(error).__name__}); retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def _note_throttle(self, waited: float):
+        """Record time spent waiting for the rate limiter on the active span."""
+        if waited > 0:
+            current_span().set_attribute("throttle_wait_ms", round(waited * 1000, 1))
+
+    def _usage_tokens(self, message: Any, default: int) -> int:
+        """Input + output tokens reported for a message, or the estimate if unavailable."""
+        usage = getattr(message, "usage", None)
+        if usage is None:
+            return default
+        return (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0)
 
-        return "\n".join(context_parts)
+    def _record_usage(self, message: Any, prompt: str, response_text: str, model: str = CLAUDE_MODEL):
+        """Attach request/response sizes and token usage to the active span."""
+        usage = getattr(message, "usage", None)
+        current_span().set_attributes(
+            model=model,
+            request_bytes=len(prompt.encode("utf-8")),
+            response_bytes=len(response_text.encode("utf-8")),
+            input_tokens=getattr(usage, "input_tokens", None),
+            output_tokens=getattr(usage, "output_tokens", None)
+        )
 
     def _create_analysis_prompt(self, topic: str, context: str) -> str:
         """Create prompt for research gap analysis."""
@@ -266,6 +1011,165 @@ Provide ONLY the JSON response, no additional text."""
         }
 
 
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+def extract_partial_string(text: str, key: str) -> Optional[str]:
+    """
+    Best-effort value of a JSON string field in a response that is still streaming.
+
+    Returns the characters received so far (the closing quote may not have
+    arrived yet), or None if the field has not started.
+
+    Args:
+        text: Response text received so far
+        key: Field name, e.g. "summary"
+    """
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(key), text)
+    if not match:
+        return None
+
+    chars = []
+    i = match.end()
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            break
+        if char != "\\":
+            chars.append(char)
+            i += 1
+            continue
+
+        # Escape sequence; stop if it is cut off mid-stream
+        if i + 1 >= len(text):
+            break
+        escaped = text[i + 1]
+        if escaped == "u":
+            if i + 6 > len(text):
+                break
+            try:
+                chars.append(chr(int(text[i + 2:i + 6], 16)))
+            except ValueError:
+                pass
+            i += 6
+            continue
+        chars.append(_JSON_ESCAPES.get(escaped, escaped))
+        i += 2
+
+    return "".join(chars)
+
+
+class AnalysisStreamParser:
+    """
+    Incremental parser for the analysis JSON as it streams in.
+
+    Feed it text chunks; it returns each top-level field as soon as its value
+    is complete, and each element of a top-level array as soon as that
+    element is complete (so a limitation is available before the rest of the
+    list has been written). Text before the opening brace (e.g. a preamble or
+    code fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[Tuple[str, int]] = []  # (opening bracket, its index in the buffer)
+        self._started = False
+        self._finished = False
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._scalar_start: Optional[int] = None
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._item_counts: Dict[str, int] = {}
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of response text.
+
+        Returns:
+            Newly completed values, in order, each either
+            {"kind": "field", "key": ..., "value": ...} or
+            {"kind": "item", "key": ..., "index": ..., "value": ...}
+        """
+        self._buffer += text
+        events: List[Dict[str, Any]] = []
+
+        while self._pos < len(self._buffer) and not self._finished:
+            i = self._pos
+            char = self._buffer[i]
+            self._pos += 1
+
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(("{", i))
+                    self._expect_key = True
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._value_done(self._string_start, i + 1, events)
+                continue
+
+            if char == '"':
+                self._flush_scalar(i, events)
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._flush_scalar(i, events)
+                self._stack.append((char, i))
+            elif char in "}]":
+                self._flush_scalar(i, events)
+                _, start = self._stack.pop()
+                if not self._stack:
+                    self._finished = True
+                    continue
+                self._value_done(start, i + 1, events)
+            elif char in ",:" or char.isspace():
+                self._flush_scalar(i, events)
+                if char == "," and len(self._stack) == 1:
+                    self._expect_key = True
+            elif self._scalar_start is None:
+                self._scalar_start = i
+
+        return events
+
+    def _flush_scalar(self, end: int, events: List[Dict[str, Any]]):
+        """Complete a pending number/true/false/null that ends at `end`."""
+        if self._scalar_start is not None:
+            start, self._scalar_start = self._scalar_start, None
+            self._value_done(start, end, events)
+
+    def _value_done(self, start: int, end: int, events: List[Dict[str, Any]]):
+        """Handle a complete JSON value spanning buffer[start:end]."""
+        depth = len(self._stack)
+        if depth > 2:
+            return  # Part of a larger value; reported when that completes
+
+        try:
+            value = json.loads(self._buffer[start:end])
+        except ValueError:
+            return
+
+        if depth == 1:
+            if self._expect_key:
+                self._key = value if isinstance(value, str) else None
+                self._expect_key = False
+            elif self._key is not None:
+                events.append({"kind": "field", "key": self._key, "value": value})
+        elif self._stack[-1][0] == "[" and self._key is not None:
+            index = self._item_counts.get(self._key, 0)
+            self._item_counts[self._key] = index + 1
+            events.append({"kind": "item", "key": self._key, "index": index, "value": value})
+
+
 # Singleton instance
 _claude_client = None
 
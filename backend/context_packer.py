@@ -0,0 +1,212 @@
+"""
+Context packer for ScholarForge.
+Fits retrieved sections and papers into a token budget for Claude prompts.
+"""
+
+from typing import Dict, Any, List, Optional, Set
+import logging
+import re
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Token budget for the retrieved-papers part of an analysis prompt
+CONTEXT_TOKEN_BUDGET = 6000
+
+# Longest single passage (in tokens) before it is truncated
+CONTEXT_MAX_ITEM_TOKENS = 600
+
+# Rough characters per token for English prose
+CHARS_PER_TOKEN = 4
+
+# Word-trigram Jaccard similarity above which two passages count as duplicates
+DUPLICATE_SIMILARITY = 0.8
+
+SEMANTIC_HEADER = "=== RELEVANT PAPER SECTIONS (Semantic Search) ===\n"
+KEYWORD_HEADER = "\n=== RELATED PAPERS (Keyword Search) ===\n"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the token count of text (no tokenizer round-trip)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class ContextPacker:
+    """
+    Greedy, deduplicating packer for prompt context.
+
+    Semantic sections and keyword papers are each ranked within their own
+    source (by distance for sections, by score for papers) and given the
+    relevance 1 - rank / count, so the two sources interleave instead of one
+    source's raw scale dominating. Candidates are added most-relevant first
+    until the token budget is spent. A passage whose word trigrams mostly overlap one already packed
+    (e.g. an abstract returned by both searches) is skipped, and overlong
+    passages are truncated to max_item_tokens.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = CONTEXT_TOKEN_BUDGET,
+        max_item_tokens: int = CONTEXT_MAX_ITEM_TOKENS,
+        duplicate_similarity: float = DUPLICATE_SIMILARITY
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            token_budget: Maximum estimated tokens of packed context
+            max_item_tokens: Maximum estimated tokens per passage
+            duplicate_similarity: Jaccard threshold for near-duplicate passages
+        """
+        self.token_budget = token_budget
+        self.max_item_tokens = max_item_tokens
+        self.duplicate_similarity = duplicate_similarity
+
+    def pack(
+        self,
+        paper_sections: Optional[List[Dict[str, Any]]],
+        elastic_results: Optional[List[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Select and format context passages within the token budget.
+
+        Args:
+            paper_sections: Sections from Chroma (semantic search)
+            elastic_results: Papers from Elastic (keyword search)
+
+        Returns:
+            Dictionary containing:
+                - text: Formatted context for the prompt
+                - items: Packed passages (source, paper_id, section, title, text, relevance, tokens)
+                - tokens: Estimated tokens of text
+                - duplicates: Passages skipped as near-duplicates
+                - over_budget: Passages skipped for lack of budget
+        """
+        candidates = self._semantic_candidates(paper_sections or []) + self._keyword_candidates(elastic_results or [])
+        candidates.sort(key=lambda item: item["relevance"], reverse=True)
+
+        header_tokens = estimate_tokens(SEMANTIC_HEADER) + estimate_tokens(KEYWORD_HEADER)
+        used = header_tokens
+        packed = []
+        shingles: List[Set[tuple]] = []
+        duplicates = 0
+        over_budget = 0
+
+        for item in candidates:
+            item_shingles = self._shingles(item["text"])
+            if any(self._similar(item_shingles, other) for other in shingles):
+                duplicates += 1
+                continue
+
+            text = self._truncate(item["text"])
+            tokens = estimate_tokens(self._format_item(item, text, 0))
+            if used + tokens > self.token_budget:
+                over_budget += 1
+                continue
+
+            packed.append({**item, "text": text, "tokens": tokens})
+            shingles.append(item_shingles)
+            used += tokens
+
+        text = self._render(packed)
+        logger.debug(
+            f"Packed {len(packed)}/{len(candidates)} passages into ~{estimate_tokens(text)} tokens "
+            f"({duplicates} duplicates, {over_budget} over budget)"
+        )
+        return {
+            "text": text,
+            "items": packed,
+            "tokens": estimate_tokens(text),
+            "duplicates": duplicates,
+            "over_budget": over_budget
+        }
+
+    def _semantic_candidates(self, paper_sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score Chroma sections by their rank by distance (result order for sections without one)."""
+        order = sorted(
+            range(len(paper_sections)),
+            key=lambda i: (paper_sections[i].get("distance") is None, paper_sections[i].get("distance") or 0.0, i)
+        )
+        candidates = []
+        for rank, i in enumerate(order):
+            section = paper_sections[i]
+            metadata = section.get("metadata") or {}
+            relevance = self._rank_relevance(rank, len(order))
+            candidates.append({
+                "source": "semantic",
+                "paper_id": metadata.get("paper_id") or metadata.get("title", ""),
+                "section": metadata.get("section_name", "Unknown"),
+                "title": metadata.get("title", "Unknown"),
+                "text": section.get("content", "") or "",
+                "relevance": relevance
+            })
+        return candidates
+
+    def _keyword_candidates(self, elastic_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score Elastic papers by their rank by score (result order for unscored papers)."""
+        order = sorted(range(len(elastic_results)), key=lambda i: (-(elastic_results[i].get("score") or 0), i))
+        candidates = []
+        for rank, i in enumerate(order):
+            paper = elastic_results[i]
+            metadata = paper.get("metadata") or {}
+            relevance = self._rank_relevance(rank, len(order))
+            candidates.append({
+                "source": "keyword",
+                "paper_id": paper.get("paper_id") or metadata.get("paper_id") or paper.get("title", ""),
+                "section": paper.get("type", "paper"),
+                "title": paper.get("title", "Unknown"),
+                "text": paper.get("abstract") or paper.get("content", "") or "",
+                "relevance": relevance
+            })
+        return candidates
+
+    def _rank_relevance(self, rank: int, count: int) -> float:
+        """Relevance of the rank-th best of count candidates from one source (1.0 down to 1/count)."""
+        return 1.0 - rank / max(count, 1)
+
+    def _render(self, packed: List[Dict[str, Any]]) -> str:
+        """Lay out packed passages under the semantic and keyword headings."""
+        context_parts = []
+
+        semantic = [item for item in packed if item["source"] == "semantic"]
+        if semantic:
+            context_parts.append(SEMANTIC_HEADER)
+            for i, item in enumerate(semantic, 1):
+                context_parts.append(self._format_item(item, item["text"], i))
+
+        keyword = [item for item in packed if item["source"] == "keyword"]
+        if keyword:
+            context_parts.append(KEYWORD_HEADER)
+            for i, item in enumerate(keyword, 1):
+                context_parts.append(self._format_item(item, item["text"], i))
+
+        return "\n".join(context_parts)
+
+    def _format_item(self, item: Dict[str, Any], text: str, index: int) -> str:
+        """Format one passage as it appears in the prompt."""
+        if item["source"] == "semantic":
+            return f"{index}. [{item['title']}] - {item['section']}\n{text}\n"
+        return f"{index}. {item['title']}\n{text}\n"
+
+    def _truncate(self, text: str) -> str:
+        """Cut text to max_item_tokens at a word boundary."""
+        max_chars = self.max_item_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+    def _shingles(self, text: str) -> Set[tuple]:
+        """Word trigrams of the normalized text."""
+        words = _WORD_RE.findall(text.lower())
+        if len(words) < 3:
+            return {tuple(words)} if words else set()
+        return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+    def _similar(self, a: Set[tuple], b: Set[tuple]) -> bool:
+        """True if two shingle sets are near-duplicates."""
+        if not a or not b:
+            return False
+        return len(a & b) / len(a | b) >= self.duplicate_similarity
@@ -6,8 +6,11 @@ Fetches papers from Crossref's extensive database of scholarly works.
 import requests
 from typing import Dict, Any, List, Optional
 import logging
+import threading
 import time
 
+from backend.tracing import traced, current_span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,13 +25,27 @@ class CrossrefClient:
         self.headers = {
             "User-Agent": "ScholarForge/2.0 (Research Tool; mailto:scholarforge@research.tool)"
         }
+        self._thread_state = threading.local()
         logger.info("Initialized Crossref client")
 
+    def take_raw_result_count(self) -> Optional[int]:
+        """
+        Return how many results the source itself returned for this thread's
+        last search_papers call (before papers were filtered out), and reset it.
+        None if the search failed before the source answered.
+        """
+        count = getattr(self._thread_state, "raw_result_count", None)
+        self._thread_state.raw_result_count = None
+        return count
+
+    @traced("crossref.search_papers", capture=("max_results",))
     def search_papers(
         self,
         query: str,
         max_results: int = 10,
-        min_year: Optional[int] = None
+        min_year: Optional[int] = None,
+        offset: int = 0,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search Crossref for papers matching the query.
@@ -37,18 +54,22 @@ class CrossrefClient:
             query: Search query
             max_results: Maximum number of papers to return
             min_year: Minimum publication year
+            offset: Number of leading results to skip (to continue a previous fetch)
+            raise_errors: If True, re-raise request and processing errors instead of returning []
 
         Returns:
             List of paper dictionaries
         """
+        self._thread_state.raw_result_count = None
         try:
-            logger.info(f"Searching Crossref for: '{query}' (max {max_results} results)")
+            logger.info(f"Searching Crossref for: '{query}' (max {max_results} results, offset {offset})")
 
             # Build query parameters
             url = f"{self.base_url}/works"
             params = {
                 "query": query,
                 "rows": min(max_results, 20),
+                "offset": offset,
                 "sort": "relevance",
                 "filter": "type:journal-article"
             }
@@ -58,10 +79,12 @@ class CrossrefClient:
                 params["filter"] += f",from-pub-date:{min_year}"
 
             response = requests.get(url, params=params, headers=self.headers, timeout=10)
+            current_span().set_attributes(http_status=response.status_code, bytes=len(response.content))
             response.raise_for_status()
 
             data = response.json()
             items = data.get("message", {}).get("items", [])
+            self._thread_state.raw_result_count = len(items)
 
             # Format papers
             papers = []
@@ -70,14 +93,19 @@ class CrossrefClient:
                 if paper:
                     papers.append(paper)
 
+            current_span().set_attribute("results", len(papers))
             logger.info(f"Retrieved {len(papers)} papers from Crossref")
             return papers
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching from Crossref: {e}")
+            if raise_errors:
+                raise
             return []
         except Exception as e:
             logger.error(f"Error processing Crossref results: {e}")
+            if raise_errors:
+                raise
             return []
 
     def _format_paper(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
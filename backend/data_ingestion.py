@@ -10,6 +10,8 @@ import re
 
 from backend.elastic_client import get_elastic_client
 from backend.chroma_client import get_chroma_client
+from backend.result_cache import get_corpus_generation
+from backend.tracing import traced, current_span, SPAN_KIND_INTERNAL
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,12 +25,15 @@ class PaperIngestor:
         """Initialize the paper ingestor with clients."""
         self.elastic = get_elastic_client()
         self.chroma = get_chroma_client()
+        self.corpus_generation = get_corpus_generation()
         logger.info("Initialized PaperIngestor")
 
     def ingest_paper(
         self,
         paper_data: Dict[str, Any],
-        sections: Optional[Dict[str, str]] = None
+        sections: Optional[Dict[str, str]] = None,
+        chroma_buffer: Optional[List[Dict[str, Any]]] = None,
+        check_existing: bool = True
     ) -> bool:
         """
         Ingest a single paper into both Elastic and Chroma.
@@ -40,6 +45,10 @@ class PaperIngestor:
             sections: Dictionary mapping section names to content
                 e.g., {"abstract": "...", "conclusion": "...", "future_work": "..."}
                 If None, will use paper_data["sections"] if available
+            chroma_buffer: If given, Chroma sections are appended here instead of
+                written immediately, so a batch can be embedded in one pass
+            check_existing: Whether to look the paper up before inserting
+                (batch callers check the whole batch at once instead)
 
         Returns:
             bool: True if successful, False otherwise
@@ -61,10 +70,11 @@ class PaperIngestor:
                 return False
 
             # Check if paper already exists (avoid duplicates)
-            existing = self.elastic.get_paper_by_id(paper_id)
-            if existing:
-                logger.info(f"Paper already exists, skipping: {paper_id}")
-                return True
+            if check_existing:
+                existing = self.elastic.get_paper_by_id(paper_id)
+                if existing:
+                    logger.info(f"Paper already exists, skipping: {paper_id}")
+                    return True
 
             # 1. Insert metadata into Elastic
             elastic_success = self.elastic.insert_paper_metadata(paper_data)
@@ -73,23 +83,31 @@ class PaperIngestor:
                 return False
 
             # 2. Insert sections into Chroma for semantic search
-            if sections:
+            # If no sections provided, use abstract as default
+            chroma_sections = sections or {"abstract": paper_data.get("abstract", "")}
+            if chroma_buffer is not None:
+                chroma_buffer.append({
+                    "paper_id": paper_id,
+                    "sections": chroma_sections,
+                    "metadata": self._chroma_metadata(paper_data)
+                })
+            else:
                 chroma_success = self._ingest_sections_to_chroma(
                     paper_id,
-                    sections,
+                    chroma_sections,
                     paper_data
                 )
-                if not chroma_success:
+                if sections and not chroma_success:
                     logger.warning(f"Failed to insert sections into Chroma: {paper_id}")
-            else:
-                # If no sections provided, use abstract as default
-                default_sections = {"abstract": paper_data.get("abstract", "")}
-                self._ingest_sections_to_chroma(paper_id, default_sections, paper_data)
 
             # 3. Extract and store future work sections in Elastic
             if sections and ("future_work" in sections or "limitations" in sections):
                 self._ingest_future_work(paper_id, sections, paper_data)
 
+            # New content invalidates cached query results (batches bump after flushing)
+            if chroma_buffer is None:
+                self.corpus_generation.bump()
+
             logger.info(f"Successfully ingested paper: {paper_data.get('title')}")
             return True
 
@@ -113,6 +131,7 @@ class PaperIngestor:
         logger.info(f"Ingesting {len(papers)} papers from arXiv")
         return self.ingest_papers_batch(papers)
 
+    @traced("ingest.papers_batch", kind=SPAN_KIND_INTERNAL, capture=("papers",))
     def ingest_papers_batch(
         self,
         papers: List[Dict[str, Any]]
@@ -127,16 +146,57 @@ class PaperIngestor:
             Dictionary with success/failure counts
         """
         results = {"success": 0, "failed": 0}
+        chroma_buffer = []
+
+        # Check the whole batch for duplicates in one mget
+        for paper in papers:
+            if not paper.get("paper_id") and paper.get("title"):
+                paper["paper_id"] = self._generate_paper_id(paper["title"])
+        existing_ids = self.elastic.get_existing_ids(p.get("paper_id") for p in papers)
+
+        # The same paper can arrive twice in one batch (e.g. from arXiv and
+        # Semantic Scholar, whose IDs are generated from the title)
+        seen_ids = set()
 
         for paper in papers:
             sections = paper.pop("sections", None)  # Extract sections if present
-            success = self.ingest_paper(paper, sections)
+
+            if paper.get("paper_id") in existing_ids:
+                logger.info(f"Paper already exists, skipping: {paper['paper_id']}")
+                results["success"] += 1
+                continue
+
+            if paper.get("paper_id") in seen_ids:
+                logger.info(f"Paper repeated in batch, skipping: {paper['paper_id']}")
+                results["success"] += 1
+                continue
+            if paper.get("paper_id"):
+                seen_ids.add(paper["paper_id"])
+
+            success = self.ingest_paper(
+                paper,
+                sections,
+                chroma_buffer=chroma_buffer,
+                check_existing=False
+            )
 
             if success:
                 results["success"] += 1
             else:
                 results["failed"] += 1
 
+        # Embed and write all buffered sections in one pass
+        if chroma_buffer:
+            chroma_results = self.chroma.add_sections_bulk(chroma_buffer)
+            if chroma_results["papers"] < len(chroma_buffer):
+                logger.warning(
+                    f"Only {chroma_results['papers']} of {len(chroma_buffer)} papers were added to Chroma"
+                )
+
+            # New content invalidates cached query results
+            self.corpus_generation.bump()
+
+        current_span().set_attributes(success=results["success"], failed=results["failed"])
         logger.info(f"Batch ingestion complete: {results['success']} succeeded, {results['failed']} failed")
         return results
 
@@ -148,20 +208,11 @@ class PaperIngestor:
     ) -> bool:
         """Ingest paper sections into Chroma vector database."""
         try:
-            # Prepare metadata for all sections
-            metadata = {
-                "title": paper_data.get("title", ""),
-                "authors": paper_data.get("authors", ""),
-                "year": paper_data.get("year", 0),
-                "field": paper_data.get("field", ""),
-                "venue": paper_data.get("venue", "")
-            }
-
             # Add sections to Chroma
             success = self.chroma.add_paper_sections_batch(
                 paper_id=paper_id,
                 sections=sections,
-                metadata=metadata
+                metadata=self._chroma_metadata(paper_data)
             )
 
             return success
@@ -170,6 +221,16 @@ class PaperIngestor:
             logger.error(f"Error ingesting sections to Chroma: {e}")
             return False
 
+    def _chroma_metadata(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata shared by all Chroma sections of a paper."""
+        return {
+            "title": paper_data.get("title", ""),
+            "authors": paper_data.get("authors", ""),
+            "year": paper_data.get("year", 0),
+            "field": paper_data.get("field", ""),
+            "venue": paper_data.get("venue", "")
+        }
+
     def _ingest_future_work(
         self,
         paper_id: str,
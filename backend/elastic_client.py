@@ -3,11 +3,15 @@ Elastic Search client for ScholarForge.
 Handles paper metadata storage and keyword-based search.
 """
 
-from elasticsearch import Elasticsearch
-from typing import Dict, Any, List, Optional
+from elasticsearch import Elasticsearch, NotFoundError
+from elasticsearch.helpers import streaming_bulk, scan
+from typing import Dict, Any, List, Optional, Iterable, Tuple
 import logging
+import hashlib
 from datetime import datetime
 
+from backend.tracing import traced, current_span
+
 from backend.config import (
     ELASTIC_API_KEY,
     ELASTIC_URL,
@@ -19,6 +23,18 @@ from backend.config import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Documents per _bulk request
+BULK_CHUNK_SIZE = 500
+
+# Retries for items rejected with 429 (exponential backoff between attempts)
+BULK_MAX_RETRIES = 3
+
+# IDs per mget request when checking for existing papers
+MGET_CHUNK_SIZE = 1000
+
+# Characters per highlight fragment returned as a result preview
+HIGHLIGHT_FRAGMENT_SIZE = 300
+
 
 class ElasticClient:
     """Client for interacting with Elasticsearch for paper storage and retrieval."""
@@ -104,6 +120,7 @@ class ElasticClient:
         except Exception as e:
             logger.error(f"Error creating future work index: {e}")
 
+    @traced("elastic.insert_paper_metadata")
     def insert_paper_metadata(self, paper_data: Dict[str, Any]) -> bool:
         """
         Insert paper metadata into Elasticsearch.
@@ -138,41 +155,252 @@ class ElasticClient:
             logger.error(f"Error inserting paper metadata: {e}")
             return False
 
+    @traced("elastic.insert_future_work")
     def insert_future_work(self, future_work_data: Dict[str, Any]) -> bool:
         """
-        Insert future work section into Elasticsearch.
+        Insert or update the future work section of a paper in Elasticsearch.
+
+        Documents are keyed deterministically by paper_id and section_name, so
+        re-ingesting a paper updates its existing document instead of adding
+        a duplicate.
 
         Args:
             future_work_data: Dictionary containing future work information
                 Required fields: paper_id, content
-                Optional fields: limitations, future_directions, keywords
+                Optional fields: section_name (default: "future_work"), limitations,
+                future_directions, keywords
 
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Add timestamp
-            future_work_data["created_at"] = datetime.utcnow()
+            doc_id, doc, upsert = self._future_work_upsert(future_work_data)
 
-            # Insert into Elasticsearch
-            response = self.client.index(
+            # Partial update of an existing doc, or insert with created_at
+            response = self.client.update(
                 index=FUTURE_WORK_INDEX,
-                document=future_work_data
+                id=doc_id,
+                doc=doc,
+                upsert=upsert
             )
 
-            logger.info(f"Inserted future work for paper: {future_work_data.get('paper_id', 'Unknown')}")
-            return response["result"] in ["created", "updated"]
+            logger.info(f"Upserted future work for paper: {future_work_data.get('paper_id', 'Unknown')}")
+            return response["result"] in ["created", "updated", "noop"]
 
         except Exception as e:
             logger.error(f"Error inserting future work: {e}")
             return False
 
+    def deduplicate_future_work(self, chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        One-shot migration of the future work index to deterministic IDs.
+
+        Older documents were indexed with auto-generated IDs, so re-ingested
+        papers left duplicates behind. Every document whose _id is not its
+        deterministic ID is re-indexed under that ID (the newest copy wins)
+        and the old document is deleted. Safe to run more than once.
+
+        Args:
+            chunk_size: Number of documents per _bulk request
+
+        Returns:
+            Dictionary with scanned, migrated and deleted counts
+        """
+        stats = {"scanned": 0, "migrated": 0, "deleted": 0}
+        latest: Dict[str, Dict[str, Any]] = {}
+        stale_ids: List[str] = []
+
+        try:
+            for hit in scan(self.client, index=FUTURE_WORK_INDEX, query={"query": {"match_all": {}}}):
+                stats["scanned"] += 1
+                source = hit["_source"]
+                doc_id = self._future_work_doc_id(source.get("paper_id", ""), source.get("section_name"))
+
+                if hit["_id"] != doc_id:
+                    stale_ids.append(hit["_id"])
+
+                current = latest.get(doc_id)
+                if current is None or str(source.get("created_at", "")) >= str(current["_source"].get("created_at", "")):
+                    latest[doc_id] = hit
+
+        except Exception as e:
+            logger.error(f"Error scanning future work index: {e}")
+            return stats
+
+        def actions():
+            for doc_id, hit in latest.items():
+                if hit["_id"] != doc_id:
+                    yield {"_op_type": "index", "_index": FUTURE_WORK_INDEX, "_id": doc_id, "_source": hit["_source"]}
+            for stale_id in stale_ids:
+                yield {"_op_type": "delete", "_index": FUTURE_WORK_INDEX, "_id": stale_id}
+
+        for ok, item in streaming_bulk(
+            self.client,
+            actions(),
+            chunk_size=chunk_size,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            op, info = next(iter(item.items()))
+            if not ok:
+                logger.error(f"Future work migration failed for {info.get('_id')}: {info.get('error')}")
+            elif op == "delete":
+                stats["deleted"] += 1
+            else:
+                stats["migrated"] += 1
+
+        logger.info(
+            f"Future work dedup: scanned {stats['scanned']}, migrated {stats['migrated']}, "
+            f"deleted {stats['deleted']} duplicate/legacy docs"
+        )
+        return stats
+
+    def _future_work_doc_id(self, paper_id: str, section_name: Optional[str] = None) -> str:
+        """Deterministic future work document ID for a paper section."""
+        combined = f"{paper_id}_{section_name or 'future_work'}"
+        return hashlib.md5(combined.encode()).hexdigest()
+
+    def _future_work_upsert(
+        self,
+        future_work_data: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """
+        Split future work data into (doc_id, partial update doc, upsert doc).
+
+        created_at is only set when the document is first created.
+        """
+        doc = dict(future_work_data)
+        doc.pop("created_at", None)
+        doc.setdefault("section_name", "future_work")
+        doc_id = self._future_work_doc_id(doc.get("paper_id", ""), doc["section_name"])
+        upsert = {**doc, "created_at": datetime.utcnow()}
+        return doc_id, doc, upsert
+
+    @traced("elastic.bulk_insert_papers", capture=("chunk_size",))
+    def bulk_insert_papers(
+        self,
+        papers: Iterable[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        max_retries: int = BULK_MAX_RETRIES
+    ) -> Dict[str, Any]:
+        """
+        Insert many papers through the _bulk endpoint.
+
+        Args:
+            papers: Iterable of paper metadata dictionaries (same shape as insert_paper_metadata)
+            chunk_size: Number of documents per _bulk request
+            max_retries: Retries for items rejected with 429 before giving up
+
+        Returns:
+            Dictionary with success/failed counts, the IDs of indexed documents
+            (succeeded_ids) and per-item errors
+        """
+        def actions():
+            for paper_data in papers:
+                paper_data["created_at"] = datetime.utcnow()
+                if "paper_id" not in paper_data:
+                    paper_data["paper_id"] = f"paper_{datetime.utcnow().timestamp()}"
+                yield {
+                    "_index": PAPERS_INDEX,
+                    "_id": paper_data["paper_id"],
+                    "_source": paper_data
+                }
+
+        return self._bulk_index(actions(), chunk_size, max_retries, label="papers")
+
+    @traced("elastic.bulk_insert_future_work", capture=("chunk_size",))
+    def bulk_insert_future_work(
+        self,
+        future_work_items: Iterable[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+        max_retries: int = BULK_MAX_RETRIES
+    ) -> Dict[str, Any]:
+        """
+        Upsert many future work sections through the _bulk endpoint.
+
+        Args:
+            future_work_items: Iterable of future work dictionaries (same shape as insert_future_work)
+            chunk_size: Number of documents per _bulk request
+            max_retries: Retries for items rejected with 429 before giving up
+
+        Returns:
+            Dictionary with success/failed counts, the IDs of indexed documents
+            (succeeded_ids) and per-item errors
+        """
+        def actions():
+            for future_work_data in future_work_items:
+                doc_id, doc, upsert = self._future_work_upsert(future_work_data)
+                yield {
+                    "_op_type": "update",
+                    "_index": FUTURE_WORK_INDEX,
+                    "_id": doc_id,
+                    "doc": doc,
+                    "upsert": upsert
+                }
+
+        return self._bulk_index(actions(), chunk_size, max_retries, label="future work sections")
+
+    def _bulk_index(
+        self,
+        actions: Iterable[Dict[str, Any]],
+        chunk_size: int,
+        max_retries: int,
+        label: str
+    ) -> Dict[str, Any]:
+        """
+        Stream actions to the _bulk endpoint and collect per-item results.
+
+        Items rejected with 429 are retried by streaming_bulk with exponential
+        backoff; any other per-item failure is reported in "errors" without
+        aborting the rest of the stream. If the stream itself fails (e.g. the
+        cluster is unreachable), the error is reported with "id": None and
+        the items not listed in "succeeded_ids" must be treated as not indexed.
+        """
+        results = {"success": 0, "failed": 0, "succeeded_ids": [], "errors": []}
+
+        try:
+            for ok, item in streaming_bulk(
+                self.client,
+                actions,
+                chunk_size=chunk_size,
+                max_retries=max_retries,
+                initial_backoff=1,
+                raise_on_error=False,
+                raise_on_exception=False
+            ):
+                info = next(iter(item.values()), {})
+                if ok:
+                    results["success"] += 1
+                    results["succeeded_ids"].append(info.get("_id"))
+                else:
+                    results["failed"] += 1
+                    results["errors"].append({
+                        "id": info.get("_id"),
+                        "status": info.get("status"),
+                        "error": info.get("error") or info.get("exception")
+                    })
+
+        except Exception as e:
+            logger.error(f"Error during bulk insert of {label}: {e}")
+            results["errors"].append({"id": None, "status": None, "error": str(e)})
+
+        current_span().set_attributes(success=results["success"], failed=results["failed"])
+        if results["errors"]:
+            logger.warning(f"Bulk inserted {results['success']} {label}, {results['failed']} failed")
+        else:
+            logger.info(f"Bulk inserted {results['success']} {label}")
+        return results
+
+    @traced("elastic.search_papers", capture=("size", "highlight"))
     def search_papers(
         self,
         query: str,
         fields: List[str] = None,
         size: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        source_includes: Optional[List[str]] = None,
+        source_excludes: Optional[List[str]] = None,
+        highlight: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search for papers using keyword-based search.
@@ -182,56 +410,42 @@ class ElasticClient:
             fields: List of fields to search in (default: title, abstract, full_text)
             size: Number of results to return
             filters: Additional filters (e.g., year, field)
+            source_includes: Only return these _source fields (e.g. skip full_text)
+            source_excludes: Never return these _source fields
+            highlight: If True, each paper gets a "_highlight" preview fragment
 
         Returns:
             List of matching papers
         """
-        if fields is None:
-            fields = ["title^3", "abstract^2", "full_text"]
-
         try:
-            # Build query
-            search_query = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {
-                                "multi_match": {
-                                    "query": query,
-                                    "fields": fields,
-                                    "type": "best_fields"
-                                }
-                            }
-                        ]
-                    }
-                },
-                "size": size
-            }
-
-            # Add filters if provided
-            if filters:
-                filter_clauses = []
-                for field, value in filters.items():
-                    filter_clauses.append({"term": {field: value}})
-                search_query["query"]["bool"]["filter"] = filter_clauses
+            index, search_query = self.build_papers_search(
+                query,
+                fields=fields,
+                size=size,
+                filters=filters,
+                source_includes=source_includes,
+                source_excludes=source_excludes,
+                highlight=highlight
+            )
 
             # Execute search
-            response = self.client.search(index=PAPERS_INDEX, body=search_query)
-
-            # Extract results
-            results = []
-            for hit in response["hits"]["hits"]:
-                paper = hit["_source"]
-                paper["_score"] = hit["_score"]
-                results.append(paper)
+            response = self.client.search(index=index, body=search_query)
+            results = self._extract_hits(response)
+            current_span().set_attributes(
+                index=index,
+                hits=len(results),
+                bytes=self._response_bytes(response)
+            )
 
             logger.info(f"Found {len(results)} papers for query: {query}")
             return results
 
         except Exception as e:
             logger.error(f"Error searching papers: {e}")
+            current_span().record_exception(e)
             return []
 
+    @traced("elastic.query_future_work", capture=("size",))
     def query_future_work(
         self,
         query: str,
@@ -248,33 +462,205 @@ class ElasticClient:
             List of matching future work sections
         """
         try:
-            search_query = {
-                "query": {
-                    "multi_match": {
-                        "query": query,
-                        "fields": ["content^2", "limitations", "future_directions", "keywords^3"],
-                        "type": "best_fields"
-                    }
-                },
-                "size": size
-            }
-
-            response = self.client.search(index=FUTURE_WORK_INDEX, body=search_query)
-
-            # Extract results
-            results = []
-            for hit in response["hits"]["hits"]:
-                future_work = hit["_source"]
-                future_work["_score"] = hit["_score"]
-                results.append(future_work)
+            index, search_query = self.build_future_work_search(query, size=size)
+
+            response = self.client.search(index=index, body=search_query)
+            results = self._extract_hits(response)
+            current_span().set_attributes(
+                index=index,
+                hits=len(results),
+                bytes=self._response_bytes(response)
+            )
 
             logger.info(f"Found {len(results)} future work sections for query: {query}")
             return results
 
         except Exception as e:
             logger.error(f"Error querying future work: {e}")
+            current_span().record_exception(e)
             return []
 
+    @traced("elastic.multi_search", capture=("searches",))
+    def multi_search(
+        self,
+        searches: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several searches in a single _msearch round trip.
+
+        Args:
+            searches: List of (index, search body) tuples, e.g. from
+                build_papers_search / build_future_work_search, or any
+                facet/aggregation query
+
+        Returns:
+            One dictionary per sub-query, in order, containing:
+                - hits: List of matching documents (with _score)
+                - aggregations: Aggregation results, if requested
+                - total: Total hit count
+                - error: Error description if that sub-query failed, else None
+        """
+        if not searches:
+            return []
+
+        body = []
+        for index, search_query in searches:
+            body.append({"index": index})
+            body.append(search_query)
+
+        span = current_span()
+        span.set_attributes(
+            index=",".join(dict.fromkeys(index for index, _ in searches)),
+            size=sum(search_query.get("size", 0) for _, search_query in searches)
+        )
+
+        try:
+            response = self.client.msearch(searches=body)
+        except Exception as e:
+            logger.error(f"Error running multi-search: {e}")
+            span.record_exception(e)
+            return [self._empty_search_result(str(e)) for _ in searches]
+
+        span.set_attribute("bytes", self._response_bytes(response))
+
+        results = []
+        for sub_response in response["responses"]:
+            if "error" in sub_response:
+                logger.error(f"Multi-search sub-query failed: {sub_response['error']}")
+                results.append(self._empty_search_result(sub_response["error"]))
+                continue
+
+            total = sub_response["hits"].get("total", 0)
+            results.append({
+                "hits": self._extract_hits(sub_response),
+                "aggregations": sub_response.get("aggregations", {}),
+                "total": total.get("value", 0) if isinstance(total, dict) else total,
+                "error": None
+            })
+
+        logger.info(f"Multi-search completed {len(results)} sub-queries")
+        return results
+
+    def build_papers_search(
+        self,
+        query: str,
+        fields: List[str] = None,
+        size: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        source_includes: Optional[List[str]] = None,
+        source_excludes: Optional[List[str]] = None,
+        highlight: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the papers-index search used by search_papers.
+
+        Source projection keeps large fields such as full_text off the wire
+        (they are still searched), and highlighting returns a short
+        server-side preview fragment instead of the whole abstract.
+
+        Returns:
+            Tuple of (index, search body)
+        """
+        if fields is None:
+            fields = ["title^3", "abstract^2", "full_text"]
+
+        search_query = {
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "multi_match": {
+                                "query": query,
+                                "fields": fields,
+                                "type": "best_fields"
+                            }
+                        }
+                    ]
+                }
+            },
+            "size": size
+        }
+
+        # Add filters if provided
+        if filters:
+            filter_clauses = []
+            for field, value in filters.items():
+                filter_clauses.append({"term": {field: value}})
+            search_query["query"]["bool"]["filter"] = filter_clauses
+
+        # Project _source fields if requested
+        if source_includes or source_excludes:
+            source = {}
+            if source_includes:
+                source["includes"] = source_includes
+            if source_excludes:
+                source["excludes"] = source_excludes
+            search_query["_source"] = source
+
+        # Server-side preview fragments (markdown bold around matched terms)
+        if highlight:
+            search_query["highlight"] = {
+                "pre_tags": ["**"],
+                "post_tags": ["**"],
+                "fields": {
+                    "abstract": {
+                        "fragment_size": HIGHLIGHT_FRAGMENT_SIZE,
+                        "number_of_fragments": 1,
+                        "no_match_size": HIGHLIGHT_FRAGMENT_SIZE
+                    }
+                }
+            }
+
+        return PAPERS_INDEX, search_query
+
+    def build_future_work_search(
+        self,
+        query: str,
+        size: int = 10
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the future-work-index search used by query_future_work.
+
+        Returns:
+            Tuple of (index, search body)
+        """
+        search_query = {
+            "query": {
+                "multi_match": {
+                    "query": query,
+                    "fields": ["content^2", "limitations", "future_directions", "keywords^3"],
+                    "type": "best_fields"
+                }
+            },
+            "size": size
+        }
+        return FUTURE_WORK_INDEX, search_query
+
+    def _extract_hits(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Flatten search hits into source documents with their _score."""
+        results = []
+        for hit in response["hits"]["hits"]:
+            doc = hit.get("_source", {})
+            doc["_score"] = hit["_score"]
+            if "highlight" in hit:
+                fragments = [f for frags in hit["highlight"].values() for f in frags]
+                if fragments:
+                    doc["_highlight"] = " ... ".join(fragments)
+            results.append(doc)
+        return results
+
+    def _response_bytes(self, response: Any) -> Optional[int]:
+        """Response body size from the Content-Length header, if the server sent one."""
+        try:
+            return int(response.meta.headers.get("content-length"))
+        except Exception:
+            return None
+
+    def _empty_search_result(self, error: Any = None) -> Dict[str, Any]:
+        """Result placeholder for a failed multi-search sub-query."""
+        return {"hits": [], "aggregations": {}, "total": 0, "error": error}
+
+    @traced("elastic.get_paper_by_id")
     def get_paper_by_id(self, paper_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a paper by its ID.
@@ -288,10 +674,46 @@ class ElasticClient:
         try:
             response = self.client.get(index=PAPERS_INDEX, id=paper_id)
             return response["_source"]
+        except NotFoundError:
+            logger.debug(f"Paper not found: {paper_id}")
+            return None
         except Exception as e:
             logger.error(f"Error retrieving paper {paper_id}: {e}")
             return None
 
+    @traced("elastic.get_existing_ids", capture=("paper_ids", "chunk_size"))
+    def get_existing_ids(
+        self,
+        paper_ids: Iterable[str],
+        chunk_size: int = MGET_CHUNK_SIZE
+    ) -> set:
+        """
+        Check which papers already exist using mget without fetching their source.
+
+        Args:
+            paper_ids: Paper identifiers to check
+            chunk_size: Number of IDs per mget request
+
+        Returns:
+            Set of paper IDs that exist in the papers index
+        """
+        ids = list(dict.fromkeys(pid for pid in paper_ids if pid))
+        existing = set()
+
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            try:
+                response = self.client.mget(index=PAPERS_INDEX, ids=chunk, source=False)
+                for doc in response["docs"]:
+                    if doc.get("found"):
+                        existing.add(doc["_id"])
+            except Exception as e:
+                logger.error(f"Error checking existing papers: {e}")
+
+        current_span().set_attribute("existing", len(existing))
+        logger.info(f"{len(existing)} of {len(ids)} papers already indexed")
+        return existing
+
     def delete_paper(self, paper_id: str) -> bool:
         """
         Delete a paper from the index.
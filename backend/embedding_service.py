@@ -0,0 +1,170 @@
+"""
+Embedding service for ScholarForge.
+Batches section embeddings across papers and caches them by content hash.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+import hashlib
+import sqlite3
+import threading
+
+import numpy as np
+
+from backend.tracing import traced, current_span, SPAN_KIND_INTERNAL
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of texts sent to the embedding model per call
+EMBEDDING_BATCH_SIZE = 256
+
+# On-disk cache of embeddings keyed by content hash (None = memory only)
+EMBEDDING_CACHE_PATH = "./embedding_cache.sqlite3"
+
+
+class EmbeddingService:
+    """
+    Computes embeddings in large batches with a persistent content-hash cache.
+
+    Identical text (e.g. an abstract that is also stored as the "abstract"
+    section, or a paper that is re-ingested) is embedded once and then served
+    from the cache. Misses are deduplicated and sent to the model in batches of
+    `batch_size`, regardless of how many papers they came from. Vectors live in
+    SQLite when a cache path is set, otherwise in an in-process dict.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Callable[[List[str]], Sequence[Sequence[float]]],
+        model_id: str,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        cache_path: Optional[str] = EMBEDDING_CACHE_PATH
+    ):
+        """
+        Initialize the embedding service.
+
+        Args:
+            embedding_function: Callable mapping a list of texts to vectors
+            model_id: Identifier of the embedding model (part of the cache key)
+            batch_size: Number of texts per embedding call
+            cache_path: SQLite file for the persistent cache, or None for memory only
+        """
+        self.embedding_function = embedding_function
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._memory: Dict[str, np.ndarray] = {}
+        self._db = None
+        self.stats = {"requested": 0, "cache_hits": 0, "embedded": 0}
+
+        if cache_path:
+            try:
+                self._db = sqlite3.connect(cache_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "content_hash TEXT PRIMARY KEY, dim INTEGER, vector BLOB)"
+                )
+                self._db.commit()
+                logger.info(f"Opened embedding cache at: {cache_path}")
+            except Exception as e:
+                logger.warning(f"Could not open embedding cache at {cache_path}, using memory only: {e}")
+                self._db = None
+
+    def content_hash(self, text: str) -> str:
+        """Hash text together with the model ID."""
+        return hashlib.sha256(f"{self.model_id}\x00{text}".encode("utf-8")).hexdigest()
+
+    @traced("embedding.embed", kind=SPAN_KIND_INTERNAL, capture=("texts",))
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, serving repeats from the cache.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One embedding per input text, in order
+        """
+        if not texts:
+            return []
+
+        hashes = [self.content_hash(text) for text in texts]
+        vectors = self._lookup(set(hashes))
+
+        # Unique texts that still need embedding
+        pending: Dict[str, str] = {}
+        for text, content_hash in zip(texts, hashes):
+            if content_hash not in vectors and content_hash not in pending:
+                pending[content_hash] = text
+
+        if pending:
+            pending_hashes = list(pending.keys())
+            for start in range(0, len(pending_hashes), self.batch_size):
+                batch_hashes = pending_hashes[start:start + self.batch_size]
+                batch_vectors = self.embedding_function([pending[h] for h in batch_hashes])
+                new_vectors = {
+                    h: np.asarray(vector, dtype=np.float32)
+                    for h, vector in zip(batch_hashes, batch_vectors)
+                }
+                self._store(new_vectors)
+                vectors.update(new_vectors)
+
+        current_span().set_attributes(computed=len(pending), cached=len(texts) - len(pending))
+        with self._lock:
+            self.stats["requested"] += len(texts)
+            self.stats["embedded"] += len(pending)
+            self.stats["cache_hits"] += len(texts) - len(pending)
+
+        logger.debug(f"Embedded {len(texts)} texts ({len(pending)} computed, {len(texts) - len(pending)} cached)")
+        return [vectors[h].tolist() for h in hashes]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request, hit and compute counters."""
+        with self._lock:
+            return {**self.stats, "memory_entries": len(self._memory), "persistent": self._db is not None}
+
+    def close(self):
+        """Close the on-disk cache."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _lookup(self, hashes: set) -> Dict[str, np.ndarray]:
+        """Fetch cached vectors for the given hashes from memory or disk."""
+        found = {}
+        with self._lock:
+            for h in hashes:
+                if h in self._memory:
+                    found[h] = self._memory[h]
+
+            missing = [h for h in hashes if h not in found]
+            if self._db is not None and missing:
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT content_hash, vector FROM embeddings WHERE content_hash IN ({placeholders})",
+                        chunk
+                    ).fetchall()
+                    for h, blob in rows:
+                        found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _store(self, vectors: Dict[str, np.ndarray]):
+        """Write freshly computed vectors to the cache tier in use."""
+        with self._lock:
+            if self._db is None:
+                self._memory.update(vectors)
+            else:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (content_hash, dim, vector) VALUES (?, ?, ?)",
+                        [(h, int(v.shape[0]), v.tobytes()) for h, v in vectors.items()]
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"Could not persist embeddings: {e}")
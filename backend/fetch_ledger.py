@@ -0,0 +1,169 @@
+"""
+Fetch ledger for ScholarForge.
+Remembers what each external source returned for a topic, so empty fetches are
+not repeated and later fetches continue where the previous one stopped.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+import logging
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# On-disk ledger of external fetches (None = memory only)
+FETCH_LEDGER_PATH = "./fetch_ledger.sqlite3"
+
+# Seconds during which a fetch that returned nothing is not retried
+FETCH_NEGATIVE_TTL = 24 * 3600
+
+# Seconds after which the recorded offset is forgotten and fetching restarts at 0
+FETCH_OFFSET_TTL = 7 * 24 * 3600
+
+
+class FetchLedger:
+    """
+    Per-topic, per-source record of external fetches.
+
+    Each entry holds when the source was last fetched for the topic, how many
+    results that fetch returned and the highest offset seen so far (i.e. how
+    far into the source's result list we have already ingested). Entries live
+    in SQLite when a path is set, otherwise in an in-process dict.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = FETCH_LEDGER_PATH,
+        negative_ttl: float = FETCH_NEGATIVE_TTL,
+        offset_ttl: float = FETCH_OFFSET_TTL
+    ):
+        """
+        Initialize the ledger.
+
+        Args:
+            path: SQLite file for the persistent ledger, or None for memory only
+            negative_ttl: Seconds an empty fetch suppresses further fetches
+            offset_ttl: Seconds before the recorded offset is reset
+        """
+        self.negative_ttl = negative_ttl
+        self.offset_ttl = offset_ttl
+        self._lock = threading.Lock()
+        self._memory: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._db = None
+        self.stats = {"recorded": 0, "skipped": 0}
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS fetches ("
+                    "topic TEXT, source TEXT, fetched_at REAL, returned INTEGER, max_offset INTEGER, "
+                    "PRIMARY KEY (topic, source))"
+                )
+                self._db.commit()
+                logger.info(f"Opened fetch ledger at: {path}")
+            except Exception as e:
+                logger.warning(f"Could not open fetch ledger at {path}, using memory only: {e}")
+                self._db = None
+
+    def _key(self, topic: str, source: str) -> Tuple[str, str]:
+        """Normalize a topic/source pair for use as a lookup key."""
+        return " ".join(topic.lower().split()), source
+
+    def get(self, topic: str, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the last fetch of a topic from a source.
+
+        Returns:
+            Dict with fetched_at, returned and max_offset, or None if never fetched
+        """
+        key = self._key(topic, source)
+        with self._lock:
+            if self._db is None:
+                entry = self._memory.get(key)
+                return dict(entry) if entry else None
+
+            try:
+                row = self._db.execute(
+                    "SELECT fetched_at, returned, max_offset FROM fetches WHERE topic = ? AND source = ?",
+                    key
+                ).fetchone()
+            except Exception as e:
+                logger.error(f"Error reading fetch ledger: {e}")
+                return None
+
+        if row is None:
+            return None
+        return {"fetched_at": row[0], "returned": row[1], "max_offset": row[2]}
+
+    def should_skip(self, topic: str, source: str) -> bool:
+        """True if the source recently returned nothing for this topic."""
+        entry = self.get(topic, source)
+        if entry is None or entry["returned"] > 0:
+            return False
+        if time.time() - entry["fetched_at"] >= self.negative_ttl:
+            return False
+
+        with self._lock:
+            self.stats["skipped"] += 1
+        return True
+
+    def next_offset(self, topic: str, source: str) -> int:
+        """Offset of the first result not yet fetched from the source."""
+        entry = self.get(topic, source)
+        if entry is None or time.time() - entry["fetched_at"] >= self.offset_ttl:
+            return 0
+        return entry["max_offset"]
+
+    def record(self, topic: str, source: str, offset: int, returned: int):
+        """
+        Record a completed fetch.
+
+        Only call this for fetches that reached the source and whose papers
+        were ingested; a network error or failed ingestion is not evidence
+        that the topic has no (more) results.
+
+        Args:
+            topic: Search query
+            source: Source name (e.g. "arXiv")
+            offset: Offset the fetch started at
+            returned: Number of results the source returned, before any
+                client-side filtering (e.g. of papers without an abstract)
+        """
+        key = self._key(topic, source)
+        previous = self.get(topic, source)
+        max_offset = offset + returned
+        if previous and time.time() - previous["fetched_at"] < self.offset_ttl:
+            max_offset = max(max_offset, previous["max_offset"])
+        entry = {"fetched_at": time.time(), "returned": returned, "max_offset": max_offset}
+
+        with self._lock:
+            self.stats["recorded"] += 1
+            if self._db is None:
+                self._memory[key] = entry
+                return
+
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO fetches (topic, source, fetched_at, returned, max_offset) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, entry["fetched_at"], returned, max_offset)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error writing fetch ledger: {e}")
+
+
+# Singleton instance
+_fetch_ledger = None
+
+
+def get_fetch_ledger() -> FetchLedger:
+    """Get or create the fetch ledger singleton."""
+    global _fetch_ledger
+    if _fetch_ledger is None:
+        _fetch_ledger = FetchLedger()
+    return _fetch_ledger
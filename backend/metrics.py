@@ -0,0 +1,221 @@
+"""
+Latency metrics for ScholarForge.
+Per-request stage timings plus rolling percentile histograms across requests.
+"""
+
+from typing import Dict, Any, List
+from collections import deque
+from contextlib import contextmanager
+import json
+import logging
+import math
+import threading
+import time
+
+from backend.tracing import span
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Samples kept per stage for rolling percentiles
+LATENCY_WINDOW_SIZE = 1000
+
+# Percentiles reported by the recorder
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+class RequestMetrics:
+    """
+    Wall-clock and CPU timings, counts and cache flags for a single request.
+
+    Usage:
+        metrics = RequestMetrics()
+        with metrics.stage("stage1_elastic"):
+            ...
+        metrics.count("stage1_candidates", 200)
+        metrics.flag("result_cache", "miss")
+        metrics.as_dict()  # {"stages": {"stage1_elastic": {"wall_ms": ..., "cpu_ms": ...}}, ...}
+
+    CPU time is measured with time.thread_time, so it covers only the calling
+    thread (work done in helper threads shows up as wall time only).
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.flags: Dict[str, Any] = {}
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.thread_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block (also traced as a span); repeated stages with the same name accumulate."""
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            with span(name):
+                yield
+        finally:
+            self.add(
+                name,
+                (time.perf_counter() - start_wall) * 1000,
+                (time.thread_time() - start_cpu) * 1000
+            )
+
+    def add(self, name: str, wall_ms: float, cpu_ms: float = 0.0):
+        """Record a stage duration measured elsewhere."""
+        entry = self.stages.setdefault(name, {"wall_ms": 0.0, "cpu_ms": 0.0})
+        entry["wall_ms"] += wall_ms
+        entry["cpu_ms"] += cpu_ms
+
+    def count(self, name: str, value: int):
+        """Record a count, e.g. candidates entering or leaving a stage."""
+        self.counts[name] = value
+
+    def flag(self, name: str, value: Any):
+        """Record a flag, e.g. "hit"/"miss" for a cache."""
+        self.flags[name] = value
+
+    def mark(self, name: str):
+        """Record the time elapsed since the request started as a stage (e.g. time to first content)."""
+        self.stages[name] = {
+            "wall_ms": (time.perf_counter() - self._start_wall) * 1000,
+            "cpu_ms": (time.thread_time() - self._start_cpu) * 1000
+        }
+
+    def finish(self):
+        """Record the total request time as the "total" stage."""
+        self.mark("total")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return stage timings (rounded to microseconds), counts and flags."""
+        return {
+            "stages": {
+                name: {key: round(value, 3) for key, value in entry.items()}
+                for name, entry in self.stages.items()
+            },
+            "candidates": dict(self.counts),
+            "cache": dict(self.flags)
+        }
+
+
+@contextmanager
+def shared_stage(name: str, metrics_list: List[RequestMetrics]):
+    """Time a block once and record it on every request that shared it (batched calls)."""
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    try:
+        with span(name, requests=len(metrics_list)):
+            yield
+    finally:
+        wall_ms = (time.perf_counter() - start_wall) * 1000
+        cpu_ms = (time.thread_time() - start_cpu) * 1000
+        for metrics in metrics_list:
+            metrics.add(name, wall_ms, cpu_ms)
+
+
+class LatencyRecorder:
+    """
+    Rolling latency histograms per stage.
+
+    Keeps the last `window_size` wall-clock samples of every stage and
+    reports p50/p95/p99 over them, plus the cumulative sample count and sum
+    since the recorder started (monotonic, for Prometheus rate()), as JSON or
+    in Prometheus text exposition format.
+    """
+
+    def __init__(self, window_size: int = LATENCY_WINDOW_SIZE):
+        """Initialize an empty recorder."""
+        self.window_size = window_size
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._sums: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, metrics: RequestMetrics):
+        """Add every stage of a finished request, and count its cache flags."""
+        with self._lock:
+            for name, entry in metrics.stages.items():
+                samples = self._samples.setdefault(name, deque(maxlen=self.window_size))
+                samples.append(entry["wall_ms"])
+                self._counts[name] = self._counts.get(name, 0) + 1
+                self._sums[name] = self._sums.get(name, 0.0) + entry["wall_ms"]
+            for name, value in metrics.flags.items():
+                counter = f"{name}_{value}"
+                self._counters[counter] = self._counters.get(counter, 0) + 1
+
+    def increment(self, counter: str, amount: int = 1):
+        """Increment a named counter (e.g. result cache hits)."""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def summary(self) -> Dict[str, Any]:
+        """Return percentiles per stage plus counters."""
+        with self._lock:
+            stages = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                stages[name] = {
+                    "count": self._counts[name],
+                    "sum_ms": round(self._sums[name], 3),
+                    "window": len(ordered),
+                    **{f"p{p}_ms": round(self._percentile(ordered, p), 3) for p in LATENCY_PERCENTILES}
+                }
+            return {"stages": stages, "counters": dict(self._counters)}
+
+    def to_json(self) -> str:
+        """Dump the summary as JSON."""
+        return json.dumps(self.summary(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix: str = "scholarforge") -> str:
+        """Dump the summary in Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_latency_ms Request stage latency in milliseconds (quantiles over the last {self.window_size} samples)",
+            f"# TYPE {prefix}_stage_latency_ms summary"
+        ]
+        for name, stats in sorted(summary["stages"].items()):
+            for p in LATENCY_PERCENTILES:
+                lines.append(
+                    f'{prefix}_stage_latency_ms{{stage="{name}",quantile="{p / 100}"}} {stats[f"p{p}_ms"]}'
+                )
+            lines.append(f'{prefix}_stage_latency_ms_sum{{stage="{name}"}} {stats["sum_ms"]}')
+            lines.append(f'{prefix}_stage_latency_ms_count{{stage="{name}"}} {stats["count"]}')
+
+        if summary["counters"]:
+            lines.append(f"# TYPE {prefix}_events_total counter")
+            for counter, value in sorted(summary["counters"].items()):
+                lines.append(f'{prefix}_events_total{{event="{counter}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all samples and counters."""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._sums.clear()
+            self._counters.clear()
+
+    @staticmethod
+    def _percentile(ordered: List[float], percentile: float) -> float:
+        """Nearest-rank percentile of a sorted list."""
+        if not ordered:
+            return 0.0
+        rank = max(0, min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+
+# Singleton instance
+_latency_recorder = None
+
+
+def get_latency_recorder() -> LatencyRecorder:
+    """Get or create LatencyRecorder singleton."""
+    global _latency_recorder
+    if _latency_recorder is None:
+        _latency_recorder = LatencyRecorder()
+    return _latency_recorder
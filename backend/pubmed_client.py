@@ -6,9 +6,12 @@ Fetches biomedical and life sciences research papers.
 import requests
 from typing import Dict, Any, List, Optional
 import logging
+import threading
 import time
 from xml.etree import ElementTree as ET
 
+from backend.tracing import traced, current_span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,13 +25,27 @@ class PubMedClient:
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
         self.tool = "ScholarForge"
         self.email = "scholarforge@research.tool"
+        self._thread_state = threading.local()
         logger.info("Initialized PubMed client")
 
+    def take_raw_result_count(self) -> Optional[int]:
+        """
+        Return how many results the source itself returned for this thread's
+        last search_papers call (before papers were filtered out), and reset it.
+        None if the search failed before the source answered.
+        """
+        count = getattr(self._thread_state, "raw_result_count", None)
+        self._thread_state.raw_result_count = None
+        return count
+
+    @traced("pubmed.search_papers", capture=("max_results",))
     def search_papers(
         self,
         query: str,
         max_results: int = 10,
-        min_year: Optional[int] = None
+        min_year: Optional[int] = None,
+        offset: int = 0,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search PubMed for papers matching the query.
@@ -37,12 +54,15 @@ class PubMedClient:
             query: Search query
             max_results: Maximum number of papers to return
             min_year: Minimum publication year (for recent papers)
+            offset: Number of leading results to skip (to continue a previous fetch)
+            raise_errors: If True, re-raise request and processing errors instead of returning []
 
         Returns:
             List of paper dictionaries
         """
+        self._thread_state.raw_result_count = None
         try:
-            logger.info(f"Searching PubMed for: '{query}' (max {max_results} results)")
+            logger.info(f"Searching PubMed for: '{query}' (max {max_results} results, offset {offset})")
 
             # Add year filter if specified
             if min_year:
@@ -54,6 +74,7 @@ class PubMedClient:
                 "db": "pubmed",
                 "term": query,
                 "retmax": max_results,
+                "retstart": offset,
                 "retmode": "json",
                 "sort": "relevance",
                 "tool": self.tool,
@@ -68,6 +89,7 @@ class PubMedClient:
 
             if not pmids:
                 logger.warning("No papers found on PubMed")
+                self._thread_state.raw_result_count = 0
                 return []
 
             logger.info(f"Found {len(pmids)} PMIDs, fetching details...")
@@ -84,27 +106,38 @@ class PubMedClient:
             }
 
             fetch_response = requests.get(fetch_url, params=fetch_params, timeout=15)
+            current_span().set_attributes(
+                http_status=fetch_response.status_code,
+                bytes=len(search_response.content) + len(fetch_response.content)
+            )
             fetch_response.raise_for_status()
 
             # Parse XML response
-            papers = self._parse_pubmed_xml(fetch_response.text)
+            papers = self._parse_pubmed_xml(fetch_response.text, raise_errors=raise_errors)
+            self._thread_state.raw_result_count = len(pmids)
 
+            current_span().set_attribute("results", len(papers))
             logger.info(f"Retrieved {len(papers)} papers from PubMed")
             return papers
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching from PubMed: {e}")
+            if raise_errors:
+                raise
             return []
         except Exception as e:
             logger.error(f"Error processing PubMed results: {e}")
+            if raise_errors:
+                raise
             return []
 
-    def _parse_pubmed_xml(self, xml_text: str) -> List[Dict[str, Any]]:
+    def _parse_pubmed_xml(self, xml_text: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
         """
         Parse PubMed XML response into paper dictionaries.
 
         Args:
             xml_text: XML response from PubMed
+            raise_errors: If True, re-raise a malformed-document error instead of returning []
 
         Returns:
             List of formatted papers
@@ -125,6 +158,8 @@ class PubMedClient:
 
         except Exception as e:
             logger.error(f"Error parsing PubMed XML: {e}")
+            if raise_errors:
+                raise
 
         return papers
 
@@ -3,22 +3,55 @@ Query handler for ScholarForge.
 Coordinates retrieval from Elastic and Chroma, then synthesizes results using Claude.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import copy
 import logging
-
-from backend.elastic_client import get_elastic_client
-from backend.chroma_client import get_chroma_client
-from backend.claude_client import get_claude_client
-from backend.arxiv_client import get_arxiv_client
-from backend.semantic_scholar_client import get_semantic_scholar_client
-from backend.pubmed_client import get_pubmed_client
-from backend.crossref_client import get_crossref_client
-from backend.data_ingestion import get_paper_ingestor
+import threading
+import time
+
+from backend.startup import get_component_registry, lazy_component
+from backend.result_cache import get_result_cache
+from backend.fetch_ledger import get_fetch_ledger
+from backend.report_store import ReportStore, get_report_store
+from backend.metrics import RequestMetrics, get_latency_recorder, shared_stage
+from backend.tracing import (
+    traced,
+    traced_request,
+    traced_request_stream,
+    start_trace,
+    span,
+    propagate,
+    current_span,
+    current_request_id,
+    SPAN_KIND_INTERNAL
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Paper fields read downstream of keyword retrieval (full_text is never needed)
+KEYWORD_SOURCE_FIELDS = ["paper_id", "title", "abstract", "authors", "year", "venue", "field", "url"]
+
+# Overall time budget (seconds) for fetching from external sources
+EXTERNAL_FETCH_DEADLINE = 20.0
+
+# Worker threads for background fetch-and-ingest jobs
+BACKGROUND_INGEST_WORKERS = 2
+
+# Seconds before a finished background fetch for the same topic may run again
+BACKGROUND_REFETCH_COOLDOWN = 600
+
+# Concurrent Claude analyses in query_research_gaps_many
+BATCH_ANALYSIS_CONCURRENCY = 4
+
+# Candidate papers retrieved for (and analyzed by) map-reduce gap analysis
+MAP_REDUCE_MAX_PAPERS = 500
+
+# Stage 1 papers returned alongside the Stage 2 results as keyword context
+STAGE1_CONTEXT_PAPERS = 50
+
 
 class QueryHandler:
     """
@@ -28,26 +61,69 @@ class QueryHandler:
     replaceable with Fetch.ai agents in the future.
     """
 
-    def __init__(self, fetch_from_arxiv: bool = True, min_year: Optional[int] = 2020):
+    # Clients are constructed on first use (or by the background warm-up)
+    elastic = lazy_component("elastic")
+    chroma = lazy_component("chroma")
+    claude = lazy_component("claude")
+    arxiv = lazy_component("arxiv")
+    semantic_scholar = lazy_component("semantic_scholar")
+    pubmed = lazy_component("pubmed")
+    crossref = lazy_component("crossref")
+    ingestor = lazy_component("ingestor")
+
+    def __init__(
+        self,
+        fetch_from_arxiv: bool = True,
+        min_year: Optional[int] = 2020,
+        external_fetch_deadline: float = EXTERNAL_FETCH_DEADLINE,
+        warm_up: bool = True
+    ):
         """
-        Initialize query handler with all clients.
+        Initialize query handler.
+
+        Clients (Elastic, Chroma, Claude, external sources) are not built
+        here; each is constructed on first use, and with warm_up they are all
+        started concurrently in a background thread so the caller is not
+        blocked by connection setup.
 
         Args:
             fetch_from_arxiv: If True, will fetch papers from external sources when no local results found
             min_year: Minimum publication year for prioritizing recent papers (default: 2020)
+            external_fetch_deadline: Overall time budget in seconds for external fetching
+            warm_up: Start constructing all clients in the background
         """
-        self.elastic = get_elastic_client()
-        self.chroma = get_chroma_client()
-        self.claude = get_claude_client()
-        self.arxiv = get_arxiv_client()
-        self.semantic_scholar = get_semantic_scholar_client()
-        self.pubmed = get_pubmed_client()
-        self.crossref = get_crossref_client()
-        self.ingestor = get_paper_ingestor()
+        self.components = get_component_registry()
+        if warm_up:
+            self.components.warm_up()
+        self.result_cache = get_result_cache()
+        self.fetch_ledger = get_fetch_ledger()
+        self.report_store = get_report_store()
+        self.latency_recorder = get_latency_recorder()
         self.fetch_from_arxiv = fetch_from_arxiv
         self.min_year = min_year
+        self.external_fetch_deadline = external_fetch_deadline
+        self._background_executor = ThreadPoolExecutor(
+            max_workers=BACKGROUND_INGEST_WORKERS,
+            thread_name_prefix="background-ingest"
+        )
+        self._background_jobs: Dict[str, Dict[str, Any]] = {}
+        self._background_lock = threading.Lock()
         logger.info(f"Initialized QueryHandler (external fetching: {fetch_from_arxiv}, prioritizing papers >= {min_year})")
 
+    def get_readiness(self) -> Dict[str, Any]:
+        """
+        Report which backend clients are initialized.
+
+        Returns:
+            Dictionary with "ready" (all clients built) and per-client
+            "components" status (state, build seconds, error)
+        """
+        return {
+            "ready": self.components.is_ready(),
+            "components": self.components.status()
+        }
+
+    @traced_request("query_research_gaps", capture=("topic", "n_results", "use_two_stage"))
     def query_research_gaps(
         self,
         topic: str,
@@ -55,7 +131,9 @@ class QueryHandler:
         use_semantic: bool = True,
         use_keyword: bool = True,
         relevance_threshold: float = 0.7,
-        use_two_stage: bool = True
+        use_two_stage: bool = True,
+        background_fetch: bool = False,
+        map_reduce: bool = False
     ) -> Dict[str, Any]:
         """
         Main entry point for querying research gaps.
@@ -77,6 +155,12 @@ class QueryHandler:
             use_keyword: Whether to use Elastic keyword search
             relevance_threshold: Minimum similarity score (0-1) for semantic results
             use_two_stage: Whether to use two-stage hybrid retrieval (recommended for large corpus)
+            background_fetch: If True, answer from local results immediately and run
+                external fetch-and-ingest in the background (stale-while-revalidate);
+                poll get_refresh_status(topic) and re-query once it is "done"
+            map_reduce: If True (with two-stage retrieval), analyze up to
+                MAP_REDUCE_MAX_PAPERS candidates with ClaudeClient's map-reduce
+                mode instead of only the top n_results; papers shown stay n_results
 
         Returns:
             Dictionary containing:
@@ -86,19 +170,340 @@ class QueryHandler:
                 - keyword_trend: Keyword frequency data
                 - papers: List of retrieved papers with metadata
                 - retrieval_method: "two_stage" or "traditional"
+                - refresh_pending: True if a background fetch may produce newer results
+                - cache_hit: True if served from the result cache or a precomputed report
+                - precomputed: True if served from a report built by precompute_reports
+
+            retrieval_stats also carries per-stage "stages" timings (wall_ms and
+            cpu_ms), per-stage "candidates" counts and "cache" hit/miss flags,
+            and request_id identifies the request's trace in the exported spans.
+        """
+        metrics = RequestMetrics()
+        cache_key, cached = self._lookup_cached_result(
+            topic,
+            metrics,
+            n_results=n_results,
+            use_semantic=use_semantic,
+            use_keyword=use_keyword,
+            relevance_threshold=relevance_threshold,
+            use_two_stage=use_two_stage,
+            map_reduce=map_reduce
+        )
+        if cached is not None:
+            return self._finish_metrics(metrics, cached)
+
+        # Read before retrieval so papers ingested meanwhile invalidate this result
+        generation = self.result_cache.generation.value
+
+        return self._answer_query(
+            topic,
+            cache_key,
+            generation,
+            metrics,
+            n_results=n_results,
+            use_semantic=use_semantic,
+            use_keyword=use_keyword,
+            relevance_threshold=relevance_threshold,
+            use_two_stage=use_two_stage,
+            background_fetch=background_fetch,
+            map_reduce=map_reduce
+        )
+
+    @traced_request_stream("stream_research_gaps", capture=("topic", "n_results", "use_two_stage"))
+    def stream_research_gaps(
+        self,
+        topic: str,
+        n_results: int = 20,
+        use_semantic: bool = True,
+        use_keyword: bool = True,
+        relevance_threshold: float = 0.7,
+        use_two_stage: bool = True,
+        background_fetch: bool = False,
+        map_reduce: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of query_research_gaps.
+
+        Papers are yielded as soon as retrieval finishes, then Claude's
+        analysis streams in, so a UI can render content at retrieval latency
+        instead of waiting for the full analysis. Events, in order:
+            {"type": "papers", "papers": [...], "retrieval_method": ..., "recent_warning": ...}
+            {"type": "analysis_token", "text": ...}        (repeated; not sent on cache hits)
+            {"type": "summary", "summary": ...}            (as soon as Claude has written it)
+            {"type": "limitation", "index": i, "limitation": ...}                 (each, as completed)
+            {"type": "future_direction", "index": i, "future_direction": ...}     (each, as completed)
+            {"type": "keyword_trend_entry", "index": i, "keyword_trend_entry": {...}}
+            {"type": "limitations", "limitations": [...]}  (final lists, once the analysis is parsed)
+            {"type": "future_directions", "future_directions": [...]}
+            {"type": "keyword_trend", "keyword_trend": [...]}
+            {"type": "done", "result": {...}}              (exactly what query_research_gaps returns)
+        The per-item events only appear while Claude is actually streaming;
+        cached, fallback and map-reduce analyses send the final lists only. When no papers
+        are found only the "done" event is sent.
+
+        Args:
+            Same as query_research_gaps
+
+        Yields:
+            Event dictionaries
+        """
+        metrics = RequestMetrics()
+        cache_key, cached = self._lookup_cached_result(
+            topic,
+            metrics,
+            n_results=n_results,
+            use_semantic=use_semantic,
+            use_keyword=use_keyword,
+            relevance_threshold=relevance_threshold,
+            use_two_stage=use_two_stage,
+            map_reduce=map_reduce
+        )
+        if cached is not None:
+            if cached.get("papers"):
+                yield {
+                    "type": "papers",
+                    "papers": cached["papers"],
+                    "retrieval_method": cached.get("retrieval_method"),
+                    "recent_warning": cached.get("recent_warning")
+                }
+                yield from self._analysis_events(cached)
+            yield {"type": "done", "result": self._finish_metrics(metrics, cached)}
+            return
+
+        # Read before retrieval so papers ingested meanwhile invalidate this result
+        generation = self.result_cache.generation.value
+
+        yield from self._answer_query_events(
+            topic,
+            cache_key,
+            generation,
+            metrics,
+            n_results=n_results,
+            use_semantic=use_semantic,
+            use_keyword=use_keyword,
+            relevance_threshold=relevance_threshold,
+            use_two_stage=use_two_stage,
+            background_fetch=background_fetch,
+            map_reduce=map_reduce,
+            stream_analysis=True
+        )
+
+    @traced_request("query_research_gaps_many", capture=("topics", "n_results", "use_two_stage"))
+    def query_research_gaps_many(
+        self,
+        topics: List[str],
+        n_results: int = 20,
+        use_semantic: bool = True,
+        use_keyword: bool = True,
+        relevance_threshold: float = 0.7,
+        use_two_stage: bool = True,
+        background_fetch: bool = False,
+        max_concurrency: int = BATCH_ANALYSIS_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Query research gaps for many topics at once.
+
+        Topics that miss the result cache share one batched retrieval: their
+        query embeddings are computed together, Stage 1 runs as a single
+        Elasticsearch _msearch and Stage 2 scores every topic's candidates
+        with one Chroma call. The Claude analyses then run concurrently, at
+        most max_concurrency at a time. Repeated topics are answered once.
+
+        Args:
+            topics: Research topic queries
+            n_results: Final number of results to return per topic
+            use_semantic: Whether to use Chroma semantic search
+            use_keyword: Whether to use Elastic keyword search
+            relevance_threshold: Minimum similarity score (0-1) for semantic results
+            use_two_stage: Whether to use two-stage hybrid retrieval
+            background_fetch: As for query_research_gaps
+            max_concurrency: Maximum number of concurrent Claude analyses
+
+        Returns:
+            One result per topic, in input order, each shaped like query_research_gaps'
+        """
+        params = {
+            "n_results": n_results,
+            "use_semantic": use_semantic,
+            "use_keyword": use_keyword,
+            "relevance_threshold": relevance_threshold,
+            "use_two_stage": use_two_stage,
+            "map_reduce": False
+        }
+        answers: Dict[str, Dict[str, Any]] = {}
+        pending = []
+
+        for topic in dict.fromkeys(topics):
+            with span("topic", topic=topic):
+                metrics = RequestMetrics()
+                cache_key, cached = self._lookup_cached_result(topic, metrics, **params)
+                if cached is not None:
+                    answers[topic] = self._finish_metrics(metrics, cached)
+                else:
+                    pending.append((topic, cache_key, metrics))
+
+        if pending:
+            logger.info(f"Processing {len(pending)} of {len(answers) + len(pending)} topics in batch")
+
+            # Read before retrieval so papers ingested meanwhile invalidate these results
+            generation = self.result_cache.generation.value
+            pending_topics = [topic for topic, _, _ in pending]
+            retrievals: List[Optional[tuple]] = [None] * len(pending)
+
+            if use_two_stage and use_semantic and use_keyword:
+                retrievals = self._two_stage_retrieval_many(
+                    pending_topics,
+                    final_k=n_results,
+                    relevance_threshold=relevance_threshold,
+                    metrics_list=[metrics for _, _, metrics in pending]
+                )
+            elif use_semantic:
+                # Per-topic retrieval below then hits the query embedding cache
+                self.chroma.embed_queries(pending_topics)
+
+            query_cache_outcome = self.chroma.take_query_cache_outcome()
+            if query_cache_outcome:
+                for _, _, metrics in pending:
+                    metrics.flag("query_embedding", query_cache_outcome)
+
+            def answer(topic: str, cache_key: str, metrics: RequestMetrics, retrieval: Optional[tuple]):
+                with span("topic", topic=topic):
+                    return self._answer_query(
+                        topic,
+                        cache_key,
+                        generation,
+                        metrics,
+                        background_fetch=background_fetch,
+                        retrieval=retrieval,
+                        **params
+                    )
+
+            workers = max(1, min(max_concurrency, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-analysis") as executor:
+                futures = {
+                    executor.submit(propagate(answer), topic, cache_key, metrics, retrieval): topic
+                    for (topic, cache_key, metrics), retrieval in zip(pending, retrievals)
+                }
+                for future, topic in futures.items():
+                    answers[topic] = future.result()
+
+        # Repeated topics get their own copy of the shared answer
+        results = []
+        seen = set()
+        for topic in topics:
+            results.append(copy.deepcopy(answers[topic]) if topic in seen else answers[topic])
+            seen.add(topic)
+        return results
+
+    def _lookup_cached_result(
+        self,
+        topic: str,
+        metrics: RequestMetrics,
+        **params: Any
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Look a topic up in the result cache, then among the precomputed reports,
+        recording the outcomes in metrics. The query is counted in the query log.
+
+        Returns:
+            Tuple of (cache key, cached response or None)
+        """
+        self.report_store.record_query(topic)
+
+        with metrics.stage("result_cache"):
+            cache_key = self.result_cache.make_key(topic, **params)
+            cached = self.result_cache.get(cache_key)
+
+        if cached is not None:
+            logger.info(f"Serving cached result for query: {topic}")
+            metrics.flag("result_cache", "hit")
+            cached["cache_hit"] = True
+            return cache_key, cached
+        metrics.flag("result_cache", "miss")
+
+        with metrics.stage("report_store"):
+            cached = self.report_store.get(cache_key, self.result_cache.generation.value)
+
+        if cached is not None:
+            logger.info(f"Serving precomputed report for query: {topic}")
+            metrics.flag("report_store", "hit")
+            cached["cache_hit"] = True
+            cached["precomputed"] = True
+        else:
+            metrics.flag("report_store", "miss")
+        return cache_key, cached
+
+    def _answer_query(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Run _answer_query_events without streaming and return the final result."""
+        for event in self._answer_query_events(*args, **kwargs):
+            if event["type"] == "done":
+                return event["result"]
+
+    def _answer_query_events(
+        self,
+        topic: str,
+        cache_key: str,
+        generation: int,
+        metrics: RequestMetrics,
+        n_results: int,
+        use_semantic: bool,
+        use_keyword: bool,
+        relevance_threshold: float,
+        use_two_stage: bool,
+        background_fetch: bool,
+        retrieval: Optional[tuple] = None,
+        stream_analysis: bool = False,
+        map_reduce: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Retrieve, analyze and cache the answer for a topic that missed the result cache,
+        yielding the events described in stream_research_gaps.
+
+        Args:
+            topic: Research topic query
+            cache_key: Result cache key for the topic and parameters
+            generation: Corpus generation read before retrieval started
+            metrics: Request metrics to record into
+            retrieval: Precomputed two-stage (semantic_results, keyword_results),
+                as produced in batch by query_research_gaps_many
+            stream_analysis: If True, stream Claude's output as analysis_token events
+            map_reduce: If True, analyze the wide candidate set with map-reduce
+                (not streamed; see query_research_gaps)
+            (other arguments as for query_research_gaps)
         """
+        self.chroma.take_query_cache_outcome()
+
         try:
             logger.info(f"Processing query: {topic}")
 
+            # Wide candidate set for map-reduce analysis (papers shown stay n_results)
+            analysis_retrieval = None
+
             # Choose retrieval strategy
-            if use_two_stage and use_semantic and use_keyword:
-                # TWO-STAGE HYBRID RETRIEVAL
-                logger.info("Using two-stage hybrid retrieval (Elasticsearch → ChromaDB)")
-                semantic_results, keyword_results = self._two_stage_retrieval(
+            if use_two_stage and use_semantic and use_keyword and map_reduce and retrieval is None:
+                logger.info(f"Using two-stage hybrid retrieval with map-reduce analysis (up to {MAP_REDUCE_MAX_PAPERS} papers)")
+                analysis_retrieval = self._two_stage_retrieval(
                     topic,
-                    final_k=n_results,
-                    relevance_threshold=relevance_threshold
+                    final_k=MAP_REDUCE_MAX_PAPERS,
+                    stage1_candidates=MAP_REDUCE_MAX_PAPERS,
+                    relevance_threshold=relevance_threshold,
+                    keyword_k=MAP_REDUCE_MAX_PAPERS,
+                    metrics=metrics
                 )
+                semantic_results = analysis_retrieval[0][:n_results]
+                keyword_results = analysis_retrieval[1][:STAGE1_CONTEXT_PAPERS]
+                retrieval_method = "two_stage"
+            elif use_two_stage and use_semantic and use_keyword:
+                # TWO-STAGE HYBRID RETRIEVAL
+                logger.info("Using two-stage hybrid retrieval (Elasticsearch → ChromaDB)")
+                if retrieval is None:
+                    retrieval = self._two_stage_retrieval(
+                        topic,
+                        final_k=n_results,
+                        relevance_threshold=relevance_threshold,
+                        metrics=metrics
+                    )
+                semantic_results, keyword_results = retrieval
                 retrieval_method = "two_stage"
             else:
                 # TRADITIONAL INDEPENDENT RETRIEVAL
@@ -107,13 +512,18 @@ class QueryHandler:
                 keyword_results = []
 
                 if use_semantic:
-                    raw_semantic = self._semantic_retrieval(topic, n_results)
+                    with metrics.stage("semantic_search"):
+                        raw_semantic = self._semantic_retrieval(topic, n_results)
                     # Filter by relevance (distance threshold - lower is better for Chroma)
                     semantic_results = [r for r in raw_semantic if r.get("distance", 1.0) < (1.0 - relevance_threshold)]
+                    metrics.count("semantic_raw", len(raw_semantic))
+                    metrics.count("semantic_filtered", len(semantic_results))
                     logger.info(f"Retrieved {len(semantic_results)} relevant results from Chroma (filtered from {len(raw_semantic)})")
 
                 if use_keyword:
-                    keyword_results = self._keyword_retrieval(topic, n_results)
+                    with metrics.stage("keyword_search"):
+                        keyword_results = self._keyword_retrieval(topic, n_results)
+                    metrics.count("keyword", len(keyword_results))
                     logger.info(f"Retrieved {len(keyword_results)} results from Elastic")
 
                 retrieval_method = "traditional"
@@ -122,112 +532,334 @@ class QueryHandler:
             total_found = len(semantic_results) + len(keyword_results)
             min_required = max(10, n_results // 2)  # Be flexible - quality over quantity
 
+            refresh_pending = False
+            # Answered without the external fetch a synchronous call would run
+            local_only = False
+
             if total_found < min_required:
                 logger.warning(f"Found {total_found} papers locally, need at least {min_required}")
 
+                # Stale-while-revalidate: answer now, fetch and ingest in the background
+                if self.fetch_from_arxiv and background_fetch:
+                    local_only = True
+                    refresh_pending = self._schedule_background_fetch(topic, min_required - total_found)
+                    if not semantic_results and not keyword_results:
+                        response = self._empty_response(
+                            topic,
+                            reason="refresh_pending" if refresh_pending else "no_relevant_results"
+                        )
+                        response["refresh_pending"] = refresh_pending
+                        yield {"type": "done", "result": self._finish_metrics(metrics, response)}
+                        return
+
                 # Try fetching from external sources if enabled
-                if self.fetch_from_arxiv:
+                elif self.fetch_from_arxiv:
                     needed = min_required - total_found
-
-                    # Balanced fetching strategy for diversity:
-                    # - 50% from arXiv (strong coverage)
-                    # - 50% distributed among other sources
-                    # - Guarantee at least 2-3 non-arXiv papers
-                    arxiv_quota = max(needed // 2, needed - 3)  # At least leave room for 3 non-arXiv
-                    other_quota = needed - arxiv_quota
-
-                    logger.info(f"Fetching {needed} papers: {arxiv_quota} from arXiv, {other_quota} from other sources")
-
-                    # Fetch from arXiv first (largest quota)
-                    arxiv_fetched = self._fetch_and_ingest_from_arxiv(topic, n_results=arxiv_quota)
-                    logger.info(f"Fetched {arxiv_fetched} papers from arXiv")
-
-                    # Distribute remaining among other sources (round-robin)
-                    other_sources = [
-                        ("Semantic Scholar", self._fetch_and_ingest_from_semantic_scholar),
-                        ("PubMed", self._fetch_and_ingest_from_pubmed),
-                        ("Crossref", self._fetch_and_ingest_from_crossref)
-                    ]
-
-                    remaining = needed - arxiv_fetched
-                    per_source = max(1, remaining // len(other_sources))
-                    total_other = 0
-
-                    for source_name, fetch_func in other_sources:
-                        if remaining <= 0:
-                            break
-                        fetch_count = min(per_source, remaining)
-                        logger.info(f"Attempting to fetch {fetch_count} papers from {source_name}...")
-                        fetched = fetch_func(topic, n_results=fetch_count)
-                        total_other += fetched
-                        remaining -= fetched
-                        logger.info(f"Fetched {fetched} papers from {source_name}")
-
-                    total_fetched = arxiv_fetched + total_other
-                    logger.info(f"Total fetched: {total_fetched} papers ({arxiv_fetched} arXiv, {total_other} other sources)")
+                    with metrics.stage("external_fetch"):
+                        total_fetched = self._fetch_from_external_sources(topic, needed)
+                    metrics.count("external_fetched", total_fetched)
 
                     if total_fetched > 0:
                         logger.info(f"Fetched and ingested {total_fetched} papers from external sources. Re-searching...")
+                        analysis_retrieval = None
                         # Re-search after ingestion
                         if use_semantic:
-                            raw_semantic = self._semantic_retrieval(topic, n_results)
+                            with metrics.stage("re_search_semantic"):
+                                raw_semantic = self._semantic_retrieval(topic, n_results)
                             semantic_results = [r for r in raw_semantic if r.get("distance", 1.0) < (1.0 - relevance_threshold)]
                             logger.info(f"Retrieved {len(semantic_results)} relevant results from Chroma after external ingestion")
 
                         if use_keyword:
-                            keyword_results = self._keyword_retrieval(topic, n_results)
+                            with metrics.stage("re_search_keyword"):
+                                keyword_results = self._keyword_retrieval(topic, n_results)
                             logger.info(f"Retrieved {len(keyword_results)} results from Elastic after external ingestion")
 
                 # If still no results after external fetches
                 if not semantic_results and not keyword_results:
-                    return self._empty_response(topic, reason="no_relevant_results")
+                    yield {
+                        "type": "done",
+                        "result": self._finish_metrics(metrics, self._empty_response(topic, reason="no_relevant_results"))
+                    }
+                    return
+
+            # 2-3. Combine results (papers can be shown before the analysis is ready)
+            # and check for recent papers
+            with metrics.stage("format_results"):
+                papers, warning_msg = self._present_papers(semantic_results, keyword_results)
+
+            metrics.mark("first_content")
+            yield {
+                "type": "papers",
+                "papers": papers,
+                "retrieval_method": retrieval_method,
+                "recent_warning": warning_msg
+            }
 
-            # 2. Analyze with Claude
-            analysis = self.claude.analyze_research_gaps(
-                topic=topic,
-                paper_sections=semantic_results,
-                elastic_results=keyword_results
+            # 4. Analyze with Claude
+            analysis_sections, analysis_papers = analysis_retrieval or (semantic_results, keyword_results)
+            streamed_summary = None
+            with metrics.stage("claude_analysis"):
+                if map_reduce:
+                    analysis = self.claude.analyze_research_gaps_map_reduce(
+                        topic=topic,
+                        paper_sections=analysis_sections,
+                        elastic_results=analysis_papers
+                    )
+                elif stream_analysis:
+                    stream = self.claude.stream_analysis_events(
+                        topic=topic,
+                        paper_sections=semantic_results,
+                        elastic_results=keyword_results
+                    )
+                    while True:
+                        try:
+                            event = next(stream)
+                        except StopIteration as stop:
+                            analysis = stop.value
+                            break
+                        if event["type"] != "analysis_token":
+                            if "first_insight" not in metrics.stages:
+                                metrics.mark("first_insight")
+                            if event["type"] == "summary":
+                                streamed_summary = event["summary"]
+                        yield event
+                else:
+                    analysis = self.claude.analyze_research_gaps(
+                        topic=topic,
+                        paper_sections=semantic_results,
+                        elastic_results=keyword_results
+                    )
+            analysis_cache_outcome = self.claude.take_analysis_cache_outcome()
+            if analysis_cache_outcome:
+                metrics.flag("analysis_cache", analysis_cache_outcome)
+
+            # A mock answer (Claude unavailable after retries) is shown but never cached
+            fallback = self.claude.is_fallback_analysis(topic, analysis)
+
+            result = self._build_result(
+                analysis,
+                papers,
+                semantic_results,
+                keyword_results,
+                retrieval_method,
+                warning_msg=warning_msg,
+                refresh_pending=refresh_pending,
+                analysis_count=len(analysis_sections) + len(analysis_papers)
             )
 
-            # 3. Combine results
-            papers = self._format_papers(semantic_results, keyword_results)
-
-            # 4. Check recent papers in final results (require at least 5 from after 2016)
-            paper_years = [{"year": p.get("year", 0)} for p in papers]
-            recent_check = self._check_recent_papers_simple(paper_years, min_recent=5, min_year=2017)
+            query_cache_outcome = self.chroma.take_query_cache_outcome()
+            if query_cache_outcome:
+                metrics.flag("query_embedding", query_cache_outcome)
 
-            # Add warning if insufficient recent papers
-            if not recent_check["sufficient"]:
-                warning_msg = f"⚠️ Only {recent_check['recent_count']} of {len(papers)} papers are from after 2016. "
-                warning_msg += f"Consider searching for more recent research on this topic."
-                analysis["recent_warning"] = warning_msg
-                logger.warning(warning_msg)
-
-            result = {
-                **analysis,
-                "papers": papers,
-                "retrieval_stats": {
-                    "semantic_count": len(semantic_results),
-                    "keyword_count": len(keyword_results),
-                    "total_count": len(semantic_results) + len(keyword_results),
-                    "papers_used": len(papers)
-                },
-                "retrieval_method": retrieval_method
-            }
+            if fallback:
+                logger.warning(f"Not caching fallback analysis for query: {topic}")
+            elif local_only:
+                # The cache key does not include background_fetch, so a partial
+                # answer must not be served to a caller that would fetch
+                logger.info(f"Not caching local-only result for query: {topic}")
+            else:
+                self.result_cache.put(cache_key, result, generation=generation)
 
             logger.info(f"Successfully processed query: {topic} (method: {retrieval_method})")
-            return result
+            yield from self._analysis_events(result, streamed_summary=streamed_summary)
+            yield {"type": "done", "result": self._finish_metrics(metrics, result)}
 
         except Exception as e:
             logger.error(f"Error processing query: {e}")
-            return self._empty_response(topic, error=str(e))
+            yield {"type": "done", "result": self._finish_metrics(metrics, self._empty_response(topic, error=str(e)))}
+
+    def _present_papers(
+        self,
+        semantic_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Format retrieved papers for display and check how many are recent.
+
+        Returns:
+            Tuple of (papers, warning message if fewer than 5 are from after 2016)
+        """
+        papers = self._format_papers(semantic_results, keyword_results)
+
+        # Check recent papers in final results (require at least 5 from after 2016)
+        paper_years = [{"year": p.get("year", 0)} for p in papers]
+        recent_check = self._check_recent_papers_simple(paper_years, min_recent=5, min_year=2017)
+
+        # Add warning if insufficient recent papers
+        warning_msg = None
+        if not recent_check["sufficient"]:
+            warning_msg = f"⚠️ Only {recent_check['recent_count']} of {len(papers)} papers are from after 2016. "
+            warning_msg += f"Consider searching for more recent research on this topic."
+            logger.warning(warning_msg)
+        return papers, warning_msg
+
+    def _build_result(
+        self,
+        analysis: Dict[str, Any],
+        papers: List[Dict[str, Any]],
+        semantic_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]],
+        retrieval_method: str,
+        warning_msg: Optional[str] = None,
+        refresh_pending: bool = False,
+        analysis_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Assemble the query_research_gaps response from an analysis and the retrieved papers."""
+        if warning_msg:
+            analysis["recent_warning"] = warning_msg
+
+        total_count = len(semantic_results) + len(keyword_results)
+        return {
+            **analysis,
+            "papers": papers,
+            "retrieval_stats": {
+                "semantic_count": len(semantic_results),
+                "keyword_count": len(keyword_results),
+                "total_count": total_count,
+                "papers_used": len(papers),
+                "analysis_count": analysis_count if analysis_count is not None else total_count
+            },
+            "retrieval_method": retrieval_method,
+            "refresh_pending": refresh_pending,
+            "cache_hit": False
+        }
+
+    def precompute_reports(
+        self,
+        topics: List[str],
+        n_results: int = 20,
+        relevance_threshold: float = 0.7,
+        use_batch_api: bool = True,
+        force: bool = False
+    ) -> Dict[str, int]:
+        """
+        Materialize reports for topics into the report store (offline batch job).
+
+        Retrieval for all topics runs batched as in query_research_gaps_many.
+        A topic whose candidate set (and analysis version) has the same
+        fingerprint as its stored report is only marked as refreshed; the
+        others are analyzed together, through the Message Batches API when
+        use_batch_api is set. Reports are stored under the result cache key of
+        a default two-stage query_research_gaps call with these parameters,
+        which is what that call looks up. Reports record the corpus generation
+        they were checked at and are not served once papers have been
+        ingested since, until the next run refreshes them.
+
+        Args:
+            topics: Research topics to precompute
+            n_results: Final number of results per topic
+            relevance_threshold: Minimum similarity for Stage 2
+            use_batch_api: Analyze via ClaudeClient.analyze_research_gaps_batch
+                (otherwise one analyze_research_gaps call per topic)
+            force: Re-analyze even if the candidate set is unchanged
+
+        Returns:
+            Counts of "topics", "refreshed", "unchanged", "empty" (no candidates)
+            and "failed" (analysis fell back to the mock response; not stored)
+        """
+        topics = list(dict.fromkeys(topic for topic in topics if topic.strip()))
+        stats = {"topics": len(topics), "refreshed": 0, "unchanged": 0, "empty": 0, "failed": 0}
+        if not topics:
+            return stats
+
+        # Read before retrieval so papers ingested meanwhile invalidate these reports
+        generation = self.result_cache.generation.value
+
+        params = {
+            "n_results": n_results,
+            "use_semantic": True,
+            "use_keyword": True,
+            "relevance_threshold": relevance_threshold,
+            "use_two_stage": True,
+            "map_reduce": False
+        }
+        retrievals = self._two_stage_retrieval_many(
+            topics,
+            final_k=n_results,
+            relevance_threshold=relevance_threshold
+        )
+
+        changed = []
+        for topic, (semantic_results, keyword_results) in zip(topics, retrievals):
+            if not semantic_results and not keyword_results:
+                stats["empty"] += 1
+                continue
+
+            key = self.result_cache.make_key(topic, **params)
+            fingerprint = ReportStore.fingerprint(semantic_results, keyword_results, self.claude.analysis_version)
+            if not force and self.report_store.get_fingerprint(key) == fingerprint:
+                self.report_store.touch(key, generation)
+                stats["unchanged"] += 1
+                continue
+            changed.append((topic, key, fingerprint, semantic_results, keyword_results))
+
+        logger.info(f"Precomputing {len(changed)} of {len(topics)} reports ({stats['unchanged']} unchanged)")
+        if changed:
+            if use_batch_api:
+                analyses = self.claude.analyze_research_gaps_batch([
+                    {"topic": topic, "paper_sections": semantic_results, "elastic_results": keyword_results}
+                    for topic, _, _, semantic_results, keyword_results in changed
+                ])
+            else:
+                analyses = [
+                    self.claude.analyze_research_gaps(topic, semantic_results, keyword_results)
+                    for topic, _, _, semantic_results, keyword_results in changed
+                ]
+
+            for (topic, key, fingerprint, semantic_results, keyword_results), analysis in zip(changed, analyses):
+                if self.claude.is_fallback_analysis(topic, analysis):
+                    stats["failed"] += 1
+                    continue
+                papers, warning_msg = self._present_papers(semantic_results, keyword_results)
+                report = self._build_result(analysis, papers, semantic_results, keyword_results, "two_stage", warning_msg)
+                self.report_store.put(key, topic, fingerprint, report, generation)
+                stats["refreshed"] += 1
+
+        return stats
+
+    def _analysis_events(
+        self,
+        result: Dict[str, Any],
+        streamed_summary: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the parsed analysis fields of a result as individual events (skipping a summary already streamed)."""
+        for field in ("summary", "limitations", "future_directions", "keyword_trend"):
+            if field == "summary" and streamed_summary is not None and result.get("summary") == streamed_summary:
+                continue
+            if field in result:
+                yield {"type": field, field: result[field]}
+
+    def get_latency_report(self, format: str = "json") -> str:
+        """
+        Rolling p50/p95/p99 latency per stage across recent queries.
+
+        Args:
+            format: "json" or "prometheus"
+
+        Returns:
+            Report text in the requested format
+        """
+        if format == "prometheus":
+            return self.latency_recorder.to_prometheus()
+        return self.latency_recorder.to_json()
+
+    def _finish_metrics(self, metrics: RequestMetrics, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Close out request metrics, attach them to retrieval_stats and record them."""
+        metrics.finish()
+        response.setdefault("retrieval_stats", {}).update(metrics.as_dict())
+        response["request_id"] = current_request_id()
+        current_span().set_attributes(**{f"cache.{name}": value for name, value in metrics.flags.items()})
+        self.latency_recorder.record(metrics)
+        return response
 
     def _two_stage_retrieval(
         self,
         query: str,
         final_k: int = 10,
         stage1_candidates: int = 200,
-        relevance_threshold: float = 0.7
+        relevance_threshold: float = 0.7,
+        keyword_k: int = STAGE1_CONTEXT_PAPERS,
+        metrics: Optional[RequestMetrics] = None
     ) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Perform two-stage hybrid retrieval for large corpus.
@@ -249,39 +881,124 @@ class QueryHandler:
             final_k: Final number of results to return
             stage1_candidates: Number of candidates to retrieve in Stage 1
             relevance_threshold: Minimum similarity for Stage 2
+            keyword_k: Number of Stage 1 papers to return as keyword results
+            metrics: Optional request metrics to record stage timings and counts into
 
         Returns:
             Tuple of (semantic_results, keyword_results) for compatibility
         """
-        logger.info(f"Stage 1: Retrieving {stage1_candidates} candidates from Elasticsearch...")
-
-        # Stage 1: Get broad candidate set from Elasticsearch
-        stage1_results = self._keyword_retrieval(query, n_results=stage1_candidates)
-
-        if not stage1_results:
-            logger.warning("No candidates from Stage 1")
-            return ([], [])
-
-        logger.info(f"Stage 1: Retrieved {len(stage1_results)} candidates")
-
-        # Extract paper IDs from Stage 1
-        candidate_ids = set()
-        for result in stage1_results:
-            paper_id = result.get("metadata", {}).get("paper_id")
-            if not paper_id:
-                # Try to get from result directly
-                paper_id = result.get("paper_id")
-            if paper_id:
-                candidate_ids.add(paper_id)
+        return self._two_stage_retrieval_many(
+            [query],
+            final_k=final_k,
+            stage1_candidates=stage1_candidates,
+            relevance_threshold=relevance_threshold,
+            keyword_k=keyword_k,
+            metrics_list=[metrics if metrics is not None else RequestMetrics()]
+        )[0]
+
+    def _two_stage_retrieval_many(
+        self,
+        queries: List[str],
+        final_k: int = 10,
+        stage1_candidates: int = 200,
+        relevance_threshold: float = 0.7,
+        keyword_k: int = STAGE1_CONTEXT_PAPERS,
+        metrics_list: Optional[List[RequestMetrics]] = None
+    ) -> List[tuple]:
+        """
+        Two-stage hybrid retrieval for several queries with shared round trips.
 
-        logger.info(f"Stage 2: Re-ranking {len(candidate_ids)} papers with ChromaDB...")
-        logger.debug(f"Candidate IDs from Stage 1: {list(candidate_ids)[:5]}...")  # Show first 5
+        Stage 1 for every query runs as one Elasticsearch _msearch, and Stage 2
+        scores each query's candidates within one batched Chroma call (a single
+        query keeps the filtered per-query search). Per-query results match
+        _two_stage_retrieval.
 
-        # Stage 2: Semantic search, but filtered to Stage 1 candidates
-        # Get more results from Chroma, then filter to candidates
-        chroma_results = self._semantic_retrieval(query, n_results=stage1_candidates)
+        Args:
+            queries: Search queries
+            final_k: Final number of results to return per query
+            stage1_candidates: Number of candidates to retrieve in Stage 1
+            relevance_threshold: Minimum similarity for Stage 2
+            keyword_k: Number of Stage 1 papers to return per query as keyword results
+            metrics_list: Optional request metrics per query
 
-        # Filter to only include Stage 1 candidates
+        Returns:
+            One (semantic_results, keyword_results) tuple per query
+        """
+        if metrics_list is None:
+            metrics_list = [RequestMetrics() for _ in queries]
+
+        logger.info(f"Stage 1: Retrieving {stage1_candidates} candidates from Elasticsearch for {len(queries)} queries...")
+
+        # Stage 1: Get broad candidate sets from Elasticsearch
+        with shared_stage("stage1_elastic", metrics_list):
+            stage1_results_list = self._keyword_retrieval_many(queries, n_results=stage1_candidates)
+
+        candidate_ids_list = []
+        for stage1_results, metrics in zip(stage1_results_list, metrics_list):
+            metrics.count("stage1_candidates", len(stage1_results))
+
+            # Extract paper IDs from Stage 1
+            candidate_ids = set()
+            for result in stage1_results:
+                paper_id = result.get("metadata", {}).get("paper_id")
+                if not paper_id:
+                    # Try to get from result directly
+                    paper_id = result.get("paper_id")
+                if paper_id:
+                    candidate_ids.add(paper_id)
+            candidate_ids_list.append(candidate_ids)
+
+        active = [i for i, stage1_results in enumerate(stage1_results_list) if stage1_results]
+        if len(active) < len(queries):
+            logger.warning(f"No candidates from Stage 1 for {len(queries) - len(active)} queries")
+
+        # Stage 2: Semantic search scoped to the Stage 1 candidates only, so the
+        # cost grows with the candidate count rather than with corpus size
+        chroma_results_list: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        if active:
+            logger.info(f"Stage 2: Re-ranking candidates of {len(active)} queries with ChromaDB...")
+            with shared_stage("stage2_chroma", [metrics_list[i] for i in active]):
+                if len(active) == 1:
+                    chroma_results_list[active[0]] = self._semantic_retrieval_within(
+                        queries[active[0]],
+                        paper_ids=list(candidate_ids_list[active[0]]),
+                        n_results=stage1_candidates
+                    )
+                else:
+                    batch_results = self._semantic_retrieval_within_many(
+                        [queries[i] for i in active],
+                        [list(candidate_ids_list[i]) for i in active],
+                        n_results=stage1_candidates
+                    )
+                    for i, chroma_results in zip(active, batch_results):
+                        chroma_results_list[i] = chroma_results
+
+        retrievals = []
+        for i, metrics in enumerate(metrics_list):
+            if i not in active:
+                retrievals.append(([], []))
+                continue
+            metrics.count("stage2_candidate_papers", len(candidate_ids_list[i]))
+            retrievals.append(self._rerank_candidates(
+                stage1_results_list[i],
+                candidate_ids_list[i],
+                chroma_results_list[i],
+                final_k,
+                metrics,
+                keyword_k=keyword_k
+            ))
+        return retrievals
+
+    def _rerank_candidates(
+        self,
+        stage1_results: List[Dict[str, Any]],
+        candidate_ids: set,
+        chroma_results: List[Dict[str, Any]],
+        final_k: int,
+        metrics: RequestMetrics,
+        keyword_k: int = STAGE1_CONTEXT_PAPERS
+    ) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Filter and sort Stage 2 results for one query into (semantic_results, keyword_results)."""
         # Note: For two-stage retrieval, we relax the threshold since Stage 1 already filtered
         filtered_results = []
         matched_ids = 0
@@ -305,13 +1022,201 @@ class QueryHandler:
 
         # Take top K
         final_results = filtered_results[:final_k]
+        metrics.count("stage2_matched", matched_ids)
+        metrics.count("stage2_passed", len(filtered_results))
+        metrics.count("stage2_returned", len(final_results))
 
         logger.info(f"Stage 2: Returning top {len(final_results)} semantically relevant papers")
 
         # Return in format expected by main function
         # semantic_results = Stage 2 output, keyword_results = Stage 1 output (for context)
-        return (final_results, stage1_results[:50])  # Return subset of Stage 1 for context
+        return (final_results, stage1_results[:keyword_k])  # Return subset of Stage 1 for context
+
+    def get_refresh_status(self, topic: str) -> Dict[str, Any]:
+        """
+        Status of the background fetch-and-ingest job for a topic.
+
+        Args:
+            topic: Research topic passed to query_research_gaps
+
+        Returns:
+            Dictionary with status ("none", "pending", "done" or "failed") and
+            the number of papers fetched so far
+        """
+        with self._background_lock:
+            job = self._background_jobs.get(self._topic_key(topic))
+            if job is None:
+                return {"status": "none", "fetched": 0}
+            return {"status": job["status"], "fetched": job["fetched"]}
+
+    def _schedule_background_fetch(self, topic: str, needed: int) -> bool:
+        """
+        Queue an external fetch-and-ingest job for a topic.
+
+        At most one job per topic runs at a time, and a finished job is not
+        repeated within BACKGROUND_REFETCH_COOLDOWN seconds.
+
+        Returns:
+            True if a job for the topic is pending after this call
+        """
+        key = self._topic_key(topic)
+        with self._background_lock:
+            job = self._background_jobs.get(key)
+            if job is not None:
+                if job["status"] == "pending":
+                    return True
+                if time.monotonic() - job["finished_at"] < BACKGROUND_REFETCH_COOLDOWN:
+                    return False
+
+            job = {"status": "pending", "fetched": 0, "finished_at": None}
+            self._background_jobs[key] = job
+
+        # Runs as its own trace (it outlives the request), linked back to it
+        parent_request_id = current_request_id()
+
+        def run():
+            fetched = 0
+            status = "failed"
+            try:
+                with start_trace("background_fetch", topic=topic, needed=needed, parent_request_id=parent_request_id):
+                    fetched = self._fetch_from_external_sources(topic, needed)
+                status = "done"
+            except Exception as e:
+                logger.error(f"Background fetch failed for '{topic}': {e}")
+            finally:
+                # Published together so a finished job always has finished_at
+                with self._background_lock:
+                    job.update(status=status, fetched=fetched, finished_at=time.monotonic())
+            logger.info(f"Background fetch for '{topic}' finished: {job['fetched']} papers ingested")
+
+        self._background_executor.submit(run)
+        logger.info(f"Scheduled background fetch of {needed} papers for '{topic}'")
+        return True
+
+    def _topic_key(self, topic: str) -> str:
+        """Normalize a topic for use as a lookup key."""
+        return " ".join(topic.lower().split())
+
+    def _fetch_from_external_sources(self, topic: str, needed: int) -> int:
+        """
+        Fetch and ingest papers from all external sources concurrently.
+
+        Balanced fetching strategy for diversity:
+        - 50% from arXiv (strong coverage)
+        - 50% distributed among other sources
+        - Guarantee at least 2-3 non-arXiv papers
+
+        All sources run in parallel under one overall deadline. When a source
+        comes back short, its shortfall is handed to a source that filled its
+        quota (as a top-up request for the results after the ones it already
+        returned) while time remains. Sources still running
+        at the deadline are abandoned; their ingestion finishes in the
+        background and benefits later queries.
+
+        Args:
+            topic: Search query
+            needed: Number of papers wanted in total
+
+        Returns:
+            Number of papers ingested before the deadline
+        """
+        arxiv_quota = max(needed // 2, needed - 3)  # At least leave room for 3 non-arXiv
+        other_quota = needed - arxiv_quota
+
+        sources = {
+            "arXiv": self._fetch_and_ingest_from_arxiv,
+            "Semantic Scholar": self._fetch_and_ingest_from_semantic_scholar,
+            "PubMed": self._fetch_and_ingest_from_pubmed,
+            "Crossref": self._fetch_and_ingest_from_crossref
+        }
+        other_names = ["Semantic Scholar", "PubMed", "Crossref"]
+
+        quotas = {"arXiv": arxiv_quota}
+        per_source = max(1, other_quota // len(other_names))
+        remaining = other_quota
+        for name in other_names:
+            quotas[name] = min(per_source, remaining) if remaining > 0 else 0
+            remaining -= quotas[name]
+
+        logger.info(f"Fetching {needed} papers in parallel: {quotas} (deadline {self.external_fetch_deadline:.0f}s)")
+
+        deadline = time.monotonic() + self.external_fetch_deadline
+        requested = {name: 0 for name in sources}
+        ingested = {name: 0 for name in sources}
+        exhausted = set()
+        total_fetched = 0
+
+        executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="external-fetch")
+        pending = {}
 
+        def submit(name: str, count: int):
+            requested[name] = count
+            pending[executor.submit(propagate(sources[name]), topic, n_results=count)] = name
+
+        try:
+            for name, quota in quotas.items():
+                if quota > 0:
+                    submit(name, quota)
+
+            while pending and total_fetched < needed:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        fetched = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching from {name}: {e}")
+                        fetched = 0
+
+                    ingested[name] += fetched
+                    total_fetched += fetched
+                    logger.info(f"Fetched {fetched} papers from {name}")
+
+                    if fetched < requested[name]:
+                        exhausted.add(name)
+
+                # Redistribute any shortfall to a source that is idle and not exhausted
+                shortfall = needed - total_fetched - sum(requested[n] for n in pending.values())
+                if shortfall > 0:
+                    running = set(pending.values())
+                    for name in sources:
+                        if name not in exhausted and name not in running:
+                            logger.info(f"Requesting {shortfall} more papers from {name}")
+                            submit(name, shortfall)
+                            break
+
+            if pending:
+                reason = "enough papers fetched" if total_fetched >= needed else "deadline reached"
+                logger.warning(f"Stopping external fetch ({reason}); abandoning {sorted(set(pending.values()))}")
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"Total fetched: {total_fetched} papers ({ingested})")
+        return total_fetched
+
+    def _ledger_offset(self, query: str, source: str) -> Optional[int]:
+        """
+        Consult the fetch ledger before calling an external source.
+
+        Returns:
+            Offset to fetch from (past the results already ingested), or None
+            if the source returned nothing for this query recently
+        """
+        if self.fetch_ledger.should_skip(query, source):
+            logger.info(f"Skipping {source} for '{query}': no results on a recent fetch")
+            current_span().set_attribute("skipped", True)
+            return None
+
+        offset = self.fetch_ledger.next_offset(query, source)
+        current_span().set_attribute("offset", offset)
+        return offset
+
+    @traced("fetch.arxiv", kind=SPAN_KIND_INTERNAL, capture=("n_results",))
     def _fetch_and_ingest_from_arxiv(
         self,
         query: str,
@@ -327,14 +1232,28 @@ class QueryHandler:
         Returns:
             Number of papers successfully ingested
         """
+        offset = self._ledger_offset(query, "arXiv")
+        if offset is None:
+            return 0
+
         try:
-            logger.info(f"Fetching papers from arXiv for query: '{query}'")
+            logger.info(f"Fetching papers from arXiv for query: '{query}' (offset {offset})")
 
             # Fetch papers from arXiv
-            arxiv_papers = self.arxiv.search_papers(query, max_results=n_results)
+            arxiv_papers = self.arxiv.search_papers(
+                query,
+                max_results=n_results,
+                offset=offset,
+                raise_errors=True
+            )
+            # The ledger counts what the source returned, before client-side filtering
+            returned = self.arxiv.take_raw_result_count()
+            if returned is None:
+                returned = len(arxiv_papers)
 
             if not arxiv_papers:
                 logger.warning("No papers found on arXiv")
+                self.fetch_ledger.record(query, "arXiv", offset, returned)
                 return 0
 
             logger.info(f"Found {len(arxiv_papers)} papers on arXiv, ingesting...")
@@ -343,12 +1262,15 @@ class QueryHandler:
             results = self.ingestor.ingest_arxiv_papers(arxiv_papers)
 
             logger.info(f"Ingested {results['success']} papers from arXiv ({results['failed']} failed)")
+            if results['success'] or not results['failed']:
+                self.fetch_ledger.record(query, "arXiv", offset, returned)
             return results['success']
 
         except Exception as e:
             logger.error(f"Error fetching from arXiv: {e}")
             return 0
 
+    @traced("fetch.semantic_scholar", kind=SPAN_KIND_INTERNAL, capture=("n_results",))
     def _fetch_and_ingest_from_semantic_scholar(
         self,
         query: str,
@@ -364,14 +1286,28 @@ class QueryHandler:
         Returns:
             Number of papers successfully ingested
         """
+        offset = self._ledger_offset(query, "Semantic Scholar")
+        if offset is None:
+            return 0
+
         try:
-            logger.info(f"Fetching papers from Semantic Scholar for query: '{query}'")
+            logger.info(f"Fetching papers from Semantic Scholar for query: '{query}' (offset {offset})")
 
             # Fetch papers from Semantic Scholar
-            ss_papers = self.semantic_scholar.search_papers(query, max_results=n_results)
+            ss_papers = self.semantic_scholar.search_papers(
+                query,
+                max_results=n_results,
+                offset=offset,
+                raise_errors=True
+            )
+            # The ledger counts what the source returned, before client-side filtering
+            returned = self.semantic_scholar.take_raw_result_count()
+            if returned is None:
+                returned = len(ss_papers)
 
             if not ss_papers:
                 logger.warning("No papers found on Semantic Scholar")
+                self.fetch_ledger.record(query, "Semantic Scholar", offset, returned)
                 return 0
 
             logger.info(f"Found {len(ss_papers)} papers on Semantic Scholar, ingesting...")
@@ -380,12 +1316,15 @@ class QueryHandler:
             results = self.ingestor.ingest_arxiv_papers(ss_papers)
 
             logger.info(f"Ingested {results['success']} papers from Semantic Scholar ({results['failed']} failed)")
+            if results['success'] or not results['failed']:
+                self.fetch_ledger.record(query, "Semantic Scholar", offset, returned)
             return results['success']
 
         except Exception as e:
             logger.error(f"Error fetching from Semantic Scholar: {e}")
             return 0
 
+    @traced("fetch.pubmed", kind=SPAN_KIND_INTERNAL, capture=("n_results",))
     def _fetch_and_ingest_from_pubmed(
         self,
         query: str,
@@ -401,18 +1340,29 @@ class QueryHandler:
         Returns:
             Number of papers successfully ingested
         """
+        offset = self._ledger_offset(query, "PubMed")
+        if offset is None:
+            return 0
+
         try:
-            logger.info(f"Fetching papers from PubMed for query: '{query}'")
+            logger.info(f"Fetching papers from PubMed for query: '{query}' (offset {offset})")
 
             # Fetch papers from PubMed, prioritizing recent years
             pubmed_papers = self.pubmed.search_papers(
                 query,
                 max_results=n_results,
-                min_year=self.min_year
+                min_year=self.min_year,
+                offset=offset,
+                raise_errors=True
             )
+            # The ledger counts what the source returned, before client-side filtering
+            returned = self.pubmed.take_raw_result_count()
+            if returned is None:
+                returned = len(pubmed_papers)
 
             if not pubmed_papers:
                 logger.warning("No papers found on PubMed")
+                self.fetch_ledger.record(query, "PubMed", offset, returned)
                 return 0
 
             logger.info(f"Found {len(pubmed_papers)} papers on PubMed, ingesting...")
@@ -421,12 +1371,15 @@ class QueryHandler:
             results = self.ingestor.ingest_arxiv_papers(pubmed_papers)
 
             logger.info(f"Ingested {results['success']} papers from PubMed ({results['failed']} failed)")
+            if results['success'] or not results['failed']:
+                self.fetch_ledger.record(query, "PubMed", offset, returned)
             return results['success']
 
         except Exception as e:
             logger.error(f"Error fetching from PubMed: {e}")
             return 0
 
+    @traced("fetch.crossref", kind=SPAN_KIND_INTERNAL, capture=("n_results",))
     def _fetch_and_ingest_from_crossref(
         self,
         query: str,
@@ -442,18 +1395,29 @@ class QueryHandler:
         Returns:
             Number of papers successfully ingested
         """
+        offset = self._ledger_offset(query, "Crossref")
+        if offset is None:
+            return 0
+
         try:
-            logger.info(f"Fetching papers from Crossref for query: '{query}'")
+            logger.info(f"Fetching papers from Crossref for query: '{query}' (offset {offset})")
 
             # Fetch papers from Crossref, prioritizing recent years
             crossref_papers = self.crossref.search_papers(
                 query,
                 max_results=n_results,
-                min_year=self.min_year
+                min_year=self.min_year,
+                offset=offset,
+                raise_errors=True
             )
+            # The ledger counts what the source returned, before client-side filtering
+            returned = self.crossref.take_raw_result_count()
+            if returned is None:
+                returned = len(crossref_papers)
 
             if not crossref_papers:
                 logger.warning("No papers found on Crossref")
+                self.fetch_ledger.record(query, "Crossref", offset, returned)
                 return 0
 
             logger.info(f"Found {len(crossref_papers)} papers on Crossref, ingesting...")
@@ -462,6 +1426,8 @@ class QueryHandler:
             results = self.ingestor.ingest_arxiv_papers(crossref_papers)
 
             logger.info(f"Ingested {results['success']} papers from Crossref ({results['failed']} failed)")
+            if results['success'] or not results['failed']:
+                self.fetch_ledger.record(query, "Crossref", offset, returned)
             return results['success']
 
         except Exception as e:
@@ -484,56 +1450,111 @@ class QueryHandler:
             logger.error(f"Error in semantic retrieval: {e}")
             return []
 
-    def _keyword_retrieval(
+    def _semantic_retrieval_within(
         self,
         query: str,
+        paper_ids: List[str],
         n_results: int
     ) -> List[Dict[str, Any]]:
-        """Retrieve papers using Elastic keyword search."""
+        """Retrieve relevant sections using Chroma vector search restricted to candidate papers."""
         try:
-            # Search in papers index
-            papers = self.elastic.search_papers(
+            results = self.chroma.semantic_search_within(
                 query=query,
-                size=n_results
+                paper_ids=paper_ids,
+                n_results=n_results
             )
+            return results
+        except Exception as e:
+            logger.error(f"Error in candidate-scoped semantic retrieval: {e}")
+            return []
 
-            # Also search future work sections
-            future_work = self.elastic.query_future_work(
-                query=query,
-                size=n_results
+    def _semantic_retrieval_within_many(
+        self,
+        queries: List[str],
+        paper_ids_list: List[List[str]],
+        n_results: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Candidate-scoped Chroma vector search for several queries in one batch."""
+        try:
+            return self.chroma.semantic_search_within_many(
+                queries=queries,
+                paper_ids_list=paper_ids_list,
+                n_results=n_results
             )
+        except Exception as e:
+            logger.error(f"Error in batched candidate-scoped semantic retrieval: {e}")
+            return [[] for _ in queries]
 
-            # Combine results
-            all_results = []
-
-            # Add papers
-            for paper in papers:
-                all_results.append({
-                    "type": "paper",
-                    "title": paper.get("title", ""),
-                    "abstract": paper.get("abstract", ""),
-                    "content": paper.get("abstract", ""),
-                    "metadata": paper,
-                    "score": paper.get("_score", 0)
-                })
-
-            # Add future work sections
-            for fw in future_work:
-                all_results.append({
-                    "type": "future_work",
-                    "title": fw.get("paper_title", ""),
-                    "content": fw.get("content", ""),
-                    "limitations": fw.get("limitations", ""),
-                    "future_directions": fw.get("future_directions", ""),
-                    "metadata": fw,
-                    "score": fw.get("_score", 0)
-                })
+    def _keyword_retrieval(
+        self,
+        query: str,
+        n_results: int
+    ) -> List[Dict[str, Any]]:
+        """Retrieve papers and future work sections using one Elastic multi-search."""
+        return self._keyword_retrieval_many([query], n_results)[0]
 
-            return all_results
+    def _keyword_retrieval_many(
+        self,
+        queries: List[str],
+        n_results: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Keyword retrieval for several queries in a single Elastic multi-search."""
+        try:
+            # Search papers and future work sections for every query in a single round trip
+            searches = []
+            for query in queries:
+                searches.append(self.elastic.build_papers_search(
+                    query,
+                    size=n_results,
+                    source_includes=KEYWORD_SOURCE_FIELDS,
+                    highlight=True
+                ))
+                searches.append(self.elastic.build_future_work_search(query, size=n_results))
+
+            responses = self.elastic.multi_search(searches)
+            return [
+                self._combine_keyword_hits(responses[2 * i]["hits"], responses[2 * i + 1]["hits"])
+                for i in range(len(queries))
+            ]
 
         except Exception as e:
             logger.error(f"Error in keyword retrieval: {e}")
-            return []
+            return [[] for _ in queries]
+
+    def _combine_keyword_hits(
+        self,
+        papers: List[Dict[str, Any]],
+        future_work: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Merge paper and future work hits into keyword result dictionaries."""
+        # Combine results
+        all_results = []
+
+        # Add papers
+        for paper in papers:
+            all_results.append({
+                "type": "paper",
+                "title": paper.get("title", ""),
+                "abstract": paper.get("abstract", ""),
+                "content": paper.get("abstract", ""),
+                "preview": paper.pop("_highlight", None),
+                "metadata": paper,
+                "score": paper.get("_score", 0)
+            })
+
+        # Add future work sections
+        for fw in future_work:
+            all_results.append({
+                "type": "future_work",
+                "title": fw.get("paper_title", ""),
+                "content": fw.get("content", ""),
+                "limitations": fw.get("limitations", ""),
+                "future_directions": fw.get("future_directions", ""),
+                "metadata": fw,
+                "score": fw.get("_score", 0)
+            })
+
+        return all_results
 
     def _check_recent_papers_simple(
         self,
@@ -623,6 +1644,7 @@ class QueryHandler:
 
             if title not in seen_titles and title != "Unknown":
                 papers.append({
+                    "paper_id": metadata.get("paper_id"),
                     "title": title,
                     "authors": metadata.get("authors", "Unknown Authors"),
                     "year": metadata.get("year", "N/A"),
@@ -648,13 +1670,14 @@ class QueryHandler:
                 if title not in seen_titles and title != "Unknown":
                     metadata = result.get("metadata", {})
                     papers.append({
+                        "paper_id": result.get("paper_id") or metadata.get("paper_id"),
                         "title": title,
                         "authors": metadata.get("authors", "Unknown Authors"),
                         "year": metadata.get("year", "N/A"),
                         "venue": metadata.get("venue", ""),
                         "field": metadata.get("field", ""),
                         "relevance_score": normalize_elastic_score(result.get("score", 0)),
-                        "content_preview": result.get("content", "")[:300] + "...",
+                        "content_preview": result.get("preview") or result.get("content", "")[:300] + "...",
                         "source": get_paper_source(metadata),
                         "retrieval_method": "keyword"
                     })
@@ -673,7 +1696,9 @@ class QueryHandler:
         reason: str = "no_results"
     ) -> Dict[str, Any]:
         """Return empty response when no results found."""
-        if reason == "no_relevant_results":
+        if reason == "refresh_pending":
+            message = f"No local papers found for '{topic}' yet. Fetching papers from external sources in the background..."
+        elif reason == "no_relevant_results":
             message = f"No relevant research papers found for '{topic}'. The database may not contain papers on this specific topic."
         elif error:
             message = f"Error searching for '{topic}': {error}"
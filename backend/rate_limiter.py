@@ -0,0 +1,252 @@
+"""
+Rate limiting for ScholarForge's Claude calls.
+Token buckets for requests/min and tokens/min, bounded in-flight concurrency
+and jittered exponential backoff, usable from threads and event loops alike.
+"""
+
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+import random
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Account limits for the Claude API (set these to your organization's tier)
+CLAUDE_REQUESTS_PER_MINUTE = 50
+CLAUDE_TOKENS_PER_MINUTE = 40000
+
+# Maximum Claude requests in flight at once, across all sessions in the process
+CLAUDE_MAX_CONCURRENCY = 8
+
+# Retries after a 429/529/5xx or connection error, and the backoff schedule (seconds)
+CLAUDE_MAX_RETRIES = 5
+CLAUDE_BACKOFF_BASE = 1.0
+CLAUDE_BACKOFF_MAX = 60.0
+
+# Poll interval (seconds) while waiting for a free in-flight slot
+_SLOT_POLL_INTERVAL = 0.02
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute / 60` per second.
+
+    reserve() always succeeds and returns how long the caller must wait before
+    using what it took; the balance may go negative so that waiters queue up
+    in arrival order instead of racing.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            per_minute: Refill rate
+            capacity: Maximum balance (defaults to one minute's worth)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` from the bucket.
+
+        Returns:
+            Seconds to wait before the reservation is covered
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def refund(self, amount: float):
+        """Return unused tokens (e.g. when a request used fewer tokens than reserved)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def drain(self, seconds: float):
+        """Empty the bucket for `seconds` (the server said we are over the limit)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Shared admission control for Claude requests.
+
+    A request must (1) get one of `max_concurrency` in-flight slots, (2) take
+    one unit from the requests/min bucket and (3) take its estimated tokens
+    from the tokens/min bucket. Both blocking (threads) and async (event loop)
+    entry points use the same state, so Streamlit sessions and batch jobs in
+    one process share the account's limits.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = CLAUDE_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = CLAUDE_TOKENS_PER_MINUTE,
+        max_concurrency: int = CLAUDE_MAX_CONCURRENCY,
+        max_retries: int = CLAUDE_MAX_RETRIES,
+        backoff_base: float = CLAUDE_BACKOFF_BASE,
+        backoff_max: float = CLAUDE_BACKOFF_MAX
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Request rate limit
+            tokens_per_minute: Token rate limit (input + output)
+            max_concurrency: Maximum requests in flight
+            max_retries: Retries per request on retryable errors
+            backoff_base: First backoff delay in seconds
+            backoff_max: Upper bound on a single backoff delay
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._in_flight = 0
+        self._slot_available = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled_seconds": 0.0}
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """
+        Block until a request may be sent.
+
+        Args:
+            estimated_tokens: Tokens reserved from the tokens/min bucket
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        with self._slot_available:
+            while self._in_flight >= self.max_concurrency:
+                self._slot_available.wait()
+            self._in_flight += 1
+
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            time.sleep(delay)
+        return self._waited(start)
+
+    async def acquire_async(self, estimated_tokens: int) -> float:
+        """Async variant of acquire(); waits without blocking the event loop."""
+        start = time.monotonic()
+        while not self._try_take_slot():
+            await asyncio.sleep(_SLOT_POLL_INTERVAL)
+
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._waited(start)
+
+    def release(self, estimated_tokens: int, used_tokens: Optional[int] = None):
+        """
+        Free the in-flight slot and settle the token reservation.
+
+        Args:
+            estimated_tokens: What acquire() reserved
+            used_tokens: Actual usage reported by the API, if known
+        """
+        if used_tokens is not None and used_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - used_tokens)
+
+        with self._slot_available:
+            self._in_flight -= 1
+            self._slot_available.notify()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before retry number `attempt` (1-based).
+
+        Honors the server's retry-after when given (and pauses the request
+        bucket for that long so other callers back off too); otherwise uses
+        full-jitter exponential backoff.
+        """
+        with self._stats_lock:
+            self.stats["retries"] += 1
+        if retry_after is not None and retry_after > 0:
+            self.requests.drain(retry_after)
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def note_rate_limited(self):
+        """Count a 429 response."""
+        with self._stats_lock:
+            self.stats["rate_limited"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters plus the current number of requests in flight."""
+        with self._stats_lock:
+            return {**self.stats, "in_flight": self._in_flight}
+
+    def _try_take_slot(self) -> bool:
+        """Take an in-flight slot if one is free."""
+        with self._slot_available:
+            if self._in_flight >= self.max_concurrency:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _waited(self, start: float) -> float:
+        """Record a completed admission and return the time it took."""
+        waited = time.monotonic() - start
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["throttled_seconds"] += waited
+        return waited
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """
+    Read a retry delay from response headers.
+
+    Understands `retry-after-ms` and `retry-after` in seconds; HTTP-date
+    values are ignored.
+    """
+    if not headers:
+        return None
+    try:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            return float(value) / 1000.0
+        value = headers.get("retry-after")
+        if value is not None:
+            return float(value)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+# Singleton instance
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the shared Claude rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -0,0 +1,329 @@
+"""
+Report store for ScholarForge.
+Persists precomputed gap reports for popular topics and the query log used to pick them.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# On-disk report store and query log (None = memory only)
+REPORT_STORE_PATH = "./reports.sqlite3"
+
+# Seconds after which a report that the batch job has not refreshed is no longer served
+REPORT_MAX_AGE = 3 * 24 * 3600
+
+# Queries counted in memory before the query log is written to disk
+QUERY_LOG_FLUSH_EVERY = 100
+
+# Seconds after which counted queries are written even if fewer have arrived
+QUERY_LOG_FLUSH_INTERVAL = 30.0
+
+
+class ReportStore:
+    """
+    Precomputed query results, keyed like the result cache.
+
+    A report is a complete query_research_gaps response materialized by the
+    offline batch job (precompute_reports.py). Each report carries a
+    fingerprint of the candidate set and analysis version it was computed
+    from, so the job can skip topics whose candidates have not changed, and
+    the corpus generation it was checked at; like a result cache entry, it is
+    not served once papers have been ingested since. The
+    store also counts incoming queries per topic; the most frequent topics
+    are what the job precomputes. Query counts are kept in memory and
+    written to disk in batches from a background thread, so counting adds no
+    disk write to the request path.
+    """
+
+    def __init__(self, path: Optional[str] = REPORT_STORE_PATH, max_age: float = REPORT_MAX_AGE):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file for reports and the query log, or None for memory only
+            max_age: Seconds a report stays servable after it was last refreshed
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._queries: Dict[str, Dict[str, Any]] = {}
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+
+        # Query counts not yet written to disk
+        self._pending_lock = threading.Lock()
+        self._pending_queries: Dict[str, Dict[str, Any]] = {}
+        self._pending_count = 0
+        self._last_flush = time.time()
+        self._flush_scheduled = False
+        self._flush_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-log")
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS reports ("
+                    "key TEXT PRIMARY KEY, topic TEXT, fingerprint TEXT, refreshed_at REAL, report TEXT, generation INTEGER)"
+                )
+                columns = {row[1] for row in self._db.execute("PRAGMA table_info(reports)")}
+                if "generation" not in columns:
+                    self._db.execute("ALTER TABLE reports ADD COLUMN generation INTEGER")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS queries ("
+                    "topic_key TEXT PRIMARY KEY, topic TEXT, count INTEGER, last_seen REAL)"
+                )
+                self._db.commit()
+                atexit.register(self.flush_queries)
+                logger.info(f"Opened report store at: {path}")
+            except Exception as e:
+                logger.warning(f"Could not open report store at {path}, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def fingerprint(
+        semantic_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]],
+        analysis_version: str
+    ) -> str:
+        """
+        Hash the candidate set a report was computed from.
+
+        Args:
+            semantic_results: Retrieved sections (identified by paper_id and section)
+            keyword_results: Retrieved papers (identified by paper_id)
+            analysis_version: Model and prompt version of the analysis
+        """
+        sections = sorted(
+            [(r.get("metadata") or {}).get("paper_id", ""), (r.get("metadata") or {}).get("section_name", "")]
+            for r in semantic_results
+        )
+        papers = sorted(
+            r.get("paper_id") or (r.get("metadata") or {}).get("paper_id") or r.get("title", "")
+            for r in keyword_results
+        )
+        payload = json.dumps({"version": analysis_version, "sections": sections, "papers": papers}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, generation: int) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the report for a result cache key, or None if it is
+        missing, too old, or was checked at a different corpus generation.
+        """
+        with self._lock:
+            entry = self._get_entry(key)
+            if (
+                entry is not None
+                and entry["generation"] == generation
+                and time.time() - entry["refreshed_at"] < self.max_age
+            ):
+                self.hits += 1
+                return copy.deepcopy(entry["report"])
+            self.misses += 1
+            return None
+
+    def get_fingerprint(self, key: str) -> Optional[str]:
+        """Fingerprint of the stored report for a key, or None if there is none."""
+        with self._lock:
+            entry = self._get_entry(key)
+            return entry["fingerprint"] if entry is not None else None
+
+    def put(self, key: str, topic: str, fingerprint: str, report: Dict[str, Any], generation: int):
+        """Store or replace a report computed at a corpus generation."""
+        now = time.time()
+
+        with self._lock:
+            if self._db is None:
+                self._reports[key] = {
+                    "topic": topic,
+                    "fingerprint": fingerprint,
+                    "refreshed_at": now,
+                    "report": copy.deepcopy(report),
+                    "generation": generation
+                }
+                return
+
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reports (key, topic, fingerprint, refreshed_at, report, generation) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, topic, fingerprint, now, json.dumps(report, default=str), generation)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error writing report store: {e}")
+
+    def touch(self, key: str, generation: int):
+        """Mark a report as refreshed (its candidate set was checked at generation and is unchanged)."""
+        now = time.time()
+
+        with self._lock:
+            if self._db is None:
+                if key in self._reports:
+                    self._reports[key].update(refreshed_at=now, generation=generation)
+                return
+
+            try:
+                self._db.execute(
+                    "UPDATE reports SET refreshed_at = ?, generation = ? WHERE key = ?",
+                    (now, generation, key)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error updating report store: {e}")
+
+    def record_query(self, topic: str):
+        """
+        Count one query for a topic in the query log.
+
+        With a database, the count is buffered and written by flush_queries
+        on a background thread every QUERY_LOG_FLUSH_EVERY queries or
+        QUERY_LOG_FLUSH_INTERVAL seconds.
+        """
+        topic_key = " ".join(topic.lower().split())
+        if not topic_key:
+            return
+        now = time.time()
+
+        if self._db is None:
+            with self._lock:
+                self._count_query(self._queries, topic_key, topic, now)
+            return
+
+        with self._pending_lock:
+            self._count_query(self._pending_queries, topic_key, topic, now)
+            self._pending_count += 1
+            due = (
+                not self._flush_scheduled
+                and (self._pending_count >= QUERY_LOG_FLUSH_EVERY or now - self._last_flush >= QUERY_LOG_FLUSH_INTERVAL)
+            )
+            if due:
+                self._flush_scheduled = True
+
+        if due:
+            self._flush_executor.submit(self.flush_queries)
+
+    def flush_queries(self):
+        """Write buffered query counts to the query log."""
+        with self._pending_lock:
+            pending = self._pending_queries
+            self._pending_queries = {}
+            self._pending_count = 0
+            self._last_flush = time.time()
+            self._flush_scheduled = False
+
+        if not pending or self._db is None:
+            return
+
+        with self._lock:
+            try:
+                self._db.executemany(
+                    "INSERT INTO queries (topic_key, topic, count, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(topic_key) DO UPDATE SET count = count + excluded.count, "
+                    "last_seen = MAX(last_seen, excluded.last_seen)",
+                    [(topic_key, e["topic"], e["count"], e["last_seen"]) for topic_key, e in pending.items()]
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"Error writing query log: {e}")
+
+    def _count_query(self, queries: Dict[str, Dict[str, Any]], topic_key: str, topic: str, now: float):
+        """Count one query for a topic in an in-memory query table."""
+        entry = queries.setdefault(topic_key, {"topic": topic, "count": 0, "last_seen": now})
+        entry["count"] += 1
+        entry["last_seen"] = now
+
+    def popular_topics(self, limit: int = 200, min_count: int = 2) -> List[Tuple[str, int]]:
+        """
+        Most frequently queried topics from the query log.
+
+        Args:
+            limit: Maximum number of topics
+            min_count: Minimum number of queries for a topic to be included
+
+        Returns:
+            (topic, query count) pairs, most frequent first
+        """
+        self.flush_queries()
+
+        with self._lock:
+            if self._db is None:
+                entries = [(e["topic"], e["count"]) for e in self._queries.values() if e["count"] >= min_count]
+                entries.sort(key=lambda entry: entry[1], reverse=True)
+                return entries[:limit]
+
+            try:
+                return [
+                    (row[0], row[1])
+                    for row in self._db.execute(
+                        "SELECT topic, count FROM queries WHERE count >= ? ORDER BY count DESC, last_seen DESC LIMIT ?",
+                        (min_count, limit)
+                    )
+                ]
+            except Exception as e:
+                logger.error(f"Error reading query log: {e}")
+                return []
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of stored reports."""
+        with self._lock:
+            if self._db is None:
+                size = len(self._reports)
+            else:
+                try:
+                    size = self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+                except Exception:
+                    size = None
+            lookups = self.hits + self.misses
+            return {
+                "reports": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a report entry (topic, fingerprint, refreshed_at, report, generation) from whichever tier is in use."""
+        if self._db is None:
+            return self._reports.get(key)
+
+        try:
+            row = self._db.execute(
+                "SELECT topic, fingerprint, refreshed_at, report, generation FROM reports WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading report store: {e}")
+            return None
+        if row is None:
+            return None
+        return {
+            "topic": row[0],
+            "fingerprint": row[1],
+            "refreshed_at": row[2],
+            "report": json.loads(row[3]),
+            "generation": row[4]
+        }
+
+
+# Singleton instance
+_report_store = None
+
+
+def get_report_store() -> ReportStore:
+    """Get or create the report store singleton."""
+    global _report_store
+    if _report_store is None:
+        _report_store = ReportStore()
+    return _report_store
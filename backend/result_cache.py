@@ -0,0 +1,218 @@
+"""
+Result cache for ScholarForge.
+Caches query_research_gaps responses, invalidated whenever the corpus changes.
+"""
+
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import copy
+import json
+import logging
+import os
+import shelve
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maximum number of responses kept in memory
+RESULT_CACHE_SIZE = 256
+
+# Seconds before a cached response expires regardless of corpus changes
+RESULT_CACHE_TTL = 3600
+
+# Optional on-disk tier for cached responses (None = memory only)
+RESULT_CACHE_PATH = None
+
+# File holding the corpus generation, shared across processes (None = per process)
+CORPUS_GENERATION_PATH = "./corpus_generation"
+
+
+class CorpusGeneration:
+    """
+    Monotonic counter bumped every time papers are ingested.
+
+    Cached results remember the generation they were computed at and are
+    ignored once it changes. With a path, the counter lives in a file so
+    ingestion in another process (e.g. preload_papers.py) also invalidates.
+    """
+
+    def __init__(self, path: Optional[str] = CORPUS_GENERATION_PATH):
+        """Initialize the counter, optionally backed by a file."""
+        self.path = path
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        """Current generation."""
+        if self.path:
+            try:
+                with open(self.path) as f:
+                    return int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                return 0
+        return self._value
+
+    def bump(self) -> int:
+        """Advance the generation and return the new value."""
+        with self._lock:
+            if self.path:
+                new_value = self.value + 1
+                tmp_path = f"{self.path}.tmp"
+                try:
+                    with open(tmp_path, "w") as f:
+                        f.write(str(new_value))
+                    os.replace(tmp_path, self.path)
+                    return new_value
+                except OSError as e:
+                    logger.warning(f"Could not write corpus generation to {self.path}, counting per process: {e}")
+                    self._value = new_value
+                    self.path = None
+                    return new_value
+            self._value += 1
+            return self._value
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of query responses with an optional on-disk tier.
+
+    Entries are stored with the corpus generation they were computed at; a
+    lookup only hits if the entry is younger than the TTL and the corpus has
+    not changed since.
+    """
+
+    def __init__(
+        self,
+        generation: CorpusGeneration,
+        max_size: int = RESULT_CACHE_SIZE,
+        ttl: float = RESULT_CACHE_TTL,
+        path: Optional[str] = RESULT_CACHE_PATH
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            generation: Corpus generation counter used for invalidation
+            max_size: Maximum number of entries kept in memory
+            ttl: Entry lifetime in seconds
+            path: Optional shelve file for the on-disk tier
+        """
+        self.generation = generation
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            try:
+                self._store = shelve.open(path)
+            except Exception as e:
+                logger.warning(f"Could not open result cache at {path}: {e}")
+
+    @staticmethod
+    def make_key(topic: str, **params: Any) -> str:
+        """Build a key from the normalized topic and retrieval parameters."""
+        normalized = " ".join(topic.lower().split())
+        return json.dumps({"topic": normalized, **params}, sort_keys=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None if missing or stale."""
+        generation = self.generation.value
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._store is not None:
+                entry = self._store.get(key)
+
+            if entry is not None:
+                entry_generation, stored_at, response = entry
+                if entry_generation == generation and now - stored_at < self.ttl:
+                    self._remember(key, entry)
+                    self.hits += 1
+                    return copy.deepcopy(response)
+                self._discard(key)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: Dict[str, Any], generation: Optional[int] = None):
+        """
+        Cache a response.
+
+        Args:
+            key: Cache key from make_key
+            response: Response to cache
+            generation: Corpus generation the response was computed at
+                (read it before retrieval so concurrent ingestion is not masked)
+        """
+        if generation is None:
+            generation = self.generation.value
+        entry = (generation, time.time(), copy.deepcopy(response))
+
+        with self._lock:
+            self._remember(key, entry)
+            if self._store is not None:
+                try:
+                    self._store[key] = entry
+                    self._store.sync()
+                except Exception as e:
+                    logger.warning(f"Could not persist cached result: {e}")
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            if self._store is not None:
+                self._store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "generation": self.generation.value
+        }
+
+    def _remember(self, key: str, entry: Tuple[int, float, Dict[str, Any]]):
+        """Insert into the in-memory LRU, evicting the oldest entry if full."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _discard(self, key: str):
+        """Remove a stale entry from both tiers."""
+        self._entries.pop(key, None)
+        if self._store is not None and key in self._store:
+            del self._store[key]
+
+
+# Singleton instances
+_corpus_generation = None
+_result_cache = None
+
+
+def get_corpus_generation() -> CorpusGeneration:
+    """Get or create the corpus generation singleton."""
+    global _corpus_generation
+    if _corpus_generation is None:
+        _corpus_generation = CorpusGeneration()
+    return _corpus_generation
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the result cache singleton."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(get_corpus_generation())
+    return _result_cache
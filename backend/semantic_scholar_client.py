@@ -6,8 +6,11 @@ Fetches research papers from Semantic Scholar API as an alternative to arXiv.
 import requests
 from typing import Dict, Any, List, Optional
 import logging
+import threading
 import time
 
+from backend.tracing import traced, current_span
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,13 +25,27 @@ class SemanticScholarClient:
         self.headers = {
             "User-Agent": "ScholarForge/2.0 (Research Tool)"
         }
+        self._thread_state = threading.local()
         logger.info("Initialized Semantic Scholar client")
 
+    def take_raw_result_count(self) -> Optional[int]:
+        """
+        Return how many results the source itself returned for this thread's
+        last search_papers call (before papers were filtered out), and reset it.
+        None if the search failed before the source answered.
+        """
+        count = getattr(self._thread_state, "raw_result_count", None)
+        self._thread_state.raw_result_count = None
+        return count
+
+    @traced("semantic_scholar.search_papers", capture=("max_results",))
     def search_papers(
         self,
         query: str,
         max_results: int = 10,
-        fields: List[str] = None
+        fields: List[str] = None,
+        offset: int = 0,
+        raise_errors: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search Semantic Scholar for papers matching the query.
@@ -37,6 +54,8 @@ class SemanticScholarClient:
             query: Search query (topic, keywords, etc.)
             max_results: Maximum number of papers to return
             fields: List of fields to retrieve
+            offset: Number of leading results to skip (to continue a previous fetch)
+            raise_errors: If True, re-raise request and processing errors instead of returning []
 
         Returns:
             List of paper dictionaries with metadata and content
@@ -48,22 +67,26 @@ class SemanticScholarClient:
                 "externalIds", "url", "fieldsOfStudy"
             ]
 
+        self._thread_state.raw_result_count = None
         try:
-            logger.info(f"Searching Semantic Scholar for: '{query}' (max {max_results} results)")
+            logger.info(f"Searching Semantic Scholar for: '{query}' (max {max_results} results, offset {offset})")
 
             # Make API request
             url = f"{self.base_url}/paper/search"
             params = {
                 "query": query,
                 "limit": min(max_results, 100),  # API limit
+                "offset": offset,
                 "fields": ",".join(fields)
             }
 
             response = requests.get(url, params=params, headers=self.headers, timeout=10)
+            current_span().set_attributes(http_status=response.status_code, bytes=len(response.content))
             response.raise_for_status()
 
             data = response.json()
             raw_papers = data.get("data", [])
+            self._thread_state.raw_result_count = len(raw_papers)
 
             # Format papers
             papers = []
@@ -72,14 +95,19 @@ class SemanticScholarClient:
                 if paper:
                     papers.append(paper)
 
+            current_span().set_attribute("results", len(papers))
             logger.info(f"Retrieved {len(papers)} papers from Semantic Scholar")
             return papers
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching from Semantic Scholar: {e}")
+            if raise_errors:
+                raise
             return []
         except Exception as e:
             logger.error(f"Error processing Semantic Scholar results: {e}")
+            if raise_errors:
+                raise
             return []
 
     def get_paper_by_id(self, paper_id: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,210 @@
+"""
+Startup orchestration for ScholarForge.
+Constructs backend clients lazily, warms them up concurrently in the
+background and reports per-client readiness.
+"""
+
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import importlib
+import logging
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Backend components: name -> (factory as "module:function", components it needs first)
+COMPONENT_FACTORIES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "elastic": ("backend.elastic_client:get_elastic_client", ()),
+    "chroma": ("backend.chroma_client:get_chroma_client", ()),
+    "claude": ("backend.claude_client:get_claude_client", ()),
+    "arxiv": ("backend.arxiv_client:get_arxiv_client", ()),
+    "semantic_scholar": ("backend.semantic_scholar_client:get_semantic_scholar_client", ()),
+    "pubmed": ("backend.pubmed_client:get_pubmed_client", ()),
+    "crossref": ("backend.crossref_client:get_crossref_client", ()),
+    "ingestor": ("backend.data_ingestion:get_paper_ingestor", ("elastic", "chroma")),
+}
+
+# Threads used to warm up independent components at startup
+WARMUP_WORKERS = 8
+
+STATE_PENDING = "pending"
+STATE_STARTING = "starting"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+
+
+class ComponentRegistry:
+    """
+    Lazily constructed, thread-safe backend components.
+
+    Each component is built at most once, on first use or by warm_up(),
+    whichever comes first; a caller that needs a component while it is being
+    built waits for that build only. Dependencies are built first. A failed
+    build is recorded and retried on the next request for the component.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Tuple[str, Tuple[str, ...]]]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            factories: Component definitions (defaults to COMPONENT_FACTORIES)
+        """
+        self.factories = dict(factories or COMPONENT_FACTORIES)
+        self._instances: Dict[str, Any] = {}
+        self._locks = {name: threading.Lock() for name in self.factories}
+        self._status: Dict[str, Dict[str, Any]] = {
+            name: {"state": STATE_PENDING, "seconds": None, "error": None}
+            for name in self.factories
+        }
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._warmup_lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Return a component, building it (and its dependencies) if needed.
+
+        Raises:
+            KeyError: If the component is unknown
+            Exception: Whatever the component's factory raised
+        """
+        if name in self._instances:
+            return self._instances[name]
+
+        path, dependencies = self.factories[name]
+        for dependency in dependencies:
+            self.get(dependency)
+
+        with self._locks[name]:
+            if name in self._instances:
+                return self._instances[name]
+
+            self._status[name].update(state=STATE_STARTING, error=None)
+            start = time.perf_counter()
+            try:
+                module_name, function_name = path.split(":")
+                factory: Callable[[], Any] = getattr(importlib.import_module(module_name), function_name)
+                instance = factory()
+            except Exception as e:
+                logger.error(f"Failed to initialize {name}: {e}")
+                self._status[name].update(
+                    state=STATE_FAILED,
+                    seconds=time.perf_counter() - start,
+                    error=str(e)
+                )
+                raise
+
+            self._status[name].update(state=STATE_READY, seconds=time.perf_counter() - start)
+            self._instances[name] = instance
+            logger.info(f"Initialized {name} in {self._status[name]['seconds']:.2f}s")
+            return instance
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """
+        Build components concurrently in a background thread.
+
+        Independent components are constructed in parallel, so total warm-up
+        time is bounded by the slowest one rather than their sum. Calling this
+        again while a warm-up is running returns the running thread.
+
+        Args:
+            names: Components to warm up (default: all)
+
+        Returns:
+            The warm-up thread
+        """
+        names = list(names or self.factories)
+
+        with self._warmup_lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return self._warmup_thread
+
+            def run():
+                start = time.perf_counter()
+                with ThreadPoolExecutor(
+                    max_workers=min(WARMUP_WORKERS, len(names)) or 1,
+                    thread_name_prefix="warmup"
+                ) as executor:
+                    futures = [executor.submit(self._warm, name) for name in names]
+                    for future in futures:
+                        future.result()
+                logger.info(f"Backend warm-up finished in {time.perf_counter() - start:.2f}s: {self.readiness()}")
+
+            self._warmup_thread = threading.Thread(target=run, name="backend-warmup", daemon=True)
+            self._warmup_thread.start()
+            return self._warmup_thread
+
+    def _warm(self, name: str):
+        """Build one component, swallowing errors (they are recorded in the status)."""
+        try:
+            self.get(name)
+        except Exception:
+            pass
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """True if the named component (or every component) has been built."""
+        if name is not None:
+            return name in self._instances
+        return all(n in self._instances for n in self.factories)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a running warm-up to finish.
+
+        Returns:
+            True if every component is ready
+        """
+        thread = self._warmup_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.is_ready()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component state ("pending", "starting", "ready" or "failed"), build time and error."""
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def readiness(self) -> Dict[str, str]:
+        """Per-component state only."""
+        return {name: status["state"] for name, status in self._status.items()}
+
+
+class lazy_component:
+    """
+    Class attribute that resolves to a registry component on first access.
+
+    The resolved value is stored on the instance, so later reads are plain
+    attribute lookups and assigning the attribute (e.g. in tests) replaces it.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Component name in the registry
+        """
+        self.name = name
+        self.attr = name
+
+    def __set_name__(self, owner: type, attr: str):
+        self.attr = attr
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        value = get_component_registry().get(self.name)
+        instance.__dict__[self.attr] = value
+        return value
+
+
+# Singleton instance
+_component_registry = None
+
+
+def get_component_registry() -> ComponentRegistry:
+    """Get or create the component registry singleton."""
+    global _component_registry
+    if _component_registry is None:
+        _component_registry = ComponentRegistry()
+    return _component_registry
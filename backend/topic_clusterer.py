@@ -0,0 +1,302 @@
+"""
+Topic clustering for ScholarForge.
+Groups a result set's papers by topic locally, from their stored embeddings,
+and names the groups with their most distinctive TF-IDF terms.
+"""
+
+from typing import Dict, Any, List, Tuple
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+
+import numpy as np
+
+from backend.startup import lazy_component
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maximum number of topic clusters per result set
+TOPIC_MAX_CLUSTERS = 6
+
+# Result sets smaller than this form a single cluster
+TOPIC_MIN_PAPERS = 4
+
+# Terms used to build a cluster's keyword label
+TOPIC_LABEL_TERMS = 2
+
+# Score multiplier for two-word phrases over single words when choosing label terms
+TOPIC_PHRASE_BOOST = 1.2
+
+# Clustered result sets kept in memory
+TOPIC_CLUSTER_CACHE_SIZE = 256
+
+# Also ask Claude (in the background) for nicer cluster names; keyword labels are shown until they arrive
+TOPIC_CLAUDE_LABELS = False
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]+")
+
+_STOPWORDS = frozenset("""
+a about above across after again against all almost also among an and any are as at based be been before being
+below between both but by can could do does during each either et etc for from further had has have having here
+how however if in into is it its itself may more most much new no nor not of on once only or other our out over
+own paper papers per present propose proposed same several should show shows since so some such than that the
+their them then there these they this those through thus to too under until up upon use used using via was we
+well were what when where whether which while who whom why will with within without would study studies approach
+approaches method methods results result work works based towards toward novel analysis
+""".split())
+
+
+class TopicClusterer:
+    """
+    Local topic clustering of a result set's papers.
+
+    Papers are represented by their stored embeddings (the mean of their
+    section vectors in Chroma; nothing is re-embedded), or by TF-IDF vectors
+    of title and excerpt when some papers have no stored embedding. They are
+    grouped by average-linkage agglomerative clustering on cosine distance,
+    and each group is labeled with the terms whose TF-IDF weight is highest
+    inside it relative to the whole set. Results are cached per result set.
+
+    With claude_labels, Claude names the clusters in a background thread;
+    cluster() returns the Claude names once they are available and the
+    keyword labels until then.
+    """
+
+    chroma = lazy_component("chroma")
+    claude = lazy_component("claude")
+
+    def __init__(
+        self,
+        max_clusters: int = TOPIC_MAX_CLUSTERS,
+        cache_size: int = TOPIC_CLUSTER_CACHE_SIZE,
+        claude_labels: bool = TOPIC_CLAUDE_LABELS
+    ):
+        """
+        Initialize the clusterer.
+
+        Args:
+            max_clusters: Maximum number of clusters per result set
+            cache_size: Number of clustered result sets kept in memory
+            claude_labels: Request Claude names for clusters in the background
+        """
+        self.max_clusters = max_clusters
+        self.cache_size = cache_size
+        self.claude_labels = claude_labels
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._claude_names: Dict[str, List[str]] = {}
+        self._labeling = set()
+        self._lock = threading.Lock()
+        self._label_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="topic-labels")
+
+    @staticmethod
+    def make_key(papers: List[Dict[str, Any]]) -> str:
+        """Identify a result set by its papers (IDs, or titles where there is no ID)."""
+        ids = sorted(paper.get("paper_id") or paper.get("title", "") for paper in papers)
+        return hashlib.sha256(json.dumps(ids).encode("utf-8")).hexdigest()
+
+    def cluster(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Group papers by topic.
+
+        Args:
+            papers: Formatted papers (as in query_research_gaps' "papers")
+
+        Returns:
+            Dictionary containing:
+                - clusters: List of {"label", "terms", "titles"}, largest first
+                - method: "embeddings" or "tfidf" (what the papers were clustered on)
+                - labels: "claude" or "keywords"
+        """
+        papers = [paper for paper in papers if paper.get("title") and paper.get("title") != "Unknown"]
+        if not papers:
+            return {"clusters": [], "method": None, "labels": "keywords"}
+
+        key = self.make_key(papers)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            names = self._claude_names.get(key)
+
+        if result is None:
+            result = self._compute(papers)
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    evicted, _ = self._cache.popitem(last=False)
+                    self._claude_names.pop(evicted, None)
+                    self._labeling.discard(evicted)
+
+        if names is not None:
+            clusters = [{**cluster, "label": name} for cluster, name in zip(result["clusters"], names)]
+            return {**result, "clusters": clusters, "labels": "claude"}
+
+        if self.claude_labels and len(result["clusters"]) > 1:
+            self._request_claude_labels(key, result["clusters"])
+        return result
+
+    def _compute(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Cluster and label one result set."""
+        tfidf, vocabulary = self._tfidf(papers)
+
+        vectors = None
+        method = "tfidf"
+        paper_ids = [paper.get("paper_id") for paper in papers]
+        if all(paper_ids):
+            try:
+                embeddings = self.chroma.get_paper_embeddings(paper_ids)
+                if len(embeddings) == len(set(paper_ids)):
+                    vectors = np.asarray([embeddings[paper_id] for paper_id in paper_ids], dtype=np.float32)
+                    method = "embeddings"
+            except Exception as e:
+                logger.warning(f"Could not load paper embeddings, clustering on TF-IDF: {e}")
+        if vectors is None:
+            vectors = tfidf
+
+        n_clusters = 1
+        if len(papers) >= TOPIC_MIN_PAPERS:
+            n_clusters = min(self.max_clusters, max(2, round(math.sqrt(len(papers) / 2))))
+        assignments = self._agglomerate(vectors, n_clusters)
+
+        clusters = []
+        for members in assignments:
+            terms = self._top_terms(tfidf, vocabulary, members)
+            clusters.append({
+                "label": " / ".join(terms[:TOPIC_LABEL_TERMS]).title() or "Other Topics",
+                "terms": terms,
+                "titles": [papers[i]["title"] for i in members]
+            })
+        clusters.sort(key=lambda cluster: len(cluster["titles"]), reverse=True)
+        self._dedupe_labels(clusters)
+
+        logger.info(f"Clustered {len(papers)} papers into {len(clusters)} topics ({method})")
+        return {"clusters": clusters, "method": method, "labels": "keywords"}
+
+    def _tfidf(self, papers: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+        """L2-normalized TF-IDF vectors of each paper's title (counted twice) and excerpt."""
+        documents = [
+            self._terms(f"{paper['title']} {paper['title']} {paper.get('content_preview', '')}")
+            for paper in papers
+        ]
+        document_frequency = Counter(term for terms in documents for term in set(terms))
+        vocabulary = sorted(document_frequency)
+        column = {term: j for j, term in enumerate(vocabulary)}
+
+        matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+        for i, terms in enumerate(documents):
+            for term, count in Counter(terms).items():
+                idf = math.log((1 + len(documents)) / (1 + document_frequency[term])) + 1.0
+                matrix[i, column[term]] = (1.0 + math.log(count)) * idf
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0), vocabulary
+
+    def _terms(self, text: str) -> List[str]:
+        """Unigrams and adjacent-word bigrams, without stopwords."""
+        words = [word.strip("-") for word in _TOKEN_RE.findall(text.lower())]
+        terms = []
+        previous = None
+        for word in words:
+            if len(word) < 3 or word in _STOPWORDS:
+                previous = None
+                continue
+            terms.append(word)
+            if previous is not None:
+                terms.append(f"{previous} {word}")
+            previous = word
+        return terms
+
+    def _agglomerate(self, vectors: np.ndarray, n_clusters: int) -> List[List[int]]:
+        """Average-linkage agglomerative clustering on cosine distance."""
+        n = len(vectors)
+        if n_clusters <= 1 or n <= 1:
+            return [list(range(n))]
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        unit = vectors / np.where(norms > 0, norms, 1.0)
+        distance = 1.0 - unit @ unit.T
+
+        clusters: Dict[int, List[int]] = {i: [i] for i in range(n)}
+        linkage = distance.astype(np.float64)
+        np.fill_diagonal(linkage, np.inf)
+        while len(clusters) > n_clusters:
+            a, b = np.unravel_index(np.argmin(linkage), linkage.shape)
+            a, b = min(a, b), max(a, b)
+            size_a, size_b = len(clusters[a]), len(clusters[b])
+
+            # Lance-Williams update for average linkage
+            merged = (linkage[a] * size_a + linkage[b] * size_b) / (size_a + size_b)
+            linkage[a, :] = merged
+            linkage[:, a] = merged
+            linkage[a, a] = np.inf
+            linkage[b, :] = np.inf
+            linkage[:, b] = np.inf
+            clusters[a].extend(clusters.pop(b))
+
+        return list(clusters.values())
+
+    def _top_terms(self, tfidf: np.ndarray, vocabulary: List[str], members: List[int], count: int = 5) -> List[str]:
+        """Terms weighted most heavily in a cluster relative to the whole result set."""
+        if not vocabulary:
+            return []
+        scores = tfidf[members].mean(axis=0) - tfidf.mean(axis=0) / 2
+        # Prefer a phrase over its words when they score about the same
+        scores = scores * np.array([TOPIC_PHRASE_BOOST if " " in term else 1.0 for term in vocabulary])
+        terms = []
+        for j in np.argsort(-scores, kind="stable"):
+            if scores[j] <= 0 or len(terms) >= count:
+                break
+            term = vocabulary[j]
+            # Skip terms that share a word with one already chosen
+            if any(set(term.split()) & set(chosen.split()) for chosen in terms):
+                continue
+            terms.append(term)
+        return terms
+
+    def _dedupe_labels(self, clusters: List[Dict[str, Any]]):
+        """Give clusters that ended up with the same label distinct names."""
+        seen = Counter()
+        for cluster in clusters:
+            label = cluster["label"]
+            seen[label] += 1
+            if seen[label] > 1:
+                extra = cluster["terms"][TOPIC_LABEL_TERMS:TOPIC_LABEL_TERMS + 1]
+                cluster["label"] = f"{label} / {extra[0].title()}" if extra else f"{label} ({seen[label]})"
+
+    def _request_claude_labels(self, key: str, clusters: List[Dict[str, Any]]):
+        """Ask Claude for cluster names in the background, once per result set."""
+        with self._lock:
+            if key in self._labeling:
+                return
+            self._labeling.add(key)
+
+        def run():
+            try:
+                names = self.claude.label_topic_clusters(clusters)
+                if names:
+                    with self._lock:
+                        if key in self._cache:
+                            self._claude_names[key] = names
+            except Exception as e:
+                logger.warning(f"Could not label topic clusters with Claude: {e}")
+
+        self._label_executor.submit(run)
+
+
+# Singleton instance
+_topic_clusterer = None
+
+
+def get_topic_clusterer() -> TopicClusterer:
+    """Get or create the topic clusterer singleton."""
+    global _topic_clusterer
+    if _topic_clusterer is None:
+        _topic_clusterer = TopicClusterer()
+    return _topic_clusterer
@@ -0,0 +1,501 @@
+"""
+Request tracing for ScholarForge.
+Correlates client calls made on behalf of one request using contextvars.
+
+A trace starts at the request boundary (QueryHandler.query_research_gaps) and
+gets a request ID. Client methods decorated with @traced open nested spans
+with attributes such as index, n_results and bytes. When the root span ends,
+the whole trace is appended to a JSONL file as one OTLP/JSON
+ExportTraceServiceRequest per line, which OpenTelemetry tooling can load.
+"""
+
+from typing import Dict, Any, List, Optional, Callable, Iterable
+from contextlib import contextmanager
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# JSONL file traces are appended to (None = don't export)
+TRACE_EXPORT_PATH = "./traces.jsonl"
+
+# Size at which the trace file is rotated to traces.jsonl.1, .2, ... (0 = never rotate)
+TRACE_EXPORT_MAX_BYTES = 50 * 1024 * 1024
+
+# Rotated trace files kept; older ones are deleted
+TRACE_EXPORT_BACKUPS = 3
+
+# Only export traces whose root span took at least this long (0 = every trace)
+TRACE_EXPORT_MIN_DURATION_MS = 1000.0
+
+# Service name reported in the exported resource
+TRACE_SERVICE_NAME = "scholarforge"
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("scholarforge_trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("scholarforge_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent: Optional["Span"] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        """Start a span now."""
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ""
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status_code = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration so far (or in total, once ended)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        """Set one attribute; None values are dropped."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        """Set several attributes at once."""
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException):
+        """Mark the span as failed and attach an exception event."""
+        self.status_code = STATUS_ERROR
+        self.status_message = str(exc)
+        self.events.append({
+            "name": "exception",
+            "timeUnixNano": str(time.time_ns()),
+            "attributes": _otlp_attributes({
+                "exception.type": type(exc).__name__,
+                "exception.message": str(exc)
+            })
+        })
+
+    def end(self):
+        """End the span and hand it to its trace."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.span_ended(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Return the span in OTLP/JSON form."""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class _NoopSpan:
+    """Stand-in returned outside a trace so callers never need to check."""
+
+    span_id = ""
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes: Any):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """
+    All spans of one request, sharing a trace ID that doubles as the request ID.
+
+    Spans are collected in memory and exported together when the root span
+    ends. Spans that end afterwards (e.g. an external fetch abandoned at its
+    deadline) are exported on their own line under the same trace ID.
+    """
+
+    def __init__(self, request_id: Optional[str] = None):
+        """Initialize an empty trace."""
+        self.trace_id = request_id or uuid.uuid4().hex
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.exported = False
+        self._lock = threading.Lock()
+
+    def span_ended(self, span: Span):
+        """Collect an ended span, exporting the trace when the root ends."""
+        with self._lock:
+            if self.exported:
+                late = [span]
+            else:
+                self.spans.append(span)
+                if span is not self.root:
+                    return
+                self.exported = True
+                late = None
+
+        if late is not None:
+            # The trace was already written (or skipped as fast); only follow up on written ones
+            if self.root is not None and self.root.duration_ms >= TRACE_EXPORT_MIN_DURATION_MS:
+                get_trace_exporter().export(late)
+            return
+
+        if span.duration_ms >= TRACE_EXPORT_MIN_DURATION_MS:
+            get_trace_exporter().export(self.spans)
+
+
+class JsonlTraceExporter:
+    """
+    Appends spans to a JSONL file, one OTLP ExportTraceServiceRequest per line.
+
+    Once the file reaches max_bytes it is renamed to <path>.1 (shifting older
+    files up to <path>.<backups>) and a new file is started.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = TRACE_EXPORT_PATH,
+        service_name: str = TRACE_SERVICE_NAME,
+        max_bytes: int = TRACE_EXPORT_MAX_BYTES,
+        backups: int = TRACE_EXPORT_BACKUPS
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: JSONL file to append to, or None to discard spans
+            service_name: Value of the service.name resource attribute
+            max_bytes: File size that triggers rotation (0 = never rotate)
+            backups: Number of rotated files kept
+        """
+        self.path = path
+        self.service_name = service_name
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def export(self, spans: Iterable[Span]):
+        """Write spans as a single line."""
+        if not self.path:
+            return
+
+        record = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "backend.tracing"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+        try:
+            line = json.dumps(record, default=str)
+            with self._lock:
+                self._rotate_if_full()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            logger.warning(f"Could not export trace to {self.path}: {e}")
+
+    def _rotate_if_full(self):
+        """Rotate the trace file once it has reached max_bytes (caller holds the lock)."""
+        if not self.max_bytes:
+            return
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def current_request_id() -> Optional[str]:
+    """Return the request ID of the active trace, if any."""
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def current_span():
+    """Return the active span, or a no-op span outside a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def start_trace(name: str, request_id: Optional[str] = None, **attributes: Any):
+    """
+    Start a request trace, or a child span if a trace is already active.
+
+    Args:
+        name: Root span name
+        request_id: Optional request ID to use as the trace ID
+        **attributes: Root span attributes
+
+    Yields:
+        The root span
+    """
+    if _current_trace.get() is not None:
+        with span(name, **attributes) as child:
+            yield child
+        return
+
+    trace = Trace(request_id)
+    root = Span(trace, name, kind=SPAN_KIND_SERVER, attributes=attributes)
+    trace.root = root
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        root.end()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+    """
+    Open a span nested under the active one. Outside a trace this is a no-op.
+
+    Args:
+        name: Span name, e.g. "elastic.search_papers"
+        kind: OTLP span kind
+        **attributes: Span attributes
+
+    Yields:
+        The span (or a no-op span)
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(trace, name, parent=_current_span.get(), kind=kind, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name: Optional[str] = None, kind: int = SPAN_KIND_CLIENT, capture: Iterable[str] = ()):
+    """
+    Decorator wrapping a function call in a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+        kind: OTLP span kind
+        capture: Argument names recorded as span attributes (scalars as-is,
+            sized values such as lists as their length, anything else skipped)
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        capture_names = tuple(capture)
+        signature = inspect.signature(func) if capture_names else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+
+            attributes = {}
+            if signature is not None:
+                bound = signature.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+                for arg in capture_names:
+                    attributes[arg] = _attribute_value(bound.arguments.get(arg))
+
+            with span(span_name, kind=kind, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_request(name: Optional[str] = None, capture: Iterable[str] = ()):
+    """
+    Decorator starting a request trace around a call (or a child span when
+    called inside an existing trace).
+
+    Args:
+        name: Root span name (defaults to the function's qualified name)
+        capture: Argument names recorded as root span attributes
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        capture_names = tuple(capture)
+        signature = inspect.signature(func) if capture_names else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attributes = {}
+            if signature is not None:
+                bound = signature.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+                for arg in capture_names:
+                    attributes[arg] = _attribute_value(bound.arguments.get(arg))
+
+            with start_trace(span_name, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_request_stream(name: Optional[str] = None, capture: Iterable[str] = ()):
+    """
+    traced_request for generator functions.
+
+    The trace stays open while the generator is iterated, and the generator
+    runs in its own copy of the context so its spans never leak into the
+    consumer's code between items.
+
+    Args:
+        name: Root span name (defaults to the function's qualified name)
+        capture: Argument names recorded as root span attributes
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        capture_names = tuple(capture)
+        signature = inspect.signature(func) if capture_names else None
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attributes = {}
+            if signature is not None:
+                bound = signature.bind_partial(*args, **kwargs)
+                bound.apply_defaults()
+                for arg in capture_names:
+                    attributes[arg] = _attribute_value(bound.arguments.get(arg))
+
+            def run():
+                with start_trace(span_name, **attributes):
+                    yield from func(*args, **kwargs)
+
+            context = contextvars.copy_context()
+            generator = run()
+            try:
+                while True:
+                    try:
+                        item = context.run(next, generator)
+                    except StopIteration:
+                        return
+                    yield item
+            finally:
+                context.run(generator.close)
+
+        return wrapper
+
+    return decorator
+
+
+def propagate(func: Callable) -> Callable:
+    """
+    Bind func to a copy of the current context, for running on another thread.
+
+    ThreadPoolExecutor workers don't inherit contextvars, so submit
+    propagate(func) instead of func to keep its spans in the caller's trace.
+    """
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def _attribute_value(value: Any) -> Any:
+    """Reduce an argument to something worth recording."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "__len__"):
+        return len(value)
+    return None
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert a flat dict to OTLP key/value attribute form."""
+    converted = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        converted.append({"key": key, "value": typed})
+    return converted
+
+
+# Singleton instance
+_trace_exporter = None
+
+
+def get_trace_exporter() -> JsonlTraceExporter:
+    """Get or create JsonlTraceExporter singleton."""
+    global _trace_exporter
+    if _trace_exporter is None:
+        _trace_exporter = JsonlTraceExporter()
+    return _trace_exporter
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Claude API for the test scripts.
+
+Provides a base request handler with JSON helpers and a server runner; each
+test script subclasses StubHandler with the endpoints and behavior it needs
+(rate limiting, Message Batches, ...) and reads its counters from the state
+object passed to start_stub.
+
+Usage:
+    class Handler(StubHandler):
+        def do_POST(self):
+            request = self.read_json()
+            self.reply(200, message(request, "stub answer"))
+
+    server, base_url = start_stub(Handler, state)
+    client = ClaudeClient(api_key="stub-key", base_url=base_url)
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, Type
+
+
+def message(request: Dict[str, Any], text: str, output_tokens: int = 50) -> Dict[str, Any]:
+    """A Messages API response carrying text, for the given request body."""
+    prompt = request["messages"][0]["content"]
+    return {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": request.get("model", "stub"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(prompt) // 4, "output_tokens": output_tokens}
+    }
+
+
+def error(error_type: str, error_message: str) -> Dict[str, Any]:
+    """A Claude API error response body."""
+    return {"type": "error", "error": {"type": error_type, "message": error_message}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Base handler: quiet logging, JSON request parsing and replies. `state` is set by start_stub."""
+
+    state: Any = None
+
+    def log_message(self, *args):
+        pass
+
+    def read_json(self) -> Dict[str, Any]:
+        """Parse the request body as JSON."""
+        length = int(self.headers.get("content-length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def reply(
+        self,
+        status: int,
+        body: Any,
+        content_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Send a response; body is JSON-encoded unless it is already bytes."""
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_stub(handler: Type[StubHandler], state: Any) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve handler (bound to state) on a free localhost port in a daemon thread; return (server, base_url)."""
+    bound = type(handler.__name__, (handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), bound)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Deduplicate the future work index.
+
+Older versions indexed future work sections with auto-generated IDs, so every
+re-ingested paper added another copy. This one-shot migration re-keys every
+document by (paper_id, section_name) and deletes the duplicates. It is safe to
+run more than once.
+
+Usage:
+    python dedupe_future_work.py
+"""
+
+import logging
+import sys
+
+from backend.elastic_client import get_elastic_client
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the future work migration."""
+    elastic = get_elastic_client()
+    stats = elastic.deduplicate_future_work()
+
+    print("\n" + "="*80)
+    print("FUTURE WORK DEDUPLICATION")
+    print("="*80)
+    print(f"📄 Documents scanned:  {stats['scanned']}")
+    print(f"🔑 Re-keyed documents: {stats['migrated']}")
+    print(f"🗑️  Deleted duplicates: {stats['deleted']}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
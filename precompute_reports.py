@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Gap Report Precomputation Script
+
+Materializes research gap reports for popular topics into the report store,
+so QueryHandler answers those topics without a live Claude call.
+
+Strategy:
+1. Take topics from a file (one per line) and/or the most frequent topics in the query log
+2. Run two-stage retrieval for all topics in one batch
+3. Skip topics whose candidate set is unchanged since their report was built
+4. Analyze the rest through the Message Batches API and store the reports
+
+Run it periodically (e.g. nightly from cron) to keep reports fresh; reports
+that are not refreshed stop being served after REPORT_MAX_AGE, or as soon as
+new papers are ingested.
+
+Usage:
+    python precompute_reports.py --top 200
+    python precompute_reports.py --topics-file topics.txt --no-batch-api
+"""
+
+import argparse
+import logging
+import time
+from typing import List
+
+from backend.query_handler import QueryHandler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_topics(handler: QueryHandler, topics_file: str, top: int, min_count: int) -> List[str]:
+    """
+    Collect topics to precompute.
+
+    Args:
+        handler: Query handler (its report store holds the query log)
+        topics_file: Path of a file with one topic per line, or None
+        top: Number of most frequent query-log topics to add (0 = none)
+        min_count: Minimum query count for a query-log topic
+
+    Returns:
+        Topics, file topics first, without duplicates
+    """
+    topics = []
+    if topics_file:
+        with open(topics_file, encoding="utf-8") as f:
+            topics.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        logger.info(f"Loaded {len(topics)} topics from {topics_file}")
+
+    if top > 0:
+        popular = handler.report_store.popular_topics(limit=top, min_count=min_count)
+        logger.info(f"Loaded {len(popular)} popular topics from the query log")
+        topics.extend(topic for topic, _ in popular)
+
+    return list(dict.fromkeys(topics))
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Precompute research gap reports for popular topics")
+    parser.add_argument("--topics-file", type=str, default=None, help="File with one topic per line")
+    parser.add_argument("--top", type=int, default=200, help="Most frequent query-log topics to include (0 = none)")
+    parser.add_argument("--min-count", type=int, default=2, help="Minimum queries for a query-log topic")
+    parser.add_argument("--n-results", type=int, default=20, help="Papers per report (must match the app's query)")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Topics per retrieval/analysis batch")
+    parser.add_argument("--no-batch-api", action="store_true", help="Analyze with regular calls instead of the Message Batches API")
+    parser.add_argument("--force", action="store_true", help="Re-analyze topics even if their candidates are unchanged")
+    args = parser.parse_args()
+
+    handler = QueryHandler(fetch_from_arxiv=False)
+    topics = load_topics(handler, args.topics_file, args.top, args.min_count)
+    if not topics:
+        logger.warning("No topics to precompute")
+        return
+
+    start = time.time()
+    totals = {}
+    for i in range(0, len(topics), args.chunk_size):
+        chunk = topics[i:i + args.chunk_size]
+        stats = handler.precompute_reports(
+            chunk,
+            n_results=args.n_results,
+            use_batch_api=not args.no_batch_api,
+            force=args.force
+        )
+        for name, value in stats.items():
+            totals[name] = totals.get(name, 0) + value
+        logger.info(f"Processed {min(i + args.chunk_size, len(topics))}/{len(topics)} topics: {stats}")
+
+    logger.info("=" * 80)
+    logger.info(f"Precomputation complete in {time.time() - start:.1f}s")
+    logger.info(f"  Topics:    {totals.get('topics', 0)}")
+    logger.info(f"  Refreshed: {totals.get('refreshed', 0)}")
+    logger.info(f"  Unchanged: {totals.get('unchanged', 0)}")
+    logger.info(f"  Empty:     {totals.get('empty', 0)}")
+    logger.info(f"  Failed:    {totals.get('failed', 0)}")
+    logger.info(f"  Store:     {handler.report_store.stats()}")
+    logger.info("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
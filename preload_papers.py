@@ -27,6 +27,7 @@ from backend.arxiv_client import get_arxiv_client
 from backend.elastic_client import get_elastic_client
 from backend.chroma_client import get_chroma_client
 from backend.data_ingestion import get_paper_ingestor
+from backend.result_cache import get_corpus_generation
 from backend.config import (
     ARXIV_CATEGORIES,
     PAPERS_PER_CATEGORY,
@@ -138,59 +139,69 @@ class BulkPreloader:
         Returns:
             Dictionary with success/failure counts
         """
-        elastic_success = 0
-        chroma_success = 0
+        chroma_buffer = []
+        new_papers = []
+        sections_by_id = {}
+
+        # Check which papers already exist in one mget
+        existing_ids = self.elastic.get_existing_ids(p.get("paper_id") for p in papers)
+
+        for paper in papers:
+            # Don't include sections in metadata (will be extracted)
+            sections = paper.pop("sections", None)
+            if sections:
+                sections_by_id[paper.get("paper_id")] = sections
+
+            if paper.get("paper_id") in existing_ids:
+                logger.debug(f"Paper {paper['paper_id']} already exists, skipping")
+                continue
+
+            new_papers.append(paper)
 
-        # Split into batches for Elasticsearch
-        for i in range(0, len(papers), ELASTICSEARCH_BATCH_SIZE):
-            batch = papers[i:i + ELASTICSEARCH_BATCH_SIZE]
-
-            # Ingest into Elasticsearch
-            for paper in batch:
-                try:
-                    # Don't include sections in metadata (will be extracted)
-                    sections = paper.pop("sections", None)
-
-                    # Check if already exists
-                    existing = self.elastic.get_paper_by_id(paper.get("paper_id"))
-                    if existing:
-                        logger.debug(f"Paper {paper['paper_id']} already exists, skipping")
-                        continue
-
-                    # Insert into Elastic
-                    success = self.elastic.insert_paper_metadata(paper)
-                    if success:
-                        elastic_success += 1
-
-                        # Selectively embed in ChromaDB
-                        if embed_in_chroma and self.should_embed_in_chroma(paper):
-                            # Re-add sections for ChromaDB
-                            if sections:
-                                chroma_sections = {k: v for k, v in sections.items() if v}
-                                if chroma_sections:
-                                    metadata = {
-                                        "title": paper.get("title", ""),
-                                        "authors": paper.get("authors", ""),
-                                        "year": paper.get("year", 0),
-                                        "field": paper.get("field", "")
-                                    }
-                                    self.chroma.add_paper_sections_batch(
-                                        paper_id=paper["paper_id"],
-                                        sections=chroma_sections,
-                                        metadata=metadata
-                                    )
-                                    chroma_success += 1
-
-                    # Re-add sections if needed
-                    if sections:
-                        paper["sections"] = sections
-
-                except Exception as e:
-                    logger.error(f"Error ingesting paper {paper.get('paper_id', 'unknown')}: {e}")
-                    self.stats["errors"] += 1
-
-            # Small delay between batches
-            time.sleep(0.1)
+        # Insert into Elastic through the _bulk endpoint
+        bulk_results = self.elastic.bulk_insert_papers(
+            new_papers,
+            chunk_size=ELASTICSEARCH_BATCH_SIZE
+        )
+        elastic_success = bulk_results["success"]
+        if elastic_success:
+            # New content invalidates cached query results
+            get_corpus_generation().bump()
+        # Only papers Elastic acknowledged are embedded; if the bulk stream
+        # aborted, the papers it never reached are failures too
+        indexed_ids = set(bulk_results["succeeded_ids"])
+        self.stats["errors"] += len(new_papers) - elastic_success
+
+        for paper in new_papers:
+            sections = sections_by_id.get(paper.get("paper_id"))
+
+            # Selectively embed in ChromaDB
+            if paper["paper_id"] in indexed_ids and embed_in_chroma and self.should_embed_in_chroma(paper):
+                if sections:
+                    chroma_sections = {k: v for k, v in sections.items() if v}
+                    if chroma_sections:
+                        # Queue for one batched embedding pass below
+                        chroma_buffer.append({
+                            "paper_id": paper["paper_id"],
+                            "sections": chroma_sections,
+                            "metadata": {
+                                "title": paper.get("title", ""),
+                                "authors": paper.get("authors", ""),
+                                "year": paper.get("year", 0),
+                                "field": paper.get("field", "")
+                            }
+                        })
+
+        # Re-add sections
+        for paper in papers:
+            sections = sections_by_id.get(paper.get("paper_id"))
+            if sections:
+                paper["sections"] = sections
+
+        # Embed sections from all papers together (deduplicated by content hash)
+        chroma_success = 0
+        if chroma_buffer:
+            chroma_success = self.chroma.add_sections_bulk(chroma_buffer)["papers"]
 
         return {
             "elastic": elastic_success,
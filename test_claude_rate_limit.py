@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Load-test ClaudeClient's rate limiting against a local stub of the Messages API.
+
+Starts an HTTP server on localhost that answers POST /v1/messages like the
+Claude API but enforces its own requests-per-second limit, replying 429 with
+a retry-after header when it is exceeded (and 529 "overloaded" at random).
+Then fires many concurrent analyses at it:
+1. Async mode (analyze_research_gaps_async, gathered on one event loop)
+2. Threaded mode (analyze_research_gaps from a thread pool, like concurrent Streamlit sessions)
+3. Baseline without limiter or retries, for comparison
+
+For each run it reports how many answers were real (not the mock fallback),
+how many 429s the server sent, and the wall-clock time.
+
+Usage:
+    python test_claude_rate_limit.py
+    python test_claude_rate_limit.py --requests 60 --server-rps 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.analysis_cache import AnalysisCache
+from backend.claude_client import ClaudeClient
+from backend.rate_limiter import RateLimiter
+from claude_api_stub import StubHandler, error, message, start_stub
+
+
+ANALYSIS = {
+    "summary": "Stub analysis.",
+    "limitations": ["Stub limitation"],
+    "future_directions": ["Stub direction"],
+    "keyword_trend": [{"keyword": "stub", "frequency": 1}]
+}
+
+
+class StubState:
+    """Server-side rate limit window and counters."""
+
+    def __init__(self, rps: int, latency: float, overload_rate: float):
+        self.rps = rps
+        self.latency = latency
+        self.overload_rate = overload_rate
+        self.lock = threading.Lock()
+        self.window = []
+        self.counts = {"ok": 0, "429": 0, "529": 0}
+
+    def admit(self) -> bool:
+        """Sliding one-second window limit."""
+        now = time.monotonic()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 1.0]
+            if len(self.window) >= self.rps:
+                self.counts["429"] += 1
+                return False
+            self.window.append(now)
+            return True
+
+
+class RateLimitedHandler(StubHandler):
+    """POST /v1/messages with the stub's rate limit and random overloads."""
+
+    def do_POST(self):
+        request = self.read_json()
+        state = self.state
+
+        if not state.admit():
+            self.reply(429, error("rate_limit_error", "stub limit"), headers={"retry-after": "1"})
+            return
+        if random.random() < state.overload_rate:
+            with state.lock:
+                state.counts["529"] += 1
+            self.reply(529, error("overloaded_error", "stub overload"))
+            return
+
+        time.sleep(state.latency)
+        with state.lock:
+            state.counts["ok"] += 1
+        self.reply(200, message(request, json.dumps(ANALYSIS)))
+
+
+def make_client(base_url: str, limiter: RateLimiter) -> ClaudeClient:
+    """ClaudeClient against the stub with a fresh in-memory analysis cache."""
+    return ClaudeClient(
+        analysis_cache=AnalysisCache(path=None),
+        rate_limiter=limiter,
+        api_key="stub-key",
+        base_url=base_url
+    )
+
+
+def sample_sections(i: int):
+    """One distinct context per request, so the analysis cache never hits."""
+    return [{"metadata": {"paper_id": f"paper_{i}", "section_name": "abstract", "title": f"Paper {i}"},
+             "content": f"Abstract of paper {i} about topic {i}.", "distance": 0.2}]
+
+
+def is_real(result: dict) -> bool:
+    """True if the result came from the stub rather than the mock fallback."""
+    return result.get("summary") == ANALYSIS["summary"]
+
+
+def run_async(client: ClaudeClient, n: int):
+    """Gather n async analyses on one event loop."""
+    async def main():
+        return await asyncio.gather(*[
+            client.analyze_research_gaps_async(f"topic {i}", sample_sections(i), [])
+            for i in range(n)
+        ])
+    return asyncio.run(main())
+
+
+def run_threaded(client: ClaudeClient, n: int, workers: int):
+    """Run n sync analyses from a thread pool."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda i: client.analyze_research_gaps(f"topic {i}", sample_sections(i), []),
+            range(n)
+        ))
+
+
+def report(name: str, results, state: StubState, elapsed: float, limiter: RateLimiter):
+    """Print one result line and return the number of real answers."""
+    real = sum(1 for r in results if is_real(r))
+    print(f"{name:<28} real {real:>3}/{len(results):<3}  429s {state.counts['429']:>4}  "
+          f"529s {state.counts['529']:>3}  {elapsed:6.2f}s  limiter {limiter.get_stats()}")
+    return real
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate-limit load test against a local Claude API stub")
+    parser.add_argument("--requests", type=int, default=40, help="Analyses per run")
+    parser.add_argument("--server-rps", type=int, default=10, help="Stub server's requests-per-second limit")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub response latency (seconds)")
+    parser.add_argument("--overload-rate", type=float, default=0.05, help="Fraction of 529 responses")
+    parser.add_argument("--threads", type=int, default=16, help="Threads for the threaded run")
+    args = parser.parse_args()
+
+    random.seed(0)
+    runs = [
+        ("async + limiter", run_async, True),
+        ("threads + limiter", lambda c, n: run_threaded(c, n, args.threads), True),
+        ("threads, no limiter/retries", lambda c, n: run_threaded(c, n, args.threads), False),
+    ]
+
+    failures = 0
+    for name, run, limited in runs:
+        state = StubState(args.server_rps, args.latency, args.overload_rate)
+        server, base_url = start_stub(RateLimitedHandler, state)
+        if limited:
+            limiter = RateLimiter(requests_per_minute=args.server_rps * 60, tokens_per_minute=10_000_000,
+                                  max_concurrency=8, backoff_base=0.1, backoff_max=2.0)
+        else:
+            limiter = RateLimiter(requests_per_minute=1_000_000, tokens_per_minute=10_000_000,
+                                  max_concurrency=10_000, max_retries=0)
+
+        client = make_client(base_url, limiter)
+        start = time.perf_counter()
+        results = run(client, args.requests)
+        real = report(name, results, state, time.perf_counter() - start, limiter)
+        server.shutdown()
+
+        if limited and real != args.requests:
+            failures += 1
+
+    print("PASS" if failures == 0 else f"FAIL ({failures} limited runs fell back to mock responses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Test offline report precomputation against a local stub of the Message Batches API.
+
+Starts an HTTP server on localhost that implements the batch endpoints
+(create, retrieve, results) and finishes each batch after a couple of polls.
+Retrieval is served from canned candidate sets so no Elasticsearch/Chroma is
+needed. Then checks that:
+1. Every topic gets a report, analyzed in a single batch
+2. QueryHandler serves the report without calling Claude
+3. The batch query path looks reports up under the same keys and serves them too
+4. Re-running with unchanged candidates submits nothing
+5. Changing one topic's candidates re-analyzes only that topic
+6. Ingesting papers stops reports from being served until the next run
+
+Usage:
+    python test_precompute_reports.py
+"""
+
+import json
+import threading
+import time
+
+import backend.claude_client
+from backend.analysis_cache import AnalysisCache
+from backend.claude_client import ClaudeClient
+from backend.query_handler import QueryHandler
+from backend.report_store import ReportStore
+from backend.result_cache import CorpusGeneration, ResultCache
+from claude_api_stub import StubHandler, message, start_stub
+
+
+TOPICS = ["graph neural networks", "federated learning", "protein folding"]
+
+
+class StubBatches:
+    """Server-side batches and request counters."""
+
+    def __init__(self, polls_until_ended: int = 2):
+        self.polls_until_ended = polls_until_ended
+        self.lock = threading.Lock()
+        self.batches = {}
+        self.counts = {"batches": 0, "batch_requests": 0, "messages": 0}
+
+
+def answer(request: dict) -> dict:
+    """A stub report for the topic named in an analysis request."""
+    topic = request["messages"][0]["content"].split("Topic: ", 1)[1].split("\n", 1)[0]
+    return message(request, json.dumps({
+        "summary": f"Stub report on {topic}.",
+        "limitations": ["Stub limitation"],
+        "future_directions": ["Stub direction"],
+        "keyword_trend": [{"keyword": "stub", "frequency": 1}]
+    }))
+
+
+class BatchesHandler(StubHandler):
+    """Message Batches endpoints (create, retrieve, results) plus POST /v1/messages."""
+
+    def _batch(self, batch_id: str) -> dict:
+        state = self.state
+        batch = state.batches[batch_id]
+        ended = batch["polls"] >= state.polls_until_ended
+        host = f"http://{self.headers['host']}"
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else len(batch["requests"]),
+                "succeeded": len(batch["requests"]) if ended else 0,
+                "errored": 0, "canceled": 0, "expired": 0
+            },
+            "created_at": "2026-01-01T00:00:00Z",
+            "expires_at": "2026-01-02T00:00:00Z",
+            "ended_at": "2026-01-01T00:01:00Z" if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{host}/v1/messages/batches/{batch_id}/results" if ended else None
+        }
+
+    def do_POST(self):
+        state = self.state
+        body = self.read_json()
+
+        if self.path.startswith("/v1/messages/batches"):
+            with state.lock:
+                state.counts["batches"] += 1
+                state.counts["batch_requests"] += len(body["requests"])
+                batch_id = f"msgbatch_{state.counts['batches']}"
+                state.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+            self.reply(200, self._batch(batch_id))
+            return
+
+        with state.lock:
+            state.counts["messages"] += 1
+        self.reply(200, answer(body))
+
+    def do_GET(self):
+        state = self.state
+        parts = self.path.split("?")[0].strip("/").split("/")
+        batch_id = parts[3]
+        if parts[-1] == "results":
+            lines = [
+                json.dumps({
+                    "custom_id": request["custom_id"],
+                    "result": {"type": "succeeded", "message": answer(request["params"])}
+                })
+                for request in state.batches[batch_id]["requests"]
+            ]
+            self.reply(200, ("\n".join(lines) + "\n").encode("utf-8"), "application/binary")
+            return
+
+        with state.lock:
+            state.batches[batch_id]["polls"] += 1
+        self.reply(200, self._batch(batch_id))
+
+
+class CannedRetrievalHandler(QueryHandler):
+    """QueryHandler whose two-stage retrieval returns fixed candidate sets per topic."""
+
+    def __init__(self, candidates: dict, **kwargs):
+        super().__init__(fetch_from_arxiv=False, warm_up=False, **kwargs)
+        self.candidates = candidates
+        self.lookup_keys = []
+
+    def _lookup_cached_result(self, topic, metrics, **params):
+        cache_key, cached = super()._lookup_cached_result(topic, metrics, **params)
+        self.lookup_keys.append(cache_key)
+        return cache_key, cached
+
+    def _two_stage_retrieval_many(self, queries, final_k=10, stage1_candidates=200,
+                                  relevance_threshold=0.7, keyword_k=50, metrics_list=None):
+        return [self._retrieve(query, final_k) for query in queries]
+
+    def _two_stage_retrieval(self, query, final_k=10, stage1_candidates=200,
+                             relevance_threshold=0.7, keyword_k=50, metrics=None):
+        return self._retrieve(query, final_k)
+
+    def _retrieve(self, query, final_k):
+        sections = [
+            {
+                "metadata": {"paper_id": paper_id, "section_name": "abstract", "title": f"Paper {paper_id}", "year": 2023},
+                "content": f"Abstract of {paper_id} on {query}.",
+                "distance": 0.2
+            }
+            for paper_id in self.candidates.get(query, [])
+        ]
+        return sections[:final_k], []
+
+
+def candidate_sets() -> dict:
+    """Six distinct papers per topic."""
+    return {topic: [f"{topic.split()[0]}_{i}" for i in range(6)] for topic in TOPICS}
+
+
+def main():
+    # Poll the stub quickly
+    backend.claude_client.BATCH_POLL_INTERVAL = 0.05
+
+    state = StubBatches()
+    server, base_url = start_stub(BatchesHandler, state)
+
+    candidates = candidate_sets()
+    handler = CannedRetrievalHandler(candidates)
+    handler.claude = ClaudeClient(analysis_cache=AnalysisCache(path=None), api_key="stub-key", base_url=base_url)
+    handler.report_store = ReportStore(path=None)
+    handler.result_cache = ResultCache(CorpusGeneration(path=None))
+    failures = []
+
+    def check(name: str, ok: bool, detail):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+        if not ok:
+            failures.append(name)
+
+    # 1. Cold run: everything analyzed in one batch
+    start = time.perf_counter()
+    stats = handler.precompute_reports(TOPICS, use_batch_api=True)
+    check("cold run", stats["refreshed"] == len(TOPICS) and state.counts["batches"] == 1,
+          f"{stats}, {state.counts}, {time.perf_counter() - start:.2f}s")
+
+    # 2. Served from the report store without a Claude call
+    result = handler.query_research_gaps(TOPICS[0])
+    check("served precomputed", result.get("precomputed") and state.counts["messages"] == 0,
+          f"summary={result.get('summary')!r}, cache={result['retrieval_stats'].get('cache')}")
+
+    # 3. Batch path: same cache key as the single-topic path, served from reports
+    single_key = handler.lookup_keys[-1]
+    results = handler.query_research_gaps_many(TOPICS)
+    batch_key = handler.lookup_keys[-len(TOPICS)]
+    check("batch path shares keys", batch_key == single_key and all(r.get("precomputed") for r in results)
+          and state.counts["messages"] == 0, f"precomputed={[r.get('precomputed') for r in results]}")
+
+    # 4. Unchanged candidates: nothing submitted
+    stats = handler.precompute_reports(TOPICS, use_batch_api=True)
+    check("unchanged run", stats["unchanged"] == len(TOPICS) and state.counts["batches"] == 1, f"{stats}, {state.counts}")
+
+    # 5. One topic's candidates change: only that topic is re-analyzed
+    candidates[TOPICS[1]].append("federated_new")
+    stats = handler.precompute_reports(TOPICS, use_batch_api=True)
+    check("incremental run", stats["refreshed"] == 1 and state.counts["batch_requests"] == len(TOPICS) + 1,
+          f"{stats}, {state.counts}")
+
+    # 6. New papers invalidate reports; the next run re-validates them
+    handler.result_cache.generation.bump()
+    stale = handler.query_research_gaps(TOPICS[2])
+    handler.precompute_reports(TOPICS, use_batch_api=True)
+    fresh = handler.query_research_gaps(TOPICS[0])
+    check("corpus change", not stale.get("precomputed") and fresh.get("precomputed"),
+          f"after ingest precomputed={stale.get('precomputed')}, after re-run precomputed={fresh.get('precomputed')}")
+
+    server.shutdown()
+    print("PASS" if not failures else f"FAIL ({', '.join(failures)})")
+
+
+if __name__ == "__main__":
+    main()
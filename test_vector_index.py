@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-memory VectorIndex against Chroma's collection.query.
+
+Builds a throwaway in-memory Chroma collection filled with random embeddings,
+mirrors it into a VectorIndex, and compares:
+1. Candidate-restricted re-ranking (200 candidate papers, Stage 2 style)
+2. Global top-k search
+3. That both return the same nearest neighbours
+
+Usage:
+    python test_vector_index.py
+    python test_vector_index.py --papers 20000 --candidates 200
+"""
+
+import argparse
+import time
+
+import chromadb
+import numpy as np
+
+from backend.chroma_client import VectorIndex
+
+
+def build_collection(n_papers: int, sections_per_paper: int, dim: int, seed: int = 0):
+    """Create an ephemeral collection and a mirrored VectorIndex with random vectors."""
+    rng = np.random.default_rng(seed)
+    client = chromadb.EphemeralClient()
+    collection = client.get_or_create_collection(name="vector_index_benchmark")
+
+    index = VectorIndex()
+    batch = 5000
+    ids, embeddings, documents, metadatas = [], [], [], []
+    for p in range(n_papers):
+        for s in range(sections_per_paper):
+            ids.append(f"paper_{p}_section_{s}")
+            embeddings.append(rng.standard_normal(dim).astype(np.float32))
+            documents.append(f"Section {s} of paper {p}")
+            metadatas.append({"paper_id": f"paper_{p}", "section_name": f"section_{s}"})
+        if len(ids) >= batch or p == n_papers - 1:
+            vectors = np.vstack(embeddings)
+            collection.add(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+            index.add(ids, vectors, documents, metadatas)
+            ids, embeddings, documents, metadatas = [], [], [], []
+
+    return collection, index, rng
+
+
+def time_call(func, repeats: int) -> float:
+    """Return the median wall-clock time of func() in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VectorIndex vs Chroma")
+    parser.add_argument("--papers", type=int, default=5000)
+    parser.add_argument("--sections", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print("\n" + "="*80)
+    print("VECTOR INDEX BENCHMARK")
+    print("="*80)
+    print(f"Corpus: {args.papers} papers x {args.sections} sections, dim={args.dim}")
+
+    collection, index, rng = build_collection(args.papers, args.sections, args.dim)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+    candidates = [f"paper_{i}" for i in rng.choice(args.papers, size=args.candidates, replace=False)]
+    n_candidate_sections = args.candidates * args.sections
+
+    # 1. Candidate-restricted re-ranking
+    chroma_ms = time_call(
+        lambda: collection.query(
+            query_embeddings=[query.tolist()],
+            n_results=min(args.k, n_candidate_sections),
+            where={"paper_id": {"$in": candidates}}
+        ),
+        args.repeats
+    )
+    index_ms = time_call(lambda: index.search(query, n_results=args.k, paper_ids=candidates), args.repeats)
+    print(f"\n1. Re-rank {args.candidates} candidates:")
+    print(f"   collection.query: {chroma_ms:8.3f} ms")
+    print(f"   VectorIndex:      {index_ms:8.3f} ms ({chroma_ms / max(index_ms, 1e-9):.0f}x)")
+
+    # 2. Global top-k
+    chroma_ms = time_call(
+        lambda: collection.query(query_embeddings=[query.tolist()], n_results=args.k),
+        args.repeats
+    )
+    index_ms = time_call(lambda: index.search(query, n_results=args.k), args.repeats)
+    print(f"\n2. Global top-{args.k}:")
+    print(f"   collection.query: {chroma_ms:8.3f} ms")
+    print(f"   VectorIndex:      {index_ms:8.3f} ms ({chroma_ms / max(index_ms, 1e-9):.0f}x)")
+
+    # 3. Agreement (restricted search is exact in both)
+    chroma_ids = collection.query(
+        query_embeddings=[query.tolist()],
+        n_results=args.k,
+        where={"paper_id": {"$in": candidates}}
+    )["ids"][0]
+    index_ids = [r["id"] for r in index.search(query, n_results=args.k, paper_ids=candidates)]
+    overlap = len(set(chroma_ids) & set(index_ids))
+    print(f"\n3. Top-{args.k} overlap on candidate re-rank: {overlap}/{args.k}")
+    if overlap == args.k:
+        print("   ✅ Results match")
+    else:
+        print("   ⚠️  Results differ (HNSW is approximate)")
+
+
+if __name__ == "__main__":
+    main()